@@ -0,0 +1,258 @@
+"""
+Benchmark Suite
+File: benchmarks/run_benchmarks.py
+
+Times every DataScrubber method and the clean_customers_data, clean_products_data,
+and clean_sales_data functions of the prepare scripts at several data sizes.
+The data comes from scripts/generate_synthetic_data.py (same seed every run).
+
+For every case and size it records:
+- seconds: median wall time over --repeat runs
+- rows_per_sec: input rows divided by seconds
+- peak_bytes: peak Python/NumPy memory of one run, measured with tracemalloc
+  in a separate run so tracing does not slow the timed runs
+
+Results are written to benchmarks/results.json. With --save-baseline they also
+become the baseline (benchmarks/baseline.json). Without it, every case is compared
+with the baseline, and the run fails (exit code 1) if any case is slower or uses
+more memory than the baseline by more than the threshold.
+
+Memoized values (string normalizers, date parsers) are warm after the first timed
+run, as they would be in a long-running pipeline.
+
+To run it, open a terminal in the root project folder.
+Activate the local project virtual environment.
+Choose the correct command for your OS to run this script.
+
+py benchmarks\\run_benchmarks.py --save-baseline
+python3 benchmarks/run_benchmarks.py --sizes 10000 100000 --threshold 0.25
+"""
+
+import argparse
+import json
+import pathlib
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from utils.utils_logger import logger  # noqa: E402
+from scripts.data_scrubber import DataScrubber  # noqa: E402
+from scripts.data_preparation.prepare_customers_data import clean_customers_data  # noqa: E402
+from scripts.data_preparation.prepare_products_data import clean_products_data  # noqa: E402
+from scripts.data_preparation.prepare_sales_data import RULES as SALES_RULES, clean_sales_data  # noqa: E402
+from scripts.generate_synthetic_data import generate_all  # noqa: E402
+from scripts.ingestion import DatasetReader  # noqa: E402
+
+BENCHMARK_DIR = PROJECT_ROOT / "benchmarks"
+BASELINE_FILE = BENCHMARK_DIR / "baseline.json"
+RESULTS_FILE = BENCHMARK_DIR / "results.json"
+
+# Sales rows per run; customers and products scale with them
+SIZES = [10_000, 100_000, 1_000_000]
+REPEAT = 3
+
+# A case regresses when it is this much slower (or uses this much more memory) than the baseline
+THRESHOLD = 0.25
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS = 0.005
+MIN_BYTES = 1_000_000
+
+NUMERIC_SALES_COLUMNS = ['TransactionID', 'CustomerID', 'ProductID', 'StoreID', 'CampaignID', 'SaleAmount']
+
+# DataScrubber cases: method name -> call on the sales data (numeric columns coerced)
+SCRUBBER_CASES: Dict[str, Callable[[pd.DataFrame], Any]] = {
+    'apply_schema': lambda df: DataScrubber(df).apply_schema(SALES_RULES.schema),
+    'check_data_consistency_after_cleaning': lambda df: DataScrubber(df).check_data_consistency_after_cleaning(),
+    'check_data_consistency_before_cleaning': lambda df: DataScrubber(df).check_data_consistency_before_cleaning(),
+    'collect': lambda df: (DataScrubber(df, lazy=True).handle_missing_data(fill_value=0).remove_duplicate_records()
+                           .filter_column_outliers('SaleAmount', 0.1, 10000).drop_columns(['CampaignID']).collect()),
+    'compact_memory': lambda df: DataScrubber(df).compact_memory(),
+    'convert_column_to_new_data_type': lambda df: DataScrubber(df).convert_column_to_new_data_type('StoreID', 'float'),
+    'drop_columns': lambda df: DataScrubber(df).drop_columns(['CampaignID']),
+    'explain': lambda df: (DataScrubber(df, lazy=True).remove_duplicate_records().drop_columns(['CampaignID'])
+                           .explain()),
+    'filter_column_outliers': lambda df: DataScrubber(df).filter_column_outliers('SaleAmount', 0.1, 10000),
+    'format_column_strings_to_lower_and_trim': lambda df: DataScrubber(df).format_column_strings_to_lower_and_trim('SaleDate'),
+    'format_column_strings_to_upper_and_trim': lambda df: DataScrubber(df).format_column_strings_to_upper_and_trim('SaleDate'),
+    'handle_missing_data': lambda df: DataScrubber(df).handle_missing_data(fill_value=0),
+    'inspect_data': lambda df: DataScrubber(df).inspect_data(),
+    'normalize_column_strings': lambda df: DataScrubber(df).normalize_column_strings('SaleDate', ['strip', 'collapse_whitespace']),
+    'parse_dates_to_add_standard_datetime': lambda df: DataScrubber(df).parse_dates_to_add_standard_datetime('SaleDate'),
+    'profile': lambda df: DataScrubber(df).profile(),
+    'remove_duplicate_records': lambda df: DataScrubber(df).remove_duplicate_records(),
+    'rename_columns': lambda df: DataScrubber(df).rename_columns({'SaleAmount': 'Amount'}),
+    'reorder_columns': lambda df: DataScrubber(df).reorder_columns(['SaleAmount', 'SaleDate', 'TransactionID']),
+}
+
+# Cases that expect data without missing values or duplicates
+CLEAN_INPUT_CASES = {'check_data_consistency_after_cleaning'}
+
+# Prepare-script cases: name -> (dataset, cleaning function on the dirty data)
+PREPARE_CASES = {
+    'clean_customers_data': ('customers', clean_customers_data),
+    'clean_products_data': ('products', clean_products_data),
+    'clean_sales_data': ('sales', clean_sales_data),
+}
+
+
+def missing_scrubber_cases() -> List[str]:
+    """Public DataScrubber methods that have no benchmark case."""
+    methods = [name for name in vars(DataScrubber) if not name.startswith('_') and callable(getattr(DataScrubber, name))]
+    return sorted(set(methods) - set(SCRUBBER_CASES))
+
+
+def load_datasets(size: int, data_dir: pathlib.Path) -> Dict[str, pd.DataFrame]:
+    """Generate the synthetic files for one size and read them the way the prepare scripts do."""
+    generate_all(sales_rows=size, product_count=max(10, size // 100), chunk_size=min(size, 1_000_000),
+                 output_dir=data_dir)
+    reader = DatasetReader()
+    datasets = {name: reader.read(data_dir / f"{name}_data.csv", name, text=True)
+                for name in ('customers', 'products', 'sales')}
+    scrubber_input = datasets['sales'].copy()
+    for column in NUMERIC_SALES_COLUMNS:
+        scrubber_input[column] = pd.to_numeric(scrubber_input[column], errors='coerce')
+    datasets['scrubber'] = scrubber_input
+    datasets['scrubber_clean'] = scrubber_input.fillna(0).drop_duplicates()
+    return datasets
+
+
+def measure(run: Callable[[pd.DataFrame], Any], df: pd.DataFrame, repeat: int) -> Dict[str, float]:
+    """Time `run` on fresh copies of df, then measure its peak memory in one traced run."""
+    times = []
+    for _ in range(repeat):
+        data = df.copy()  # methods may change their input; copying is not timed
+        start = time.perf_counter()
+        run(data)
+        times.append(time.perf_counter() - start)
+    data = df.copy()
+    tracemalloc.start()
+    try:
+        run(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    seconds = statistics.median(times)
+    return {
+        'rows': len(df),
+        'seconds': round(seconds, 6),
+        'rows_per_sec': round(len(df) / seconds) if seconds > 0 else None,
+        'peak_bytes': peak,
+    }
+
+
+def run_benchmarks(sizes: List[int], repeat: int = REPEAT, only: str = "") -> Dict[str, Dict[str, float]]:
+    """
+    Run every case at every size.
+
+    Parameters:
+        sizes (list): Sales row counts to test.
+        repeat (int, optional): Timed runs per case. Default is REPEAT.
+        only (str, optional): Only run cases whose name contains this text.
+
+    Returns:
+        dict: "case@size" -> measurements.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            datasets = load_datasets(size, pathlib.Path(tmp) / str(size))
+            cases = {name: ('scrubber_clean' if name in CLEAN_INPUT_CASES else 'scrubber', run)
+                     for name, run in SCRUBBER_CASES.items()}
+            cases.update(PREPARE_CASES)
+            for name, (dataset, run) in cases.items():
+                if only and only not in name:
+                    continue
+                key = f"{name}@{size}"
+                results[key] = measure(run, datasets[dataset], repeat)
+                print(f"{key:<55} {results[key]['seconds']:>10.4f}s {results[key]['rows_per_sec'] or 0:>14,} rows/s "
+                      f"{results[key]['peak_bytes'] / 1e6:>10.1f} MB")
+    return results
+
+
+def find_regressions(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                     threshold: float = THRESHOLD) -> List[str]:
+    """
+    Compare results with a baseline.
+
+    Returns:
+        list: One message per case that is slower or uses more memory than allowed.
+              Cases missing from either side are not compared.
+    """
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        slower = result['seconds'] - before['seconds']
+        if slower > MIN_SECONDS and result['seconds'] > before['seconds'] * (1 + threshold):
+            regressions.append(f"{key}: {before['seconds']:.4f}s -> {result['seconds']:.4f}s")
+        bigger = result['peak_bytes'] - before['peak_bytes']
+        if bigger > MIN_BYTES and result['peak_bytes'] > before['peak_bytes'] * (1 + threshold):
+            regressions.append(f"{key}: peak {before['peak_bytes']} -> {result['peak_bytes']} bytes")
+    return regressions
+
+
+def environment() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'system': platform.system(),
+    }
+
+
+def write_results(path: pathlib.Path, results: Dict[str, Dict[str, float]]) -> None:
+    path.write_text(json.dumps({'environment': environment(), 'results': results}, indent=2, sort_keys=True))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark DataScrubber and the prepare scripts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--only", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--baseline", type=pathlib.Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    logger.disable("scripts")  # the prepare functions log every step
+    missing = missing_scrubber_cases()
+    if missing:
+        print(f"WARNING: DataScrubber methods without a benchmark case: {missing}")
+
+    results = run_benchmarks(args.sizes, args.repeat, args.only)
+    write_results(RESULTS_FILE, results)
+    if args.save_baseline:
+        write_results(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())['results']
+    regressions = find_regressions(results, baseline, args.threshold)
+    if regressions:
+        print(f"FAILED: {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"OK: no regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
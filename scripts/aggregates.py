@@ -0,0 +1,363 @@
+"""
+scripts/aggregates.py
+
+Do not run this script directly.
+Instead, from this module (scripts.aggregates)
+import AggregateRefresh and query_sales.
+
+Summary tables of the sales fact, kept up to date by the ETL (see scripts/etl_to_dw.py),
+and a query router that answers sales questions from the smallest one that can.
+
+AGGREGATES declares each summary table by its grain, the columns it groups by:
+- agg_sales_day_product_store: date × product × store (with the date's year, quarter, month)
+- agg_sales_month_region_category: month × customer region × product category
+- agg_sales_month_customer: month × customer
+Each row holds sale_count and total_sales (the sum of sale_amount, 0 if none) of its
+group. Sales join date_dim, customers, and products for the grain columns; a sale
+missing from a dimension is kept, with NULL for the dimension's columns.
+
+Refresh (AggregateRefresh). Between diff_table() and apply_diff() of the sales load
+(scripts/incremental_load.py), the rows about to be replaced or deleted are summed by
+each grain (before_fact); after it, the rows just written are (after_fact). Their
+difference is added to the matching groups, and groups left without sales are deleted.
+Only the changed fact rows are read, so the cost follows the size of the change, not
+of the fact. An aggregate is rebuilt from the whole fact instead when:
+- the fact was reloaded in full, or more than REBUILD_FRACTION of its rows changed
+  (including the first load), where one pass over the fact is faster;
+- a dimension it takes columns from changed for sales already loaded (e.g. a customer
+  moved region, or a new product matches sales that had none);
+- its counts did not add up to the fact's row count before the load (e.g. it is new).
+
+Each refresh records the aggregate's row count in STATE_TABLE, so neither the router
+nor the refresh counts the rows of an aggregate.
+
+Routing (query_sales). A question is the columns to group by, filters, and measures.
+It is answered from the aggregate with the fewest rows (as recorded in STATE_TABLE)
+that has every column it uses, or, if none has, from the sales fact joined to its
+dimensions, with the same result. An aggregate that has no recorded refresh is not used.
+
+Example:
+
+    totals = query_sales(conn, ["year", "quarter", "month"])
+    top_customers = query_sales(conn, ["customer_id"], filters={"year": 2024}, order_by="total_sales",
+                                descending=True, limit=10)
+"""
+
+import datetime
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scripts.bulk_loader import bulk_insert
+from scripts.incremental_load import TableDiff
+
+FACT_TABLE = "sales"
+FACT_KEY = "transaction_id"
+
+# The fact joined to its dimensions. Left joins keep sales missing from a dimension.
+FACT_SOURCE = """sales s
+    LEFT JOIN date_dim d ON s.sale_date_key = d.date_key
+    LEFT JOIN customers c ON s.customer_id = c.customer_id
+    LEFT JOIN products p ON s.product_id = p.product_id"""
+
+# Column name -> (SQL expression on FACT_SOURCE, the dimension table it comes from, or None for the fact)
+COLUMNS: Dict[str, Tuple[str, Optional[str]]] = {
+    "date_key": ("s.sale_date_key", None),
+    "year": ("d.year", "date_dim"),
+    "quarter": ("d.quarter", "date_dim"),
+    "month": ("d.month", "date_dim"),
+    "product_id": ("s.product_id", None),
+    "store_id": ("s.store_id", None),
+    "customer_id": ("s.customer_id", None),
+    "region": ("c.region", "customers"),
+    "category": ("p.category", "products"),
+}
+
+# Measure name -> SQL on the fact rows, and on aggregate rows
+MEASURES: Dict[str, Tuple[str, str]] = {
+    "sale_count": ("COUNT(*)", "SUM(sale_count)"),
+    "total_sales": ("TOTAL(s.sale_amount)", "TOTAL(total_sales)"),
+    "avg_sale": ("TOTAL(s.sale_amount) / COUNT(*)", "TOTAL(total_sales) / SUM(sale_count)"),
+}
+
+
+@dataclass(frozen=True)
+class Aggregate:
+    name: str
+    columns: Tuple[str, ...]
+
+    @property
+    def dimensions(self) -> List[str]:
+        """The dimension tables this aggregate takes columns from."""
+        return sorted({COLUMNS[column][1] for column in self.columns} - {None})
+
+
+AGGREGATES: Tuple[Aggregate, ...] = (
+    Aggregate("agg_sales_day_product_store", ("date_key", "year", "quarter", "month", "product_id", "store_id")),
+    Aggregate("agg_sales_month_region_category", ("year", "quarter", "month", "region", "category")),
+    Aggregate("agg_sales_month_customer", ("year", "quarter", "month", "customer_id")),
+)
+
+# Rebuild instead of applying the change when it touches more than this fraction of the fact's rows
+REBUILD_FRACTION = 0.2
+
+# The fact's foreign key to each dimension
+DIMENSION_KEYS = {"date_dim": "sale_date_key", "customers": "customer_id", "products": "product_id"}
+
+# Temporary tables of the refresh
+KEYS_TABLE = "aggregate_keys"
+DELTA_TABLE = "aggregate_delta"
+
+# Each aggregate's row count as of its last refresh, for the router
+STATE_TABLE = "etl_aggregates"
+
+
+def _column_types(aggregate: Aggregate) -> Dict[str, str]:
+    return {column: "TEXT" if column in ("region", "category") else "INTEGER" for column in aggregate.columns}
+
+
+def create_aggregate_tables(conn: sqlite3.Connection, aggregates: Sequence[Aggregate] = AGGREGATES) -> None:
+    """Create the aggregate tables, each with an index on its grain, and STATE_TABLE if they do not exist."""
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} "
+                 f"(aggregate_name TEXT PRIMARY KEY, row_count INTEGER, refreshed_at TEXT)")
+    for aggregate in aggregates:
+        columns = ", ".join(f"{column} {kind}" for column, kind in _column_types(aggregate).items())
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {aggregate.name} ({columns}, sale_count INTEGER, total_sales REAL)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{aggregate.name} ON {aggregate.name} "
+                     f"({', '.join(aggregate.columns)})")
+
+
+def _group_sql(aggregate: Aggregate, where: str = "") -> str:
+    """Sum the fact rows (those matching `where`) by the aggregate's grain."""
+    expressions = [f"{COLUMNS[column][0]} AS {column}" for column in aggregate.columns]
+    return (f"SELECT {', '.join(expressions)}, COUNT(*) AS sale_count, TOTAL(s.sale_amount) AS total_sales "
+            f"FROM {FACT_SOURCE} {where} GROUP BY {', '.join(str(i + 1) for i in range(len(aggregate.columns)))}")
+
+
+def aggregate_sizes(conn: sqlite3.Connection) -> Dict[str, int]:
+    """The row count of each aggregate as of its last refresh (none before the first)."""
+    try:
+        return dict(conn.execute(f"SELECT aggregate_name, row_count FROM {STATE_TABLE}").fetchall())
+    except sqlite3.OperationalError:  # a warehouse loaded before the aggregates existed
+        return {}
+
+
+def _save_size(conn: sqlite3.Connection, aggregate: Aggregate, rows: int) -> None:
+    conn.execute(f"INSERT INTO {STATE_TABLE} VALUES (?, ?, ?) ON CONFLICT (aggregate_name) DO UPDATE "
+                 f"SET row_count = excluded.row_count, refreshed_at = excluded.refreshed_at",
+                 (aggregate.name, rows, datetime.datetime.now().isoformat(timespec="seconds")))
+
+
+def rebuild(conn: sqlite3.Connection, aggregate: Aggregate) -> int:
+    """Recompute an aggregate from the whole fact. Returns its row count."""
+    conn.execute(f"DELETE FROM {aggregate.name}")
+    rows = conn.execute(f"INSERT INTO {aggregate.name} ({', '.join(aggregate.columns)}, sale_count, total_sales) "
+                        f"{_group_sql(aggregate)}").rowcount
+    _save_size(conn, aggregate, rows)
+    return rows
+
+
+def _fill_keys(conn: sqlite3.Connection, keys: np.ndarray) -> None:
+    """Put keys in the temporary KEYS_TABLE, replacing what it held."""
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {KEYS_TABLE} (row_key INTEGER PRIMARY KEY)")
+    conn.execute(f"DELETE FROM {KEYS_TABLE}")
+    conn.executemany(f"INSERT OR IGNORE INTO {KEYS_TABLE} VALUES (?)", ((int(key),) for key in keys))
+
+
+def _sums(conn: sqlite3.Connection, aggregates: Sequence[Aggregate], keys: np.ndarray) -> Dict[str, pd.DataFrame]:
+    """Sum the fact rows with the given keys by each aggregate's grain."""
+    if not aggregates:
+        return {}
+    _fill_keys(conn, keys)
+    where = f"WHERE s.{FACT_KEY} IN (SELECT row_key FROM {KEYS_TABLE})"
+    return {aggregate.name: pd.read_sql(_group_sql(aggregate, where), conn) for aggregate in aggregates}
+
+
+def _apply_delta(conn: sqlite3.Connection, aggregate: Aggregate, old: pd.DataFrame, new: pd.DataFrame,
+                 rows: int) -> int:
+    """Add the new sums and subtract the old ones, to an aggregate of `rows` rows.
+    Returns the number of groups changed."""
+    columns = list(aggregate.columns)
+    old = old.assign(sale_count=-old["sale_count"], total_sales=-old["total_sales"])
+    delta = pd.concat([new, old], ignore_index=True).groupby(columns, dropna=False, as_index=False).sum()
+    delta = delta[(delta["sale_count"] != 0) | (delta["total_sales"] != 0)]
+    if delta.empty:
+        _save_size(conn, aggregate, rows)
+        return 0
+
+    match = " AND ".join(f"{aggregate.name}.{column} IS delta.{column}" for column in columns)
+    conn.execute(f"DROP TABLE IF EXISTS {DELTA_TABLE}")
+    conn.execute(f"CREATE TEMP TABLE {DELTA_TABLE} ({', '.join(columns)}, sale_count, total_sales)")
+    bulk_insert(conn, DELTA_TABLE, delta, rebuild_indexes=False)
+    conn.execute(f"UPDATE {aggregate.name} SET sale_count = {aggregate.name}.sale_count + delta.sale_count, "
+                 f"total_sales = {aggregate.name}.total_sales + delta.total_sales "
+                 f"FROM {DELTA_TABLE} AS delta WHERE {match}")
+    rows += conn.execute(f"INSERT INTO {aggregate.name} ({', '.join(columns)}, sale_count, total_sales) "
+                         f"SELECT {', '.join(columns)}, sale_count, total_sales FROM {DELTA_TABLE} AS delta "
+                         f"WHERE NOT EXISTS (SELECT 1 FROM {aggregate.name} WHERE {match})").rowcount
+    rows -= conn.execute(f"DELETE FROM {aggregate.name} WHERE sale_count <= 0").rowcount
+    conn.execute(f"DROP TABLE {DELTA_TABLE}")
+    _save_size(conn, aggregate, rows)
+    return len(delta)
+
+
+class AggregateRefresh:
+    def __init__(self, conn: sqlite3.Connection, aggregates: Sequence[Aggregate] = AGGREGATES):
+        """
+        Start refreshing the aggregates for one load, before any table is written.
+        Creates the aggregate tables and notes which ones are out of step with the fact,
+        or have no recorded row count.
+
+        Parameters:
+            conn (sqlite3.Connection): The warehouse connection, with the tables created.
+            aggregates (sequence, optional): The aggregates to maintain. Default is AGGREGATES.
+        """
+        self.conn = conn
+        self.aggregates = list(aggregates)
+        create_aggregate_tables(conn, self.aggregates)
+        fact_rows = conn.execute(f"SELECT COUNT(*) FROM {FACT_TABLE}").fetchone()[0]
+        self.sizes = aggregate_sizes(conn)
+        self.to_rebuild = {aggregate.name for aggregate in self.aggregates
+                           if aggregate.name not in self.sizes
+                           or (conn.execute(f"SELECT SUM(sale_count) FROM {aggregate.name}").fetchone()[0] or 0)
+                           != fact_rows}
+        self.old: Dict[str, pd.DataFrame] = {}
+
+    def _dimension_changed(self, table: str, diff: TableDiff) -> bool:
+        """
+        Whether a dimension load changed the columns of fact rows already loaded: rows of the
+        dimension were replaced or deleted, or rows were added that existing sales refer to.
+        """
+        if diff.full or diff.counts["updated"] or diff.counts["deleted"]:
+            return True
+        if not len(diff.fresh_keys):
+            return False
+        _fill_keys(self.conn, diff.fresh_keys)
+        referenced = self.conn.execute(f"SELECT 1 FROM {FACT_TABLE} WHERE {DIMENSION_KEYS[table]} IN "
+                                       f"(SELECT row_key FROM {KEYS_TABLE}) LIMIT 1").fetchone()
+        return referenced is not None
+
+    def before_fact(self, fact: TableDiff, dimensions: Mapping[str, TableDiff]) -> None:
+        """
+        Decide which aggregates to rebuild and sum the fact rows about to be replaced or deleted.
+        Call after the dimensions are loaded, between diff_table() and apply_diff() of the fact.
+
+        Parameters:
+            fact (TableDiff): The fact's diff.
+            dimensions (dict): Dimension table name -> its diff, for the dimensions loaded.
+        """
+        changed = {table for table, diff in dimensions.items() if self._dimension_changed(table, diff)}
+        large = len(fact.stale_keys) + len(fact.fresh_keys) > REBUILD_FRACTION * fact.existing
+        for aggregate in self.aggregates:
+            if fact.full or large or changed & set(aggregate.dimensions):
+                self.to_rebuild.add(aggregate.name)
+        self.old = _sums(self.conn, self._incremental(), fact.stale_keys)
+
+    def _incremental(self) -> List[Aggregate]:
+        return [aggregate for aggregate in self.aggregates if aggregate.name not in self.to_rebuild]
+
+    def after_fact(self, fact: TableDiff) -> Dict[str, Dict[str, Any]]:
+        """
+        Bring the aggregates up to date. Call after apply_diff() of the fact.
+
+        Returns:
+            dict: Aggregate name -> mode (incremental or rebuild), groups (changed, or all when rebuilt), seconds.
+        """
+        incremental = self._incremental()
+        new = _sums(self.conn, incremental, fact.fresh_keys)
+        reports = {}
+        for aggregate in self.aggregates:
+            start = time.perf_counter()
+            if aggregate in incremental:
+                groups = _apply_delta(self.conn, aggregate, self.old[aggregate.name], new[aggregate.name],
+                                      self.sizes[aggregate.name])
+                mode = "incremental"
+            else:
+                groups = rebuild(self.conn, aggregate)
+                mode = "rebuild"
+            reports[aggregate.name] = {"mode": mode, "groups": groups, "seconds": round(time.perf_counter() - start, 6)}
+        return reports
+
+
+def _where(filters: Mapping[str, Any], expression: Mapping[str, str]) -> Tuple[str, List[Any]]:
+    """A WHERE clause for filters: column -> value, list of values, or (low, high) range."""
+    conditions, params = [], []
+    for column, value in filters.items():
+        if isinstance(value, tuple):
+            conditions.append(f"{expression[column]} BETWEEN ? AND ?")
+            params.extend(value)
+        elif isinstance(value, list):
+            conditions.append(f"{expression[column]} IN ({', '.join('?' for _ in value)})")
+            params.extend(value)
+        else:
+            conditions.append(f"{expression[column]} = ?")
+            params.append(value)
+    return ("WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def route(conn: sqlite3.Connection, columns: Sequence[str],
+          aggregates: Sequence[Aggregate] = AGGREGATES) -> Optional[Aggregate]:
+    """
+    The aggregate with the fewest rows that has all the columns, or None (use the fact).
+    The row counts are those recorded by the last refresh, so no aggregate is scanned.
+    """
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown columns {sorted(unknown)}; choose from {list(COLUMNS)}")
+    sizes = aggregate_sizes(conn)
+    candidates = [aggregate for aggregate in aggregates
+                  if set(columns) <= set(aggregate.columns) and aggregate.name in sizes]
+    return min(candidates, key=lambda aggregate: sizes[aggregate.name], default=None)
+
+
+def query_sales(conn: sqlite3.Connection, group_by: Sequence[str] = (), filters: Optional[Mapping[str, Any]] = None,
+                measures: Sequence[str] = ("total_sales",), order_by: Optional[str] = None, descending: bool = False,
+                limit: Optional[int] = None, aggregates: Sequence[Aggregate] = AGGREGATES) -> pd.DataFrame:
+    """
+    Answer a sales question from the smallest aggregate that can, or from the fact.
+
+    Parameters:
+        conn (sqlite3.Connection): The warehouse connection.
+        group_by (sequence, optional): Columns of COLUMNS to group by. Default: one total row.
+        filters (dict, optional): Column -> value, list of values, or (low, high) inclusive range.
+        measures (sequence, optional): Names in MEASURES. Default is total_sales.
+        order_by (str, optional): A group_by column or measure. Default: the group_by columns.
+        descending (bool, optional): Sort in descending order. Default is False.
+        limit (int, optional): Keep only this many rows.
+        aggregates (sequence, optional): The aggregates to choose from. Default is AGGREGATES.
+
+    Returns:
+        pd.DataFrame: The group_by columns and measures. attrs['source'] names the table that answered.
+    """
+    filters = dict(filters or {})
+    unknown = set(measures) - set(MEASURES)
+    if unknown:
+        raise ValueError(f"Unknown measures {sorted(unknown)}; choose from {list(MEASURES)}")
+    aggregate = route(conn, [*group_by, *filters], aggregates)
+    if aggregate is None:
+        source, expression = FACT_SOURCE, {column: sql for column, (sql, _) in COLUMNS.items()}
+        measure_sql = {name: fact_sql for name, (fact_sql, _) in MEASURES.items()}
+    else:
+        source, expression = aggregate.name, {column: column for column in aggregate.columns}
+        measure_sql = {name: aggregate_sql for name, (_, aggregate_sql) in MEASURES.items()}
+
+    where, params = _where(filters, expression)
+    select = [f"{expression[column]} AS {column}" for column in group_by]
+    select += [f"{measure_sql[name]} AS {name}" for name in measures]
+    sql = f"SELECT {', '.join(select)} FROM {source} {where}"
+    if group_by:
+        sql += f" GROUP BY {', '.join(str(i + 1) for i in range(len(group_by)))}"
+    order = [order_by] if order_by else list(group_by)
+    direction = "DESC" if descending else "ASC"
+    if order:
+        sql += f" ORDER BY {', '.join(f'{column} {direction}' for column in order)}"
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+
+    result = pd.read_sql(sql, conn, params=params)
+    result.attrs["source"] = aggregate.name if aggregate is not None else FACT_TABLE
+    return result
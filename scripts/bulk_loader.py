@@ -0,0 +1,185 @@
+"""
+scripts/bulk_loader.py
+
+Do not run this script directly.
+Instead, from this module (scripts.bulk_loader)
+import load_pragmas, bulk_insert, and bulk_delete.
+
+Bulk loading of DataFrames into the SQLite warehouse (see scripts/etl_to_dw.py):
+
+- load_pragmas() sets LOAD_PRAGMAS on a connection for the duration of a load, and
+  restores the previous values afterwards. Rollback journal kept in memory, no fsync
+  per commit, a large page cache, and temporary tables in memory. The load block is
+  one transaction: it is committed when the block exits and rolled back if it raises.
+  The price is durability during the load only: if the machine crashes mid-load,
+  the database file may need to be rebuilt by reloading it.
+- bulk_insert() inserts a DataFrame with one prepared INSERT statement, executed
+  for BATCH_SIZE rows at a time, so only one batch of Python row tuples exists at once.
+  For loads of INDEX_REBUILD_ROWS rows or more, the table's secondary indexes are
+  dropped first and rebuilt once at the end, which is faster than updating them row
+  by row. It returns the rows loaded, the time taken, and rows per second.
+  With upsert_key, rows whose key already exists are updated in place
+  (INSERT ... ON CONFLICT DO UPDATE) instead of failing.
+- bulk_delete() deletes rows by key, BATCH_SIZE keys at a time.
+
+Values are stored as DataFrame.to_sql stores them: missing values as NULL, numbers
+as INTEGER or REAL, dates as 'YYYY-MM-DD HH:MM:SS' text.
+
+Example:
+
+    with load_pragmas(conn):
+        report = bulk_insert(conn, "sales", sales_df)
+    logger.info(f"Loaded {report['rows']} rows at {report['rows_per_sec']} rows/sec")
+"""
+
+import contextlib
+import sqlite3
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+
+# Connection settings during a load (restored afterwards)
+LOAD_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "MEMORY",
+    "synchronous": "OFF",
+    "cache_size": -256 * 1024,  # negative: KiB, so 256 MiB
+    "temp_store": "MEMORY",
+}
+
+# Rows per executemany call
+BATCH_SIZE = 50_000
+
+# Loads of at least this many rows drop the table's indexes and rebuild them at the end
+INDEX_REBUILD_ROWS = 100_000
+
+
+@contextlib.contextmanager
+def load_pragmas(conn: sqlite3.Connection, pragmas: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Apply load settings to a connection for the block, then restore the previous ones.
+    The block's changes are committed when it exits, or rolled back if it raises.
+
+    Parameters:
+        conn (sqlite3.Connection): The warehouse connection, outside a transaction.
+        pragmas (dict, optional): PRAGMA name -> value. Default is LOAD_PRAGMAS.
+
+    Yields:
+        dict: The previous values, which are restored.
+    """
+    pragmas = LOAD_PRAGMAS if pragmas is None else pragmas
+    if conn.in_transaction:
+        conn.commit()  # journal_mode cannot change inside a transaction
+    saved = {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in pragmas}
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    try:
+        yield saved
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        for name, value in saved.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+
+@contextlib.contextmanager
+def indexes_dropped(conn: sqlite3.Connection, table: str) -> Iterator[List[str]]:
+    """Drop a table's secondary indexes for the block and recreate them at the end. Yields their names."""
+    indexes = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? "
+                           "AND sql IS NOT NULL", (table,)).fetchall()  # automatic (key) indexes have no sql
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    try:
+        yield [name for name, _ in indexes]
+    finally:
+        for _, sql in indexes:
+            conn.execute(sql)
+
+
+def _sql_values(series: pd.Series) -> List[Any]:
+    """A column as Python values sqlite3 can bind, with None for missing values."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return [None if pd.isna(value) else str(value.to_pydatetime()) for value in series]
+    if not series.hasnans:
+        return series.tolist()  # Python ints, floats, and strings
+    values = series.astype(object)
+    return values.where(series.notna(), None).tolist()
+
+
+def _rows(df: pd.DataFrame) -> List[tuple]:
+    return list(zip(*(_sql_values(df[column]) for column in df.columns)))
+
+
+def _key_columns(key: Union[str, Sequence[str]]) -> List[str]:
+    return [key] if isinstance(key, str) else list(key)
+
+
+def bulk_insert(conn: sqlite3.Connection, table: str, df: pd.DataFrame, batch_size: int = BATCH_SIZE,
+                rebuild_indexes: Optional[bool] = None,
+                upsert_key: Optional[Union[str, Sequence[str]]] = None) -> Dict[str, Any]:
+    """
+    Insert every row of a DataFrame into an existing table, in batches of prepared inserts.
+
+    Parameters:
+        conn (sqlite3.Connection): The warehouse connection.
+        table (str): The table; its columns must include the DataFrame's columns.
+        df (pd.DataFrame): The rows. The index is not inserted.
+        batch_size (int, optional): Rows per executemany call. Default is BATCH_SIZE.
+        rebuild_indexes (bool, optional): Drop the table's indexes during the insert and rebuild
+            them after. Default: only for INDEX_REBUILD_ROWS rows or more.
+        upsert_key (str or list, optional): The table's primary key column(s). Rows whose key
+            exists are updated with the DataFrame's values. Default: plain inserts.
+
+    Returns:
+        dict: table, rows, seconds, rows_per_sec, and the indexes rebuilt.
+    """
+    columns = ", ".join(f'"{column}"' for column in df.columns)
+    placeholders = ", ".join("?" for _ in df.columns)
+    sql = f'INSERT INTO "{table}" ({columns}) VALUES ({placeholders})'
+    if upsert_key is not None:
+        keys = _key_columns(upsert_key)
+        updates = [f'"{column}" = excluded."{column}"' for column in df.columns if column not in keys]
+        target = ", ".join(f'"{column}"' for column in keys)
+        sql += f" ON CONFLICT ({target}) " + (f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING")
+    if rebuild_indexes is None:
+        rebuild_indexes = len(df) >= INDEX_REBUILD_ROWS
+
+    start = time.perf_counter()
+    with indexes_dropped(conn, table) if rebuild_indexes else contextlib.nullcontext([]) as rebuilt:
+        for batch in range(0, len(df), batch_size):
+            conn.executemany(sql, _rows(df.iloc[batch:batch + batch_size]))
+    seconds = time.perf_counter() - start
+    return {
+        "table": table,
+        "rows": len(df),
+        "seconds": round(seconds, 6),
+        "rows_per_sec": round(len(df) / seconds) if seconds > 0 else None,
+        "indexes_rebuilt": rebuilt,
+    }
+
+
+def bulk_delete(conn: sqlite3.Connection, table: str, key: Union[str, Sequence[str]], keys: pd.DataFrame,
+                batch_size: int = BATCH_SIZE) -> int:
+    """
+    Delete the rows of a table with the given keys.
+
+    Parameters:
+        conn (sqlite3.Connection): The warehouse connection.
+        table (str): The table.
+        key (str or list): The key column(s).
+        keys (pd.DataFrame or Series): The key values of the rows to delete, one column per key column.
+        batch_size (int, optional): Keys per executemany call. Default is BATCH_SIZE.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    columns = _key_columns(key)
+    keys = keys.to_frame() if isinstance(keys, pd.Series) else keys
+    condition = " AND ".join(f'"{column}" = ?' for column in columns)
+    sql = f'DELETE FROM "{table}" WHERE {condition}'
+    before = conn.total_changes
+    for batch in range(0, len(keys), batch_size):
+        conn.executemany(sql, _rows(keys.iloc[batch:batch + batch_size]))
+    return conn.total_changes - before
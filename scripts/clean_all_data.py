@@ -1,70 +1,218 @@
 """
 Script: clean_all_data.py
 
-This script processes all CSV files in the 'data/raw' directory using the DataScrubber class.
+This script processes all CSV files in the 'data/raw' directory using the StreamingScrubber class.
 It performs data cleaning and saves the cleaned files to 'data/actual_clean_data/' 
 with a prefix 'clean_' added to the filenames.
 
+Files are read and written in chunks of CHUNK_SIZE rows, so memory use does not
+depend on the size of the raw file. Duplicates are still removed across the whole file.
+
+Files are cleaned in parallel, one file per worker process (MAX_WORKERS). A file
+larger than RANGE_SIZE is instead split into byte ranges that all workers parse at
+once (see DatasetReader.iter_chunks in scripts/ingestion.py), while the cleaning and
+writing stay in order. Files of the customers, products, and sales datasets are read with
+their declared column types; other columns get the types of the first range. So every
+range is parsed with the same types, and the cleaned file is the same as when the file is read whole.
+
+Each file is cleaned on its own: a file that fails does not stop the others. Transient
+I/O errors (e.g. a file still being copied in, a network share timing out) are retried
+RETRIES times, waiting RETRY_DELAY seconds, then twice as long each time. Errors in the
+data are not retried. The script exits with code 1 if any file failed.
+
+Every run writes MANIFEST_FILE, listing each file's status (ok, failed, or cached),
+time, rows in and out, attempts, and error, plus a table in the log.
+
+For append-style loads, set USE_DEDUP_INDEX = True. Each file then also drops rows
+already seen in earlier runs, using a persistent row hash index per file name
+stored in DEDUP_INDEX_DIR (see scripts/dedup_index.py).
+
+A file whose contents, settings, and cleaning code are unchanged since its last
+successful run is skipped and its cleaned file from that run is kept
+(see scripts/stage_cache.py). Add --force to clean every file again. The cache
+is not used with USE_DEDUP_INDEX, because the output then also depends on earlier runs.
+
 Usage:
     Run this script from the root project directory with:
         py scripts/clean_all_data.py
+        py scripts/clean_all_data.py --force
 """
 
+import errno
+import json
 import pathlib
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
 import pandas as pd
 
-# Manually add the scripts folder to Python path
+# Manually add the project root to Python path
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
-SCRIPTS_DIR = PROJECT_ROOT / "scripts"
 
-if str(SCRIPTS_DIR) not in sys.path:
-    sys.path.append(str(SCRIPTS_DIR))
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
 
-# Now import DataScrubber
-from data_scrubber import DataScrubber  
+# Now import StreamingScrubber
+from utils.utils_logger import logger  # noqa: E402
+from scripts.streaming_scrubber import StreamingScrubber  # noqa: E402
+from scripts.csv_ranges import read_header  # noqa: E402
+from scripts.ingestion import DatasetReader, declared_types  # noqa: E402
+from scripts.stage_metrics import count_rows_in, count_rows_out  # noqa: E402
+from scripts.dedup_index import RowHashIndex  # noqa: E402
+from scripts.pipeline_runner import FAILED, OK, Stage, StageResult, format_report, run_pipeline  # noqa: E402
+from scripts.stage_cache import LIBRARY_CODE, StageCache  # noqa: E402
 
 # Define directories
 RAW_DATA_DIR = PROJECT_ROOT / "data" / "raw"
 CLEANED_DATA_DIR = PROJECT_ROOT / "data" / "actual_clean_data"
+MANIFEST_FILE = CLEANED_DATA_DIR / "manifest.json"
+
+# Number of rows read, cleaned, and written at a time
+CHUNK_SIZE = 100_000
+
+# Worker processes (None: one per CPU)
+MAX_WORKERS: Optional[int] = None
+
+# Files larger than this many bytes are split into byte ranges of this size, parsed in parallel
+RANGE_SIZE = 64 * 1024 * 1024
+
+# Retries of transient I/O errors, and the first wait in seconds (doubled after each retry)
+RETRIES = 3
+RETRY_DELAY = 1.0
+
+# Drop rows already cleaned in earlier runs (for nightly append loads)
+USE_DEDUP_INDEX = False
+DEDUP_INDEX_DIR = PROJECT_ROOT / "data" / "dedup_index"
+
+# OSError numbers worth retrying; other OSErrors (missing file, no permission) are not
+TRANSIENT_ERRNOS = {errno.EIO, errno.EAGAIN, errno.EBUSY, errno.EINTR, errno.ETIMEDOUT, errno.ESTALE}
 
 # Ensure the output directory exists
 CLEANED_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-def process_file(file_path: pathlib.Path):
-    """Reads, cleans, and saves a CSV file using the DataScrubber class."""
-    try:
-        df = pd.read_csv(file_path)  # Read raw data
-        scrubber = DataScrubber(df)  # Create a DataScrubber object
-        
-        # Perform cleaning operations
-        df = scrubber.handle_missing_data(fill_value="Unknown")
-        df = scrubber.remove_duplicate_records()
-
-        # Save the cleaned file with 'clean_' prefix
-        clean_filename = f"clean_{file_path.name}"
-        cleaned_path = CLEANED_DATA_DIR / clean_filename
-        df.to_csv(cleaned_path, index=False)
-
-        print(f"Cleaned file saved: {cleaned_path}")
-    
-    except Exception as e:
-        print(f"Error processing {file_path.name}: {e}")
-
-def main():
-    """Processes all CSV files in the raw data folder."""
-    print("Starting Data Cleaning Process")
-
-    csv_files = list(RAW_DATA_DIR.glob("*.csv"))  # Get all CSV files in raw data folder
+def cleaned_path_for(file_path: pathlib.Path) -> pathlib.Path:
+    """The cleaned file for a raw file: same name with a 'clean_' prefix, in CLEANED_DATA_DIR."""
+    return CLEANED_DATA_DIR / f"clean_{file_path.name}"
+
+def is_transient(error: BaseException) -> bool:
+    """True for I/O errors that may succeed when tried again."""
+    if isinstance(error, (TimeoutError, ConnectionError, InterruptedError, BlockingIOError)):
+        return True
+    return isinstance(error, OSError) and error.errno in TRANSIENT_ERRNOS
+
+def clean_file(file_path: pathlib.Path, executor: Optional[ProcessPoolExecutor] = None) -> Dict[str, int]:
+    """Reads, cleans, and saves a CSV file chunk by chunk using the StreamingScrubber class.
+    With an executor, the file is parsed as byte ranges in parallel instead.
+    Returns the rows read and written, and the number of ranges parsed in parallel."""
+    reader = DatasetReader(workers=MAX_WORKERS)
+    if executor is not None:
+        columns, _ = read_header(file_path)  # Keep every column, not only the declared ones
+        chunks = reader.iter_chunks(file_path, columns=columns, range_size=RANGE_SIZE, executor=executor)
+    else:
+        chunks = pd.read_csv(file_path, chunksize=CHUNK_SIZE, dtype=declared_types(file_path))  # Read raw data lazily
+    scrubber = StreamingScrubber(chunks)  # Create a StreamingScrubber object
+
+    # Record cleaning operations
+    index = RowHashIndex.for_dataset(file_path.stem, DEDUP_INDEX_DIR) if USE_DEDUP_INDEX else None
+    scrubber.handle_missing_data(fill_value="Unknown")
+    scrubber.remove_duplicate_records(index=index)
+
+    # Clean and save the file with 'clean_' prefix
+    cleaned_path = cleaned_path_for(file_path)
+    rows_written = scrubber.to_csv(cleaned_path)
+    if index is not None:
+        index.save()  # Only remember the rows once they have been written
+
+    if executor is None:
+        count_rows_in(scrubber.rows_in)  # DatasetReader.iter_chunks counts its own rows
+    count_rows_out(rows_written)
+
+    logger.info(f"Cleaned file saved: {cleaned_path} ({rows_written} of {scrubber.rows_in} rows kept)")
+    ranges = reader.last_report["ranges"] if executor is not None else 0
+    return {"rows_in": scrubber.rows_in, "rows_out": rows_written, "ranges": ranges}
+
+def process_file(file_path: pathlib.Path, split: bool = False) -> Dict[str, int]:
+    """Clean one file, retrying transient I/O errors. With split, parse it as byte ranges in a
+    worker pool. Returns the counts from clean_file plus the attempts; raises the last error."""
+    attempt = 1
+    while True:
+        try:
+            if split:
+                with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                    counts = clean_file(file_path, executor)
+            else:
+                counts = clean_file(file_path)
+            return {**counts, "attempts": attempt}
+        except Exception as e:
+            if attempt > RETRIES or not is_transient(e):
+                logger.error(f"Error processing {file_path.name} (attempt {attempt}): {e}")
+                raise
+            delay = RETRY_DELAY * 2 ** (attempt - 1)
+            logger.warning(f"Error processing {file_path.name} (attempt {attempt}): {e}; retrying in {delay:g} s")
+            time.sleep(delay)
+            attempt += 1
+
+def build_stages(files: List[pathlib.Path], split: bool = False) -> List[Stage]:
+    """One cleaning stage per raw file."""
+    params = {"CHUNK_SIZE": CHUNK_SIZE, "USE_DEDUP_INDEX": USE_DEDUP_INDEX}
+    return [Stage(f"clean_all_data:{file.name}", process_file, args=(file,), kwargs={"split": split},
+                  inputs=[file], outputs=[cleaned_path_for(file)], code=LIBRARY_CODE, params=params)
+            for file in files]
+
+def write_manifest(results: Dict[str, StageResult], files: List[pathlib.Path], seconds: float) -> Dict[str, Any]:
+    """Save which files were cleaned, with their times, counts, and errors, to MANIFEST_FILE."""
+    entries = []
+    for file in files:
+        result = results[f"clean_all_data:{file.name}"]
+        entries.append({
+            "file": str(file),
+            "output": str(cleaned_path_for(file)),
+            "status": "cached" if result.cached else result.status,
+            "seconds": round(result.seconds, 3),
+            **(result.value or {}),
+            "error": result.error.strip().splitlines()[-1] if result.error else None,
+        })
+    manifest = {
+        "finished": datetime.now().isoformat(timespec="seconds"),
+        "seconds": round(seconds, 3),
+        "succeeded": sum(entry["status"] in (OK, "cached") for entry in entries),
+        "failed": sum(entry["status"] == FAILED for entry in entries),
+        "files": entries,
+    }
+    MANIFEST_FILE.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+def main(force: bool = False) -> int:
+    """Processes all CSV files in the raw data folder in parallel, skipping the unchanged ones.
+    Returns 1 if any file failed."""
+    logger.info("Starting Data Cleaning Process")
+    cache = StageCache(force=force or USE_DEDUP_INDEX)
+
+    csv_files = sorted(RAW_DATA_DIR.glob("*.csv"))  # Get all CSV files in raw data folder
     if not csv_files:
-        print("No CSV files found in raw data folder.")
-        return
-
-    for file in csv_files:
-        print(f"Processing: {file.name}...")
-        process_file(file)
-
-    print("All files processed successfully!")
+        logger.warning("No CSV files found in raw data folder.")
+        return 0
+
+    start = time.perf_counter()
+    large = [file for file in csv_files if file.stat().st_size > RANGE_SIZE]
+    small = [file for file in csv_files if file not in large]
+    # Small files: one per worker. Large files: one at a time, each parsed by all workers.
+    results = run_pipeline(build_stages(small), max_workers=MAX_WORKERS, parallel=len(small) > 1, cache=cache)
+    results.update(run_pipeline(build_stages(large, split=True), parallel=False, cache=cache))
+    manifest = write_manifest(results, csv_files, time.perf_counter() - start)
+
+    logger.info(f"Cleaning stages:\n{format_report(results)}")
+    logger.info(f"Stage cache: {cache.summary()}")
+    logger.info(f"Manifest saved: {MANIFEST_FILE}")
+    if manifest["failed"]:
+        logger.error(f"{manifest['failed']} of {len(csv_files)} files failed: "
+                     f"{[entry['file'] for entry in manifest['files'] if entry['status'] == FAILED]}")
+        return 1
+    logger.info("All files processed successfully!")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main(force="--force" in sys.argv[1:]))
@@ -0,0 +1,300 @@
+"""
+scripts/column_schema.py
+
+Do not run this script directly.
+Instead, use DataScrubber.apply_schema(), or call convert_columns() and
+validate() from this module.
+
+A schema describes a whole dataset: for each column, its type, whether it may
+be missing, its valid range, and its allowed values. Applying a schema takes
+two passes instead of one convert/dropna/filter round per column:
+
+1. convert_columns() converts every column in the schema at once. Columns are
+   independent, so large frames are converted across a thread pool (the
+   pandas/NumPy conversion loops release the GIL). Values that cannot be
+   converted become missing.
+2. validate() checks every rule on the converted columns, plus any
+   named row rules across columns (DataFrame.eval expressions), and combines
+   the results into one boolean mask, so invalid rows are removed with a
+   single filter. It also counts the failures per column and rule, and gives
+   every rejected row a reason code (e.g. 'UnitPrice:below_min') from the
+   same check results. validity_mask() returns just the mask and counts.
+
+Example:
+
+    schema = {
+        'CustomerID': ColumnSpec('numeric', nullable=False, min=1000, max=1100),
+        'Region': ColumnSpec('string', nullable=False, transforms=('strip', 'capitalize'),
+                             allowed=frozenset({'East', 'West', 'North', 'South'})),
+        'JoinDate': ColumnSpec('datetime', nullable=False),
+    }
+    df = DataScrubber(df).apply_schema(schema)
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from scripts.date_parser import DateParser
+from scripts.string_normalizer import StringNormalizer
+
+# Supported column types
+DTYPES = ("numeric", "int", "float", "string", "category", "datetime", "bool")
+
+# Frames with fewer rows are converted on the calling thread; the pool is not worth starting
+PARALLEL_MIN_ROWS = 50_000
+
+# Column of the reason code in rejected-row output
+REASON_COLUMN = "RejectReason"
+
+_TRUE_STRINGS = {"true", "t", "yes", "y", "1"}
+_FALSE_STRINGS = {"false", "f", "no", "n", "0"}
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    """
+    The expected type and valid values of one column.
+
+    dtype is one of DTYPES. 'numeric' keeps whatever pd.to_numeric infers, 'int' only
+    accepts whole numbers (as nullable Int64), and 'string' and 'category' values are
+    normalized with `transforms` (see scripts/string_normalizer.py). For string columns
+    that are not nullable, an empty string counts as missing.
+    """
+
+    dtype: str
+    nullable: bool = True
+    min: Optional[Any] = None
+    max: Optional[Any] = None
+    allowed: Optional[FrozenSet[Any]] = None
+    transforms: Tuple[str, ...] = ()
+    date_format: Optional[str] = None
+
+    def __post_init__(self):
+        if self.dtype not in DTYPES:
+            raise ValueError(f"Unknown column type: {self.dtype}. Choose from {DTYPES}.")
+        if self.allowed is not None and not isinstance(self.allowed, frozenset):
+            object.__setattr__(self, 'allowed', frozenset(self.allowed))
+        object.__setattr__(self, 'transforms', tuple(self.transforms))
+
+
+Schema = Mapping[str, ColumnSpec]
+
+
+def parse_schema(schema: Mapping[str, Union[ColumnSpec, Mapping[str, Any]]]) -> Dict[str, ColumnSpec]:
+    """
+    Build a schema from ColumnSpec objects or plain dictionaries (e.g. loaded from JSON).
+
+    Parameters:
+        schema (dict): Column name -> ColumnSpec, or column name -> dict of ColumnSpec fields.
+
+    Returns:
+        dict: Column name -> ColumnSpec.
+    """
+    return {column: spec if isinstance(spec, ColumnSpec) else ColumnSpec(**spec) for column, spec in schema.items()}
+
+
+def _to_bool(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series
+    text = series.astype("string").str.strip().str.lower()
+    result = pd.Series(pd.NA, index=series.index, dtype="boolean")
+    result[text.isin(_TRUE_STRINGS).fillna(False)] = True
+    result[text.isin(_FALSE_STRINGS).fillna(False)] = False
+    return result
+
+
+def convert_column(series: pd.Series, spec: ColumnSpec) -> pd.Series:
+    """
+    Convert one column to the type in its spec. Values that cannot be converted become missing.
+
+    Parameters:
+        series (pd.Series): The column to convert.
+        spec (ColumnSpec): The expected type.
+
+    Returns:
+        pd.Series: The converted column.
+    """
+    if spec.dtype in ("numeric", "int", "float"):
+        converted = pd.to_numeric(series, errors="coerce")
+        if spec.dtype == "float":
+            return converted.astype("float64")
+        if spec.dtype == "int":
+            values = converted.astype("float64")
+            return values.where(values == np.round(values)).astype("Int64")
+        return converted
+    if spec.dtype in ("string", "category"):
+        converted = StringNormalizer(spec.transforms, stringify=True).normalize(series)
+        return converted.astype("category") if spec.dtype == "category" else converted
+    if spec.dtype == "datetime":
+        return DateParser(spec.date_format).parse(series)
+    return _to_bool(series)
+
+
+def convert_columns(df: pd.DataFrame, schema: Schema, max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Convert every schema column of a DataFrame, in parallel for large frames.
+
+    Parameters:
+        df (pd.DataFrame): The data. It is not modified.
+        schema (dict): Column name -> ColumnSpec. Columns missing from df are skipped.
+        max_workers (int, optional): Thread pool size. Default is one thread per column, up to the CPU count.
+
+    Returns:
+        pd.DataFrame: A new DataFrame with the schema columns converted.
+    """
+    columns = [column for column in schema if column in df.columns]
+    if not columns:
+        return df
+    workers = max_workers or min(len(columns), os.cpu_count() or 1)
+    if workers > 1 and len(df) >= PARALLEL_MIN_ROWS:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            converted = list(pool.map(lambda column: convert_column(df[column], schema[column]), columns))
+    else:
+        converted = [convert_column(df[column], schema[column]) for column in columns]
+    return df.assign(**dict(zip(columns, converted)))
+
+
+def column_failures(series: pd.Series, spec: ColumnSpec,
+                    original: Optional[pd.Series] = None) -> Dict[str, np.ndarray]:
+    """
+    Find the values of a converted column that break its spec, by reason.
+
+    Parameters:
+        series (pd.Series): The converted column.
+        spec (ColumnSpec): Its spec.
+        original (pd.Series, optional): The column before conversion. If given, values that were
+            present but could not be converted fail as 'unparseable' instead of 'missing'.
+
+    Returns:
+        dict: Reason ('missing', 'unparseable', 'below_min', 'above_max', 'not_allowed') -> boolean
+              array marking the failing values. Only reasons that apply to the spec are included.
+    """
+    present = series.notna().to_numpy(copy=True)
+    if spec.dtype == "string" and not spec.nullable:
+        present &= (series != "").to_numpy(dtype=bool, na_value=False)
+    failures: Dict[str, np.ndarray] = {}
+    if not spec.nullable:
+        absent = ~present
+        if original is not None and spec.dtype not in ("string", "category"):
+            was_present = original.notna().to_numpy(copy=True)
+            failures['unparseable'] = absent & was_present
+            absent &= ~was_present
+        failures['missing'] = absent
+    checked = series[present]
+    for reason, bound in (('below_min', spec.min), ('above_max', spec.max)):
+        if bound is not None:
+            failing = np.zeros(len(series), dtype=bool)
+            in_bound = checked >= bound if reason == 'below_min' else checked <= bound
+            failing[present] = ~in_bound.to_numpy(dtype=bool, na_value=False)
+            failures[reason] = failing
+    if spec.allowed is not None:
+        failing = np.zeros(len(series), dtype=bool)
+        failing[present] = ~checked.isin(spec.allowed).to_numpy(dtype=bool, na_value=False)
+        failures['not_allowed'] = failing
+    return failures
+
+
+def column_validity(series: pd.Series, spec: ColumnSpec) -> np.ndarray:
+    """Return a boolean array marking the values of a converted column that satisfy its spec."""
+    valid = np.ones(len(series), dtype=bool)
+    for failing in column_failures(series, spec).values():
+        valid &= ~failing
+    return valid
+
+
+def rule_validity(df: pd.DataFrame, expression: str) -> np.ndarray:
+    """Evaluate a row rule such as 'SaleAmount <= UnitPrice * 10' with DataFrame.eval (missing counts as False)."""
+    result = df.eval(expression)
+    if isinstance(result, pd.Series):
+        return result.to_numpy(dtype=bool, na_value=False)
+    return np.full(len(df), bool(result))
+
+
+@dataclass
+class Validation:
+    """
+    The result of checking a schema against a DataFrame.
+
+    mask marks the rows that pass every rule. invalid_counts maps each column (and each
+    named rule) to the number of rows failing it; a row can fail several. reasons gives
+    each rejected row the code of the first check it failed, such as 'CustomerID:missing',
+    'UnitPrice:below_min', or 'rule:recent_join' (missing for valid rows), as a categorical
+    aligned with the DataFrame. reason_counts counts the rows per reason code.
+    """
+
+    mask: np.ndarray
+    invalid_counts: Dict[str, int]
+    reasons: pd.Series
+    reason_counts: Dict[str, int]
+
+
+def validate(df: pd.DataFrame, schema: Schema, rules: Optional[Mapping[str, str]] = None,
+             original: Optional[pd.DataFrame] = None) -> Validation:
+    """
+    Check every schema rule against converted data, recording why each rejected row failed.
+
+    Each check's result is computed once and used for the mask, the per-column counts, and
+    the reason codes, so finding out why rows were rejected costs no extra pass over the data.
+
+    Parameters:
+        df (pd.DataFrame): Data already converted with convert_columns.
+        schema (dict): Column name -> ColumnSpec. Columns missing from df are skipped.
+        rules (dict, optional): Rule name -> row expression for DataFrame.eval, for checks
+            across columns. Rows where an expression is False or missing fail the rule.
+        original (pd.DataFrame, optional): The data before conversion, to tell values that
+            could not be converted ('unparseable') from missing ones.
+
+    Returns:
+        Validation: The mask, counts, and reasons.
+    """
+    codes = []
+    first = np.full(len(df), -1, dtype=np.int32)  # index into codes of each row's first failure
+    invalid_counts: Dict[str, int] = {}
+
+    def record(code: str, failing: np.ndarray) -> None:
+        first[failing & (first < 0)] = len(codes)
+        codes.append(code)
+
+    for column, spec in schema.items():
+        if column not in df.columns:
+            continue
+        before = original[column] if original is not None and column in original.columns else None
+        column_failed = np.zeros(len(df), dtype=bool)
+        for reason, failing in column_failures(df[column], spec, before).items():
+            record(f"{column}:{reason}", failing)
+            column_failed |= failing
+        invalid_counts[column] = int(column_failed.sum())
+    for name, expression in (rules or {}).items():
+        failing = ~rule_validity(df, expression)
+        record(f"rule:{name}", failing)
+        invalid_counts[name] = int(failing.sum())
+
+    reasons = pd.Series(pd.Categorical.from_codes(first, categories=codes), index=df.index, name=REASON_COLUMN)
+    counts = np.bincount(first[first >= 0], minlength=len(codes))
+    reason_counts = {code: int(count) for code, count in zip(codes, counts) if count}
+    return Validation(first < 0, invalid_counts, reasons, reason_counts)
+
+
+def validity_mask(df: pd.DataFrame, schema: Schema,
+                  rules: Optional[Mapping[str, str]] = None) -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    Check every schema rule against converted data and combine the results into one mask.
+
+    Parameters:
+        df (pd.DataFrame): Data already converted with convert_columns.
+        schema (dict): Column name -> ColumnSpec. Columns missing from df are skipped.
+        rules (dict, optional): Rule name -> row expression for DataFrame.eval, for checks
+            across columns. Rows where an expression is False or missing fail the rule.
+
+    Returns:
+        tuple: (mask, invalid_counts), where mask marks the rows that pass every rule
+               and invalid_counts maps each column (and each named rule) to the number
+               of rows failing it (a row can fail several).
+    """
+    validation = validate(df, schema, rules)
+    return validation.mask, validation.invalid_counts
@@ -0,0 +1,168 @@
+"""
+scripts/csv_ranges.py
+
+Do not run this script directly.
+Instead, from this module (scripts.csv_ranges)
+import split_ranges and iter_ranges.
+
+Parses one large CSV file in parallel by splitting it into byte ranges:
+
+- split_ranges() memory-maps the file and cuts its data (everything after the header
+  record) into ranges of about `range_size` bytes, or into `parts` ranges. Each cut is
+  moved forward to just after the next line break that ends a record, so every range
+  holds whole records.
+- read_range() parses one range on its own, with the header's column names. Workers
+  map the file too, so the ranges are read from the OS page cache without copying the
+  file through the parent process.
+- iter_ranges() sends the ranges to an executor (e.g. a ProcessPoolExecutor) and
+  yields the parsed DataFrames in file order. Only `max_pending` ranges are parsed
+  ahead of the consumer, so memory stays bounded however large the file is.
+
+Line breaks inside quoted fields do not end a record. A line break is outside quotes
+when an even number of quote characters precede it (escaped quotes, "", count twice),
+so finding a boundary only needs the quote count since the previous boundary, which
+NumPy counts over the mapped bytes. Files without quotes skip the counting.
+
+Each range is typed on its own, as with pd.read_csv(chunksize=...), unless a dtype is
+given; DatasetReader.iter_chunks (scripts/ingestion.py) gives each dataset's declared types.
+
+Example:
+
+    with ProcessPoolExecutor() as executor:
+        for chunk in iter_ranges(path, split_ranges(path), executor):
+            ...
+"""
+
+import collections
+import contextlib
+import io
+import math
+import mmap
+import os
+import pathlib
+from concurrent.futures import Executor
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Bytes per range
+RANGE_SIZE = 64 * 1024 * 1024
+
+QUOTE = ord('"')
+# Bytes compared at a time when counting quotes, to bound the temporary array
+COUNT_BLOCK_SIZE = 16 * 1024 * 1024
+
+PathLike = Union[str, pathlib.Path]
+
+
+class _MappedCsv:
+    """A read-only memory map of a CSV file, with the quote-aware record boundary search."""
+
+    def __init__(self, mm: mmap.mmap):
+        self.mm = mm
+        self.bytes = np.frombuffer(mm, dtype=np.uint8)
+        self.has_quotes = mm.find(b'"') >= 0
+
+    def count_quotes(self, start: int, end: int) -> int:
+        if not self.has_quotes:
+            return 0
+        return sum(int(np.count_nonzero(self.bytes[block:min(block + COUNT_BLOCK_SIZE, end)] == QUOTE))
+                   for block in range(start, end, COUNT_BLOCK_SIZE))
+
+    def record_end(self, record_start: int, position: int) -> int:
+        """
+        The offset just after the first line break at or after `position` that ends a record,
+        given that a record starts at `record_start`. Returns the file size if there is none.
+        """
+        odd = self.count_quotes(record_start, position) % 2
+        while True:
+            newline = self.mm.find(b"\n", position)
+            if newline < 0:
+                return len(self.mm)
+            odd = (odd + self.count_quotes(position, newline)) % 2
+            if not odd:
+                return newline + 1
+            position = newline + 1
+
+
+@contextlib.contextmanager
+def _mapped(path: PathLike) -> Iterator[_MappedCsv]:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        mapped = _MappedCsv(mm)
+        try:
+            yield mapped
+        finally:
+            del mapped.bytes  # release the buffer so the map can be closed
+
+
+def read_header(path: PathLike) -> Tuple[List[str], int]:
+    """The column names of a CSV file and the byte offset where its data starts."""
+    if os.path.getsize(path) == 0:
+        raise pd.errors.EmptyDataError(f"{path} is empty")
+    with _mapped(path) as mapped:
+        data_start = mapped.record_end(0, 0)
+        header = mapped.mm[:data_start]
+    return pd.read_csv(io.BytesIO(header)).columns.tolist(), data_start
+
+
+def split_ranges(path: PathLike, range_size: int = RANGE_SIZE, parts: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Split the data of a CSV file into byte ranges of whole records.
+
+    Parameters:
+        path (str or Path): The CSV file, with a header record.
+        range_size (int, optional): Approximate bytes per range. Default is RANGE_SIZE.
+        parts (int, optional): Split into this many ranges of about equal size instead.
+
+    Returns:
+        list: (start, end) byte offsets, covering the data in order without gaps.
+    """
+    _, start = read_header(path)
+    size = os.path.getsize(path)
+    if parts:
+        range_size = max(1, math.ceil((size - start) / parts))
+    boundaries = [start]
+    with _mapped(path) as mapped:
+        cut = start + range_size
+        while cut < size:
+            boundary = mapped.record_end(boundaries[-1], cut - 1)
+            if boundary >= size:
+                break
+            boundaries.append(boundary)
+            cut = boundary + range_size
+    boundaries.append(size)
+    return [(begin, end) for begin, end in zip(boundaries, boundaries[1:]) if end > begin]
+
+
+def read_range(path: PathLike, start: int, end: int, columns: List[str], **kwargs: Any) -> pd.DataFrame:
+    """Parse the records in bytes [start, end) of a CSV file. kwargs go to pd.read_csv."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+    return pd.read_csv(io.BytesIO(data), header=None, names=columns, **kwargs)
+
+
+def iter_ranges(path: PathLike, ranges: List[Tuple[int, int]], executor: Executor,
+                max_pending: Optional[int] = None, **kwargs: Any) -> Iterator[pd.DataFrame]:
+    """
+    Parse byte ranges of a CSV file with an executor and yield them in file order.
+
+    Parameters:
+        path (str or Path): The CSV file.
+        ranges (list): (start, end) offsets from split_ranges().
+        executor (Executor): Where the ranges are parsed.
+        max_pending (int, optional): Ranges parsed ahead of the consumer. Default is twice the CPU count.
+        **kwargs: Extra keyword arguments for pd.read_csv.
+
+    Yields:
+        pd.DataFrame: Each range, with the file's column names.
+    """
+    columns, _ = read_header(path)
+    max_pending = max_pending or 2 * (os.cpu_count() or 1)
+    pending: collections.deque = collections.deque()
+    for start, end in ranges:
+        pending.append(executor.submit(read_range, path, start, end, columns, **kwargs))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -14,17 +14,23 @@ if str(PROJECT_ROOT) not in sys.path:
 
 # Now we can import local modules
 from utils.utils_logger import logger
+from scripts.ingestion import DatasetReader  # noqa: E402
 
 # Constants
 DATA_DIR: pathlib.Path = PROJECT_ROOT.joinpath("data")
 RAW_DATA_DIR: pathlib.Path = DATA_DIR.joinpath("raw")
 
+# Reads only the declared columns, with their declared types (see scripts/ingestion.py)
+READER = DatasetReader()
+
 def read_raw_data(file_name: str) -> pd.DataFrame:
-    """Read raw data from CSV."""
+    """Read raw data from CSV with its declared column types."""
     file_path: pathlib.Path = RAW_DATA_DIR.joinpath(file_name)
     try:
         logger.info(f"Reading raw data from {file_path}.")
-        return pd.read_csv(file_path)
+        df = READER.read(file_path)
+        logger.info(f"Read {file_path.name}: {READER.last_report}")
+        return df
     except FileNotFoundError:
         logger.error(f"File not found: {file_path}")
         return pd.DataFrame()  # Return an empty DataFrame if the file is not found
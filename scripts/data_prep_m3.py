@@ -17,6 +17,10 @@ Choose the correct command for your OS to run this script.
 py scripts\data_prep_m3.py
 python3 scripts/data_prep_m3.py
 
+If the raw files and the code are unchanged since the last successful run,
+the prepared files from that run are kept and nothing is redone
+(see scripts/stage_cache.py). Add --force to prepare the data again anyway.
+
 NOTE: I use the ruff linter. 
 It warns if all import statements are not at the top of the file.  
 I was having trouble with the relative paths, so I  
@@ -37,25 +41,56 @@ if str(PROJECT_ROOT) not in sys.path:
 # Now we can import local modules
 from utils.utils_logger import logger
 from scripts.data_scrubber import DataScrubber  # noqa: E402
+from scripts.date_parser import DateParser  # noqa: E402
+from scripts.stage_cache import LIBRARY_CODE, StageCache  # noqa: E402
+from scripts.ingestion import DatasetReader  # noqa: E402
+from scripts.storage import table_files, write_table  # noqa: E402
 
 # Constants
 DATA_DIR: pathlib.Path = PROJECT_ROOT.joinpath("data")
 RAW_DATA_DIR: pathlib.Path = DATA_DIR.joinpath("raw")
 PREPARED_DATA_DIR: pathlib.Path = DATA_DIR.joinpath("prepared")
 
+# Downcast numerics (integers to no less than 32 bits) and use categoricals for low-cardinality text
+# while preparing; see scripts/memory_compaction.py
+COMPACT_MEMORY: bool = True
+
+# Files read and written by this script, for the stage cache
+RAW_FILES = ["customers_data.csv", "products_data.csv", "sales_data.csv"]
+PREPARED_FILES = ["customers_data_prepared.csv", "products_data_prepared.csv", "sales_data_prepared.csv"]
+# Every file written for them: with the column types next to each CSV, and parquet files with pyarrow
+PREPARED_TABLE_FILES = [path for name in PREPARED_FILES for path in table_files(PREPARED_DATA_DIR.joinpath(name))]
+
+# Reads only the declared columns, with their declared types (see scripts/ingestion.py)
+READER = DatasetReader()
+
+# Parses each distinct date string once, using the dominant format where possible
+DATE_PARSER = DateParser()
+
 def read_raw_data(file_name: str) -> pd.DataFrame:
-    """Read raw data from CSV."""
+    """Read raw data from CSV with its declared column types."""
     file_path: pathlib.Path = RAW_DATA_DIR.joinpath(file_name)
-    return pd.read_csv(file_path)
+    df = READER.read(file_path)
+    logger.info(f"Read {file_name}: {READER.last_report}")
+    return df
+
+def create_scrubber(df: pd.DataFrame, name: str) -> DataScrubber:
+    """Create a DataScrubber, compacting the data's memory use if COMPACT_MEMORY is set."""
+    scrubber = DataScrubber(df)
+    if COMPACT_MEMORY:
+        scrubber.compact_memory()
+        report = scrubber.compaction_report
+        logger.info(f"{name} memory compacted from {report['bytes_before']} to {report['bytes_after']} bytes: "
+                    f"{report['columns']}")
+    return scrubber
 
 def save_prepared_data(df: pd.DataFrame, file_name: str) -> None:
-    """Save cleaned data to CSV."""
-    file_path: pathlib.Path = PREPARED_DATA_DIR.joinpath(file_name)
-    df.to_csv(file_path, index=False)
+    """Save cleaned data with its column types, as parquet if available and always as CSV (see scripts/storage.py)."""
+    file_path: pathlib.Path = write_table(df, PREPARED_DATA_DIR.joinpath(file_name))
     logger.info(f"Data saved to {file_path}")
 
-def main() -> None:
-    """Main function for pre-processing customer, product, and sales data."""
+def prepare_all_data() -> None:
+    """Pre-process customer, product, and sales data."""
     logger.info("======================")
     logger.info("STARTING data_prep_m3.py")
     logger.info("======================")
@@ -77,13 +112,14 @@ def main() -> None:
     df_customers["LoyaltyPoints"] = 0
     df_customers["CustomerSegment"] = "Unknown"
 
-    scrubber_customers = DataScrubber(df_customers)
-    scrubber_customers.check_data_consistency_before_cleaning()
-    scrubber_customers.inspect_data()
+    scrubber_customers = create_scrubber(df_customers, "Customers")
+    logger.info(f"Customers profile before cleaning: {scrubber_customers.profile().to_json()}")
     
     df_customers = scrubber_customers.handle_missing_data(fill_value="N/A")
     df_customers = scrubber_customers.parse_dates_to_add_standard_datetime('JoinDate')
+    logger.info(f"JoinDate parsing: {scrubber_customers.date_report}")
     scrubber_customers.check_data_consistency_after_cleaning()
+    logger.info(f"Customers profile after cleaning: {scrubber_customers.profile().to_json()}")
 
     save_prepared_data(df_customers, "customers_data_prepared.csv")
 
@@ -100,11 +136,10 @@ def main() -> None:
     df_products["StockQuantity"] = 0
     df_products["Supplier"] = "Unknown"
 
-    scrubber_products = DataScrubber(df_products)
-    scrubber_products.check_data_consistency_before_cleaning()
-    scrubber_products.inspect_data()
+    scrubber_products = create_scrubber(df_products, "Products")
+    logger.info(f"Products profile: {scrubber_products.profile().to_json()}")
     scrubber_products.check_data_consistency_after_cleaning()
-    save_prepared_data(df_products, "products_data_prepared.csv")
+    save_prepared_data(scrubber_products.df, "products_data_prepared.csv")
 
     # ----- SALES PREP -----
     logger.info("========================")
@@ -113,24 +148,37 @@ def main() -> None:
     df_sales = read_raw_data("sales_data.csv")
     df_sales.columns = df_sales.columns.str.strip()  # Clean column names
     df_sales = df_sales.drop_duplicates()            # Remove duplicates
-    df_sales['SaleDate'] = pd.to_datetime(df_sales['SaleDate'], errors='coerce')  # Ensure SaleDate is datetime
+    df_sales['SaleDate'] = DATE_PARSER.parse(df_sales['SaleDate'])  # Ensure SaleDate is datetime
+    logger.info(f"SaleDate parsing: {DATE_PARSER.last_report}")
     df_sales = df_sales.dropna(subset=['TransactionID', 'SaleDate'])  # Drop rows missing key information
     
     # Insert new Sales columns
     df_sales["DiscountPercent"] = 0
     df_sales["PaymentType"] = "Unknown"
 
-    scrubber_sales = DataScrubber(df_sales)
-    scrubber_sales.check_data_consistency_before_cleaning()
-    scrubber_sales.inspect_data()
+    scrubber_sales = create_scrubber(df_sales, "Sales")
+    logger.info(f"Sales profile before cleaning: {scrubber_sales.profile().to_json()}")
     
     df_sales = scrubber_sales.handle_missing_data(fill_value="Unknown")
     scrubber_sales.check_data_consistency_after_cleaning()
+    logger.info(f"Sales profile after cleaning: {scrubber_sales.profile().to_json()}")
     save_prepared_data(df_sales, "sales_data_prepared.csv")
 
     logger.info("======================")
     logger.info("FINISHED data_prep_m3.py")
     logger.info("======================")
 
+def main(force: bool = False) -> None:
+    """Main function: prepare the data unless the raw files and code are unchanged since the last run."""
+    cache = StageCache(force=force)
+    ran = cache.run("data_prep_m3", prepare_all_data,
+                    inputs=[RAW_DATA_DIR.joinpath(name) for name in RAW_FILES],
+                    outputs=PREPARED_TABLE_FILES,
+                    code=LIBRARY_CODE, params={"COMPACT_MEMORY": COMPACT_MEMORY})
+    cache.save()
+    if not ran:
+        logger.info(f"data_prep_m3.py: raw data and code unchanged, kept the files in {PREPARED_DATA_DIR}")
+    logger.info(f"Stage cache: {cache.summary()}")
+
 if __name__ == "__main__":
-    main()
+    main(force="--force" in sys.argv[1:])
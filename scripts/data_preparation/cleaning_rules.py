@@ -0,0 +1,320 @@
+"""
+Module: Cleaning Rules
+File: scripts/data_preparation/cleaning_rules.py
+
+Declarative cleaning rules for the prepare scripts. Each dataset has a rule spec
+in scripts/data_preparation/rules/<dataset>.json (or .yaml, if PyYAML is installed):
+
+    {
+      "dataset": "customers",
+      "input_file": "data/dirty_data/dirty_customers_data.csv",
+      "output_file": "data/_prepared/customers_data_prepared.csv",
+      "drop_duplicates": true,
+      "columns": {
+        "CustomerID": {"dtype": "numeric", "nullable": false, "min": 1000, "max": 1100},
+        "Region": {"dtype": "string", "nullable": false, "transforms": ["strip", "capitalize"],
+                   "allowed": ["East", "West", "North", "South"]}
+      },
+      "rules": {"recent_join": "JoinDate >= '2000-01-01'"},
+      "references": {}
+    }
+
+"columns" holds one ColumnSpec per column (see scripts/column_schema.py) and "rules"
+holds named row expressions across columns (DataFrame.eval syntax). A rule set is
+compiled into a DataScrubber.apply_schema call: all columns are converted at once, all
+predicates are evaluated into one combined mask, and the frame is filtered once, so
+adding rules does not add copies of the data.
+
+"references" maps foreign key columns to the dataset they refer to, e.g.
+{"CustomerID": "customers"} in the sales spec. prepare_dataset reads the key column
+of that dataset's prepared file, and rows whose key is not there are rejected as
+'CustomerID:orphan' (see scripts/referential_integrity.py). polished_data.py runs
+such a dataset after the datasets it refers to.
+
+Rejected rows are not lost: each one is kept with its original values and a reason code
+in a RejectReason column: 'duplicate', or the first check it failed, such as
+'CustomerID:missing', 'UnitPrice:below_min', 'JoinDate:unparseable', or
+'rule:recent_join'. prepare_dataset writes them to data/quarantine/<dataset>_rejected.csv,
+and the row counts per reason, gathered in the same pass, to
+data/quarantine/<dataset>_summary.json (read by report_record_differences.py).
+
+Adding a dataset or a rule only needs a new or edited spec file. Run any datasets with:
+
+    py scripts\\data_preparation\\cleaning_rules.py customers products
+    python3 scripts/data_preparation/cleaning_rules.py sales
+
+Without arguments, every spec in the rules folder is run.
+"""
+
+import json
+import pathlib
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from utils.utils_logger import logger  # noqa: E402
+from scripts.column_schema import REASON_COLUMN, ColumnSpec, parse_schema  # noqa: E402
+from scripts.data_scrubber import DataScrubber  # noqa: E402
+from scripts.ingestion import DatasetReader  # noqa: E402
+from scripts.referential_integrity import KeySet, check_references  # noqa: E402
+from scripts.storage import table_files, write_table  # noqa: E402
+
+# Folder with one rule spec per dataset
+RULES_DIR = pathlib.Path(__file__).resolve().parent / "rules"
+RULE_FILE_SUFFIXES = (".json", ".yaml", ".yml")
+
+# Rejected rows and per-reason counts of each dataset
+QUARANTINE_DIR = PROJECT_ROOT / "data" / "quarantine"
+DUPLICATE_REASON = "duplicate"
+
+
+@dataclass
+class RuleSet:
+    """The cleaning rules of one dataset."""
+
+    dataset: str
+    input_file: pathlib.Path
+    output_file: pathlib.Path
+    schema: Dict[str, ColumnSpec]
+    rules: Dict[str, str] = field(default_factory=dict)
+    drop_duplicates: bool = True
+    references: Dict[str, str] = field(default_factory=dict)  # foreign key column -> referenced dataset
+
+    @classmethod
+    def from_dict(cls, spec: Dict) -> "RuleSet":
+        """Build a rule set from a spec dictionary; relative file paths are relative to the project root."""
+        return cls(
+            dataset=spec['dataset'],
+            input_file=PROJECT_ROOT / spec['input_file'],
+            output_file=PROJECT_ROOT / spec['output_file'],
+            schema=parse_schema(spec.get('columns', {})),
+            rules=dict(spec.get('rules', {})),
+            drop_duplicates=spec.get('drop_duplicates', True),
+            references=dict(spec.get('references', {})),
+        )
+
+    @property
+    def quarantine_file(self) -> pathlib.Path:
+        """CSV of the rejected rows, with their reason codes."""
+        return QUARANTINE_DIR / f"{self.dataset}_rejected.csv"
+
+    @property
+    def summary_file(self) -> pathlib.Path:
+        """JSON with the input and output row counts and the rejected rows per reason."""
+        return QUARANTINE_DIR / f"{self.dataset}_summary.json"
+
+    @property
+    def written_files(self) -> List[pathlib.Path]:
+        """Every file prepare_dataset() writes: the prepared table (see scripts/storage.py), quarantine, and summary."""
+        return [*table_files(self.output_file), self.quarantine_file, self.summary_file]
+
+
+@dataclass
+class CleaningResult:
+    """The outcome of cleaning one dataset."""
+
+    clean: pd.DataFrame
+    rejected: pd.DataFrame  # the rejected rows as they were read, plus a RejectReason column
+    reason_counts: Dict[str, int]  # reason code -> rejected rows
+
+    def summary(self, dataset: str) -> Dict:
+        return {
+            'dataset': dataset,
+            'rows_in': len(self.clean) + len(self.rejected),
+            'rows_out': len(self.clean),
+            'rejected': self.reason_counts,
+        }
+
+
+def spec_file(name: str) -> pathlib.Path:
+    """The rule spec file of a dataset in RULES_DIR."""
+    for suffix in RULE_FILE_SUFFIXES:
+        path = RULES_DIR / f"{name}{suffix}"
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"No rule spec for dataset '{name}' in {RULES_DIR}")
+
+
+def load_rule_set(dataset: Union[str, pathlib.Path]) -> RuleSet:
+    """
+    Load a rule set by dataset name (from RULES_DIR) or from a spec file path.
+
+    Parameters:
+        dataset (str or pathlib.Path): Dataset name such as 'customers', or a .json/.yaml path.
+
+    Returns:
+        RuleSet: The parsed rules.
+    """
+    path = pathlib.Path(dataset)
+    if path.suffix not in RULE_FILE_SUFFIXES:
+        path = spec_file(str(dataset))
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".json":
+        return RuleSet.from_dict(json.loads(text))
+    try:
+        import yaml
+    except ImportError as e:
+        raise ImportError(f"PyYAML is needed to read {path.name}; install it or use a .json spec") from e
+    return RuleSet.from_dict(yaml.safe_load(text))
+
+
+def available_datasets() -> List[str]:
+    """Names of the datasets that have a rule spec."""
+    return sorted({path.stem for path in RULES_DIR.iterdir() if path.suffix in RULE_FILE_SUFFIXES})
+
+
+def load_references(rule_set: RuleSet) -> Dict[str, KeySet]:
+    """The keys of every dataset a rule set refers to, read from their prepared files."""
+    return {column: KeySet.from_table(load_rule_set(dataset).output_file, column)
+            for column, dataset in rule_set.references.items()}
+
+
+def clean_with_rejects(df: pd.DataFrame, rule_set: RuleSet,
+                       references: Optional[Dict[str, KeySet]] = None) -> CleaningResult:
+    """
+    Clean a DataFrame with a rule set: drop duplicates, convert every column, and filter once,
+    keeping every rejected row with the reason it was rejected.
+
+    Parameters:
+        df (pd.DataFrame): The dirty data. Rows are matched by index, so a non-unique index is reset.
+        rule_set (RuleSet): The rules for this dataset.
+        references (dict, optional): Foreign key column -> keys of the referenced dataset
+            (see load_references). Rows with unknown keys are rejected as orphans.
+
+    Returns:
+        CleaningResult: The clean rows, the rejected rows, and the rejected rows per reason.
+    """
+    logger.info(f"Starting cleaning: original shape = {df.shape}")
+    if not df.index.is_unique:
+        df = df.reset_index(drop=True)
+
+    rejected = []
+    reason_counts: Dict[str, int] = {}
+    if rule_set.drop_duplicates:
+        duplicated = df.duplicated().to_numpy()
+        if duplicated.any():
+            rejected.append(df[duplicated].assign(**{REASON_COLUMN: DUPLICATE_REASON}))
+            reason_counts[DUPLICATE_REASON] = int(duplicated.sum())
+            df = df[~duplicated]
+        logger.info(f"After duplicates removal: shape = {df.shape}")
+
+    before = df.shape[0]
+    scrubber = DataScrubber(df)
+    clean = scrubber.apply_schema(rule_set.schema, rules=rule_set.rules)
+    for name, invalid in scrubber.schema_report.items():
+        logger.info(f"{invalid} rows fail {name}")
+    logger.info(f"Dropped {before - clean.shape[0]} rows that failed the {rule_set.dataset} rules")
+
+    reasons = scrubber.rejections
+    if references:
+        integrity = check_references(clean, references)
+        if not integrity.mask.all():
+            reasons = pd.concat([reasons.astype(str), integrity.reasons[~integrity.mask].astype(str)])
+            clean = clean[integrity.mask]
+        for column, orphans in integrity.invalid_counts.items():
+            logger.info(f"{orphans} rows have a {column} not in {rule_set.references[column]}")
+    if len(reasons):
+        rejected.append(df.loc[reasons.index].assign(**{REASON_COLUMN: reasons.astype(str)}))
+        reason_counts.update({reason: int(count) for reason, count in reasons.value_counts(sort=False).items()
+                              if count})
+    rejected_df = (pd.concat(rejected).sort_index() if rejected
+                   else df.iloc[:0].assign(**{REASON_COLUMN: pd.Series(dtype=str)}))
+    for reason, count in reason_counts.items():
+        logger.info(f"Rejected {count} rows: {reason}")
+
+    logger.info(f"Final cleaned data shape: {clean.shape}")
+    return CleaningResult(clean, rejected_df, reason_counts)
+
+
+def clean_with_rules(df: pd.DataFrame, rule_set: RuleSet) -> pd.DataFrame:
+    """
+    Clean a DataFrame with a rule set: drop duplicates, convert every column, and filter once.
+
+    Parameters:
+        df (pd.DataFrame): The dirty data.
+        rule_set (RuleSet): The rules for this dataset.
+
+    Returns:
+        pd.DataFrame: The rows that pass every rule, with converted columns.
+    """
+    return clean_with_rejects(df, rule_set).clean
+
+
+def prepare_dataset(rule_set: RuleSet, input_file: Optional[pathlib.Path] = None,
+                    output_file: Optional[pathlib.Path] = None) -> Optional[pd.DataFrame]:
+    """
+    Read a dataset's dirty file, clean it with its rules, and write the prepared file with its
+    column types (see scripts/storage.py), plus the rejected rows and their counts per reason
+    (rule_set.quarantine_file and summary_file).
+
+    Parameters:
+        rule_set (RuleSet): The rules for this dataset.
+        input_file (pathlib.Path, optional): Overrides rule_set.input_file.
+        output_file (pathlib.Path, optional): Overrides rule_set.output_file.
+
+    Returns:
+        pd.DataFrame or None: The cleaned data, or None if the input could not be read.
+    """
+    input_file = input_file or rule_set.input_file
+    output_file = output_file or rule_set.output_file
+    reader = DatasetReader()
+    try:
+        # Dirty values do not fit the column types yet, so read them as text for the rules to convert
+        df_dirty = reader.read(input_file, rule_set.dataset, text=True)
+        logger.info(f"Loaded dirty {rule_set.dataset} data from {input_file} with shape {df_dirty.shape}: "
+                    f"{reader.last_report['rows_per_sec']} rows/s, {reader.last_report['mb_per_sec']} MB/s "
+                    f"({reader.engine} engine)")
+    except Exception as e:
+        logger.error(f"Error reading input file: {e}")
+        return None
+    try:
+        references = load_references(rule_set)
+    except Exception as e:
+        logger.error(f"Error reading the keys of {sorted(set(rule_set.references.values()))}: {e}")
+        return None
+
+    result = clean_with_rejects(df_dirty, rule_set, references)
+
+    try:
+        write_table(result.clean, output_file)
+        logger.info(f"Cleaned {rule_set.dataset} data saved to {output_file}")
+        rule_set.quarantine_file.parent.mkdir(parents=True, exist_ok=True)
+        result.rejected.to_csv(rule_set.quarantine_file, index=False)
+        rule_set.summary_file.write_text(json.dumps(result.summary(rule_set.dataset), indent=2), encoding="utf-8")
+        logger.info(f"Rejected {rule_set.dataset} rows saved to {rule_set.quarantine_file}")
+    except Exception as e:
+        logger.error(f"Error saving cleaned data: {e}")
+    return result.clean
+
+
+def prepare_by_name(dataset: str) -> int:
+    """
+    Prepare one dataset by name, raising instead of logging if it cannot be read or written.
+    Used as a pipeline stage (see scripts/pipeline_runner.py).
+
+    Returns:
+        int: Number of rows written.
+    """
+    rule_set = load_rule_set(dataset)
+    df_clean = prepare_dataset(rule_set)
+    missing = [str(path) for path in rule_set.written_files if not path.exists()]
+    if df_clean is None or missing:
+        raise RuntimeError(f"Could not prepare {dataset} (missing: {missing}); see the log for details")
+    return len(df_clean)
+
+
+def main(datasets: Optional[List[str]] = None) -> None:
+    for dataset in datasets or available_datasets():
+        logger.info(f"Preparing {dataset} with rules from {RULES_DIR}")
+        prepare_dataset(load_rule_set(dataset))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
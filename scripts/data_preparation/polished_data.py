@@ -2,17 +2,29 @@
 Module: Polished Data Runner
 File: scripts/data_preparation/polished_data.py
 
-This script runs all the data cleaning scripts:
-- prepare_customers_data.py
-- prepare_products_data.py
-- prepare_sales_data.py
+This script runs the data cleaning of every dataset with a rule spec
+(see scripts/data_preparation/rules/), by default:
+- customers (prepare_customers_data.py)
+- products (prepare_products_data.py)
+- sales (prepare_sales_data.py)
+
+The datasets are stages of a pipeline (see scripts/pipeline_runner.py): each stage
+reads its dirty file and writes its prepared file, and independent stages run at the
+same time in a process pool instead of one subprocess after another. If a stage
+fails, the stages that need its output are skipped, the others still run, and the
+script exits with code 1.
+
+A dataset whose dirty file, rule spec, and cleaning code are unchanged since its last
+successful run is skipped, and its prepared file from that run is kept (see
+scripts/stage_cache.py), as long as every file of that run is still there unchanged,
+including the column types written next to a CSV table (see scripts/storage.py). Run with --force to clean every dataset again.
 
 It ensures all raw data is cleaned and saved in the `_prepared` folder.
 """
 
 import sys
 import pathlib
-import subprocess
+from typing import List
 
 # Define project root dynamically
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
@@ -22,35 +34,46 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.append(str(PROJECT_ROOT))
 
 # Now import the logger
-from utils.utils_logger import logger
-
-# Define script paths
-DATA_PREP_SCRIPTS_DIR = PROJECT_ROOT / "scripts" / "data_preparation"
-
-# Define cleaning script paths
-CLEANING_SCRIPTS = [
-    DATA_PREP_SCRIPTS_DIR / "prepare_customers_data.py",
-    DATA_PREP_SCRIPTS_DIR / "prepare_products_data.py",
-    DATA_PREP_SCRIPTS_DIR / "prepare_sales_data.py",
-]
-
-def run_script(script_path):
-    """Run a Python script as a subprocess."""
-    try:
-        logger.info(f"Running script: {script_path}")
-        result = subprocess.run([sys.executable, script_path], check=True, capture_output=True, text=True)
-        logger.info(f"Script {script_path.name} completed successfully.")
-        logger.info(result.stdout)
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error running script {script_path.name}: {e.stderr}")
-
-def main():
-    logger.info("Starting polished_data.py - Running all data cleaning scripts.")
-    
-    for script in CLEANING_SCRIPTS:
-        run_script(script)
-
-    logger.info("All data cleaning scripts completed successfully.")
+from utils.utils_logger import logger  # noqa: E402
+from scripts.data_preparation.cleaning_rules import (  # noqa: E402
+    available_datasets,
+    load_rule_set,
+    prepare_by_name,
+    spec_file,
+)
+from scripts.pipeline_runner import FAILED, OK, Stage, format_report, run_pipeline  # noqa: E402
+from scripts.stage_cache import LIBRARY_CODE, StageCache  # noqa: E402
+
+
+def build_stages() -> List[Stage]:
+    """One prepare stage per dataset, reading its dirty file and writing its prepared and quarantine files."""
+    stages = []
+    for dataset in available_datasets():
+        rule_set = load_rule_set(dataset)
+        referenced = [load_rule_set(name).output_file for name in rule_set.references.values()]
+        stages.append(Stage(f"prepare_{dataset}", prepare_by_name, args=(dataset,),
+                            inputs=[rule_set.input_file, *referenced],
+                            outputs=rule_set.written_files,
+                            code=[spec_file(dataset), *LIBRARY_CODE]))
+    return stages
+
+
+def main(force: bool = False) -> int:
+    logger.info("Starting polished_data.py - Running all data cleaning stages.")
+
+    cache = StageCache(force=force)
+    results = run_pipeline(build_stages(), cache=cache)
+    logger.info(f"Data cleaning stages:\n{format_report(results)}")
+    logger.info(f"Stage cache: {cache.summary()}")
+
+    failed = [result.name for result in results.values() if result.status == FAILED]
+    if failed:
+        logger.error(f"Data cleaning stages failed: {failed}")
+        return 1
+    rows = {result.name: result.value for result in results.values() if result.status == OK and not result.cached}
+    logger.info(f"All data cleaning stages completed successfully. Rows written: {rows}")
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main(force="--force" in sys.argv[1:]))
@@ -2,78 +2,77 @@
 Module: Report Record Differences
 File: scripts/data_preparation/report_record_differences.py
 
-This script reads the cleaned (prepared) and raw (dirty) CSV files for customers, products,
-and sales. It calculates the record count for each pair and writes a report detailing:
+This script reports, for customers, products, and sales, how many records the cleaning
+removed and why. The counts come from the summaries the prepare scripts write while
+cleaning (data/quarantine/<dataset>_summary.json, see cleaning_rules.py), so no data
+file is read again. The report details:
 - Raw records count
 - Prepared records count
 - Difference (i.e., number of records removed during cleaning)
+- Removed records per reason (e.g. duplicate, CustomerID:missing, UnitPrice:below_min)
+
+If a dataset has no summary yet (it was prepared by an older version), its raw and
+prepared CSV files are counted instead, without reasons.
 
 The report is saved as "answers.txt" in the data/processed/ folder.
 """
 
+import json
 import pathlib
+import sys
+from typing import Dict
+
 import pandas as pd
 
 # Define project root (adjust based on your folder structure)
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
 
-# Define file paths for customers
-DIRTY_CUSTOMERS = PROJECT_ROOT / "data" / "dirty_data" / "dirty_customers_data.csv"
-PREPARED_CUSTOMERS = PROJECT_ROOT / "data" / "_prepared" / "customers_data_prepared.csv"
-
-# Define file paths for products
-DIRTY_PRODUCTS = PROJECT_ROOT / "data" / "dirty_data" / "dirty_products_data.csv"
-PREPARED_PRODUCTS = PROJECT_ROOT / "data" / "_prepared" / "products_data_prepared.csv"
-
-# Define file paths for sales
-DIRTY_SALES = PROJECT_ROOT / "data" / "dirty_data" / "dirty_sales_data.csv"
-PREPARED_SALES = PROJECT_ROOT / "data" / "_prepared" / "sales_data_prepared.csv"
-
-# Load CSV files and count rows
-df_dirty_customers = pd.read_csv(DIRTY_CUSTOMERS)
-df_prepared_customers = pd.read_csv(PREPARED_CUSTOMERS)
-dirty_customers_count = df_dirty_customers.shape[0]
-prepared_customers_count = df_prepared_customers.shape[0]
-
-df_dirty_products = pd.read_csv(DIRTY_PRODUCTS)
-df_prepared_products = pd.read_csv(PREPARED_PRODUCTS)
-dirty_products_count = df_dirty_products.shape[0]
-prepared_products_count = df_prepared_products.shape[0]
-
-df_dirty_sales = pd.read_csv(DIRTY_SALES)
-df_prepared_sales = pd.read_csv(PREPARED_SALES)
-dirty_sales_count = df_dirty_sales.shape[0]
-prepared_sales_count = df_prepared_sales.shape[0]
-
-# Compute differences (raw minus prepared)
-diff_customers = dirty_customers_count - prepared_customers_count
-diff_products = dirty_products_count - prepared_products_count
-diff_sales = dirty_sales_count - prepared_sales_count
-
-# Prepare output text
-report_text = f"""Record Count Differences Report
-
-Customers:
-  Raw records count: {dirty_customers_count}
-  Prepared records count: {prepared_customers_count}
-  Difference: {diff_customers} records removed
-
-Products:
-  Raw records count: {dirty_products_count}
-  Prepared records count: {prepared_products_count}
-  Difference: {diff_products} records removed
-
-Sales:
-  Raw records count: {dirty_sales_count}
-  Prepared records count: {prepared_sales_count}
-  Difference: {diff_sales} records removed
-"""
+from scripts.data_preparation.cleaning_rules import load_rule_set  # noqa: E402
+
+DATASETS = ["customers", "products", "sales"]
 
 # Define output file path (answers.txt in the processed folder)
 OUTPUT_FILE = PROJECT_ROOT / "data" / "processed" / "answers.txt"
 
-# Write the report to the text file
-with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    f.write(report_text)
 
-print("Report written to:", OUTPUT_FILE)
+def dataset_counts(dataset: str) -> Dict:
+    """Raw and prepared record counts of a dataset, and the removed records per reason."""
+    rule_set = load_rule_set(dataset)
+    if rule_set.summary_file.exists():
+        return json.loads(rule_set.summary_file.read_text(encoding="utf-8"))
+    return {
+        'dataset': dataset,
+        'rows_in': pd.read_csv(rule_set.input_file).shape[0],
+        'rows_out': pd.read_csv(rule_set.output_file).shape[0],
+        'rejected': {},
+    }
+
+
+def format_section(counts: Dict) -> str:
+    difference = counts['rows_in'] - counts['rows_out']
+    lines = [
+        f"{counts['dataset'].capitalize()}:",
+        f"  Raw records count: {counts['rows_in']}",
+        f"  Prepared records count: {counts['rows_out']}",
+        f"  Difference: {difference} records removed",
+    ]
+    for reason, count in sorted(counts['rejected'].items(), key=lambda item: (-item[1], item[0])):
+        lines.append(f"    {reason}: {count}")
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    report_text = "Record Count Differences Report\n\n" + "\n".join(
+        format_section(dataset_counts(dataset)) for dataset in DATASETS)
+
+    # Write the report to the text file
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        f.write(report_text)
+
+    print("Report written to:", OUTPUT_FILE)
+
+
+if __name__ == "__main__":
+    main()
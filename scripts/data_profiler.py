@@ -0,0 +1,424 @@
+"""
+scripts/data_profiler.py
+
+Do not run this script directly.
+Instead, use DataScrubber.profile(), or call profile_dataframe() from this module.
+
+A DataProfile summarizes a DataFrame in one vectorized pass:
+
+- row count, duplicate row count, and memory use
+- per column: dtype, null count, and an estimate of the number of distinct values
+- per numeric column: count, min, max, mean, standard deviation, and quartiles
+
+The profile can be updated in place as the data changes instead of being recomputed:
+removed rows are subtracted from the counts and moments, transformed columns are
+re-profiled on their own, and dropped or renamed columns are simply relabelled.
+Anything that cannot be updated exactly (a min or max that was removed, quartiles,
+distinct counts, the duplicate count) is marked stale and recomputed by complete() only
+when it is next needed.
+
+Rows can be added as well (add_rows), so a stream is profiled chunk by chunk without
+holding it in memory: counts and moments are combined exactly, and a DistinctSketch
+and a QuantileSketch per column keep distinct-value and quartile estimates in bounded
+memory (see StreamingScrubber.profile()).
+
+Profiles are plain data: use to_dict() or to_json() to emit them.
+"""
+
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from scripts.row_hashing import hash_rows
+
+# Target sample size for distinct-value estimates (relative error is about 1/sqrt of this)
+DISTINCT_SAMPLE_SIZE = 1024
+
+# Target sample size for streamed quartiles (rank error is about 1/sqrt of this)
+QUANTILE_SAMPLE_SIZE = 4096
+
+# The percentiles DataFrame.describe() reports
+QUARTILES = (0.25, 0.5, 0.75)
+
+_HASH_RANGE = float(2 ** 64)
+
+
+def estimate_distinct(hashes: np.ndarray, sample_size: int = DISTINCT_SAMPLE_SIZE) -> int:
+    """
+    Estimate the number of distinct values from their 64-bit hashes.
+
+    Each distinct value is sampled when its hash falls below a threshold, so the
+    sample does not depend on how often a value repeats. The threshold is raised
+    until the sample holds at least `sample_size` values; small inputs are counted exactly.
+
+    Parameters:
+        hashes (np.ndarray): uint64 hashes of the (non-null) values.
+        sample_size (int, optional): Target number of sampled distinct values.
+
+    Returns:
+        int: Estimated number of distinct values.
+    """
+    if hashes.size <= 4 * sample_size:
+        return int(pd.unique(hashes).size)
+    fraction = min(1.0, 4.0 * sample_size / hashes.size)
+    while fraction < 1.0:
+        sampled = pd.unique(hashes[hashes < np.uint64(fraction * (_HASH_RANGE - 1))])
+        if sampled.size >= sample_size:
+            return int(round(sampled.size / fraction))
+        fraction = min(1.0, fraction * 4)
+    return int(pd.unique(hashes).size)
+
+
+class DistinctSketch:
+    """
+    Distinct values of a column seen in parts, estimated as in estimate_distinct().
+
+    The distinct hashes below a threshold are kept; whenever more than 4 * sample_size
+    are kept, the threshold is lowered to a quarter. The count is exact until then.
+    """
+
+    def __init__(self, sample_size: int = DISTINCT_SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self.fraction = 1.0
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def add(self, values: pd.Series) -> None:
+        """Add more values of the column; missing values are not counted."""
+        hashes = _column_hashes(values)
+        if self.fraction < 1.0:
+            hashes = hashes[hashes < np.uint64(self.fraction * (_HASH_RANGE - 1))]
+        self.hashes = pd.unique(np.concatenate([self.hashes, hashes]))
+        while self.hashes.size > 4 * self.sample_size:
+            self.fraction /= 4
+            self.hashes = self.hashes[self.hashes < np.uint64(self.fraction * (_HASH_RANGE - 1))]
+
+    def estimate(self) -> int:
+        return int(round(self.hashes.size / self.fraction))
+
+
+class QuantileSketch:
+    """
+    Quartiles of a numeric column seen in parts, from a uniform sample of its values.
+
+    A value is kept when the hash of its position in the stream falls below a threshold;
+    whenever more than 4 * sample_size are kept, the threshold is lowered to a quarter.
+    The quartiles are exact until then.
+    """
+
+    def __init__(self, sample_size: int = QUANTILE_SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self.fraction = 1.0
+        self.position = 0
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.values = np.empty(0, dtype=np.float64)
+
+    def add(self, values: pd.Series) -> None:
+        """Add more values of the column; missing values are not counted."""
+        keys = hash_rows(pd.DataFrame({'position': np.arange(self.position, self.position + len(values))}))
+        self.position += len(values)
+        numbers = values.to_numpy(dtype="float64", na_value=np.nan)
+        keep = ~np.isnan(numbers)
+        if self.fraction < 1.0:
+            keep &= keys < np.uint64(self.fraction * (_HASH_RANGE - 1))
+        self.keys = np.concatenate([self.keys, keys[keep]])
+        self.values = np.concatenate([self.values, numbers[keep]])
+        while self.values.size > 4 * self.sample_size:
+            self.fraction /= 4
+            sampled = self.keys < np.uint64(self.fraction * (_HASH_RANGE - 1))
+            self.keys, self.values = self.keys[sampled], self.values[sampled]
+
+    def quartiles(self) -> Optional[List[float]]:
+        return _quartiles(self.values)
+
+
+def _quartiles(values: np.ndarray) -> Optional[List[float]]:
+    """The 25%, 50%, and 75% percentiles, interpolated as DataFrame.describe() does."""
+    if values.size == 0:
+        return None
+    return [float(value) for value in np.quantile(values, QUARTILES)]
+
+
+def _is_numeric(dtype) -> bool:
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _column_hashes(series: pd.Series) -> np.ndarray:
+    return hash_rows(series.dropna().to_frame())
+
+
+def _combined_dtype(dtype: str, other: Any) -> str:
+    """The dtype of two parts of a column put together (numbers widen, anything else mixed is object)."""
+    if dtype == str(other):
+        return dtype
+    first = pd.api.types.pandas_dtype(dtype)
+    if isinstance(first, np.dtype) and isinstance(other, np.dtype) and {first.kind, other.kind} <= set("iuf"):
+        return str(np.result_type(first, other))
+    return "object"
+
+
+@dataclass
+class ColumnProfile:
+    """Statistics for one column. None means not applicable, or stale until complete() runs."""
+
+    dtype: str
+    null_count: int
+    count: int
+    distinct: Optional[int] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    m2: Optional[float] = None  # sum of squared deviations from the mean
+    quartiles: Optional[List[float]] = None  # 25%, 50%, and 75% percentiles
+
+    @property
+    def numeric(self) -> bool:
+        return self.m2 is not None
+
+    @property
+    def std(self) -> Optional[float]:
+        """Sample standard deviation (ddof=1), matching DataFrame.describe()."""
+        if self.m2 is None or self.count < 2:
+            return None
+        return float(np.sqrt(max(self.m2, 0.0) / (self.count - 1)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result.pop('m2')
+        result['std'] = self.std
+        return result
+
+
+@dataclass
+class DataProfile:
+    """Summary statistics for a whole DataFrame."""
+
+    row_count: int
+    memory_bytes: int
+    columns: Dict[str, ColumnProfile] = field(default_factory=dict)
+    duplicate_count: Optional[int] = None
+
+    # ----- Emitting -----
+
+    @property
+    def null_counts(self) -> pd.Series:
+        """Null counts per column, in the same shape as DataFrame.isnull().sum()."""
+        return pd.Series({name: column.null_count for name, column in self.columns.items()}, dtype="int64")
+
+    @property
+    def dtype_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for column in self.columns.values():
+            counts[column.dtype] = counts.get(column.dtype, 0) + 1
+        return dict(sorted(counts.items()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'row_count': self.row_count,
+            'duplicate_count': self.duplicate_count,
+            'memory_bytes': self.memory_bytes,
+            'dtypes': self.dtype_counts,
+            'columns': {name: column.to_dict() for name, column in self.columns.items()},
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), default=str, **kwargs)
+
+    def info_string(self) -> str:
+        """A DataFrame.info()-style summary of columns, non-null counts, and dtypes."""
+        table = pd.DataFrame({
+            'Column': list(self.columns),
+            'Non-Null Count': [f"{column.count} non-null" for column in self.columns.values()],
+            'Distinct': [column.distinct for column in self.columns.values()],
+            'Dtype': [column.dtype for column in self.columns.values()],
+        })
+        dtypes = ", ".join(f"{dtype}({count})" for dtype, count in self.dtype_counts.items())
+        return (f"Rows: {self.row_count}, Columns: {len(self.columns)}\n"
+                f"{table.to_string()}\n"
+                f"dtypes: {dtypes}\n"
+                f"memory usage: {self.memory_bytes} bytes\n")
+
+    def describe_string(self) -> str:
+        """The DataFrame.describe() table of the numeric columns, with the same rows."""
+        stats = {}
+        for name, column in self.columns.items():
+            if column.numeric:
+                quartiles = column.quartiles or [None] * len(QUARTILES)
+                stats[name] = {'count': float(column.count), 'mean': column.mean, 'std': column.std,
+                               'min': column.min, **{f"{q:.0%}": value for q, value in zip(QUARTILES, quartiles)},
+                               'max': column.max}
+        return pd.DataFrame(stats, dtype="float64").to_string()
+
+    # ----- Incremental updates -----
+
+    def remove_rows(self, removed: pd.DataFrame, deduplicated: bool = False) -> None:
+        """
+        Subtract rows that were filtered out.
+
+        Parameters:
+            removed (pd.DataFrame): The rows removed, with the same columns as the profiled data.
+            deduplicated (bool, optional): True if the filter removed duplicates, so none remain.
+        """
+        if removed.empty:
+            return
+        self.row_count -= len(removed)
+        self.duplicate_count = 0 if deduplicated else None
+        self.memory_bytes = None
+        removed_profile = profile_dataframe(removed, with_distinct=False, with_duplicates=False)
+        for name, column in self.columns.items():
+            gone = removed_profile.columns[name]
+            column.distinct = None
+            column.quartiles = None
+            column.null_count -= gone.null_count
+            remaining = column.count - gone.count
+            if column.numeric and gone.count:
+                if remaining > 0:
+                    # Reverse of Chan et al.'s pairwise update for mean and M2
+                    total = column.count
+                    mean = (column.mean * total - gone.mean * gone.count) / remaining
+                    delta = gone.mean - mean
+                    column.m2 = column.m2 - gone.m2 - delta * delta * remaining * gone.count / total
+                    column.mean = mean
+                    if column.min is not None and gone.min <= column.min:
+                        column.min = None
+                    if column.max is not None and gone.max >= column.max:
+                        column.max = None
+                else:
+                    column.mean = column.min = column.max = None
+                    column.m2 = 0.0
+            column.count = remaining
+
+    def add_rows(self, added: pd.DataFrame) -> None:
+        """
+        Add rows, e.g. the next chunk of a stream. Counts, moments, min, and max are combined
+        exactly, and memory use is summed; quartiles, distinct counts, and the duplicate count become stale.
+
+        Parameters:
+            added (pd.DataFrame): The rows added, with the same columns as the profiled data.
+        """
+        added_profile = profile_dataframe(added, with_distinct=False, with_duplicates=False)
+        self.duplicate_count = None
+        if self.memory_bytes is not None:
+            self.memory_bytes += added_profile.memory_bytes
+        for name, column in self.columns.items():
+            new = added_profile.columns[name]
+            column.dtype = _combined_dtype(column.dtype, added[name].dtype)
+            column.distinct = None
+            column.quartiles = None
+            column.null_count += new.null_count
+            total = column.count + new.count
+            if not (column.numeric and new.numeric):
+                column.mean = column.min = column.max = column.m2 = None
+            elif new.count and column.count:
+                # Chan et al.'s pairwise update for mean and M2
+                delta = new.mean - column.mean
+                column.m2 = column.m2 + new.m2 + delta * delta * column.count * new.count / total
+                column.mean = column.mean + delta * new.count / total
+                column.min = None if column.min is None else min(column.min, new.min)  # None: stale
+                column.max = None if column.max is None else max(column.max, new.max)
+            elif new.count:
+                column.mean, column.min, column.max, column.m2 = new.mean, new.min, new.max, new.m2
+            column.count = total
+        self.row_count += len(added)
+
+    def refresh_columns(self, df: pd.DataFrame, columns: Iterable[str]) -> None:
+        """Re-profile only the given columns (e.g. after they were transformed)."""
+        columns = [column for column in columns if column in df.columns]
+        fresh = profile_dataframe(df[columns], with_duplicates=False)
+        self.columns.update(fresh.columns)
+        self.columns = {name: self.columns[name] for name in df.columns if name in self.columns}
+        self.duplicate_count = None
+        self.memory_bytes = None
+
+    def refresh_dtypes(self, df: pd.DataFrame) -> None:
+        """Record new dtypes after a conversion that kept every value (e.g. memory compaction)."""
+        for name, dtype in df.dtypes.items():
+            if name in self.columns:
+                self.columns[name].dtype = str(dtype)
+        self.memory_bytes = None
+
+    def drop_columns(self, columns: Iterable[str]) -> None:
+        for name in columns:
+            self.columns.pop(name, None)
+        self.duplicate_count = None
+        self.memory_bytes = None
+
+    def rename_columns(self, column_mapping: Dict[str, str]) -> None:
+        self.columns = {column_mapping.get(name, name): column for name, column in self.columns.items()}
+
+    def reorder_columns(self, columns: List[str]) -> None:
+        if set(columns) != set(self.columns):
+            self.duplicate_count = None
+            self.memory_bytes = None
+        self.columns = {name: self.columns[name] for name in columns}
+
+    def complete(self, df: pd.DataFrame) -> "DataProfile":
+        """Recompute any stale statistics against the current data, then return self."""
+        if self.memory_bytes is None:
+            self.memory_bytes = int(df.memory_usage(index=True, deep=False).sum())
+        if self.duplicate_count is None:
+            self.duplicate_count = len(df) - int(pd.unique(hash_rows(df)).size)
+        for name, column in self.columns.items():
+            if column.distinct is None:
+                column.distinct = estimate_distinct(_column_hashes(df[name]))
+            if column.numeric and column.count and (column.min is None or column.max is None):
+                values = df[name]
+                column.min = float(values.min())
+                column.max = float(values.max())
+            if column.numeric and column.count and column.quartiles is None:
+                values = df[name].to_numpy(dtype="float64", na_value=np.nan)
+                column.quartiles = _quartiles(values[~np.isnan(values)])
+        return self
+
+
+def profile_dataframe(df: pd.DataFrame, with_distinct: bool = True, with_duplicates: bool = True) -> DataProfile:
+    """
+    Profile a DataFrame in one vectorized pass.
+
+    Null counts come from a single isna() pass over the frame. All numeric columns are
+    converted to one float64 block once, and their count, min, max, mean, and M2 are
+    computed column-wise on that block; quartiles from each column's non-null values.
+
+    Parameters:
+        df (pd.DataFrame): The data to profile.
+        with_distinct (bool, optional): Estimate distinct values per column. Default is True.
+        with_duplicates (bool, optional): Count duplicate rows. Default is True.
+
+    Returns:
+        DataProfile: The profile.
+    """
+    null_counts = df.isna().sum().to_numpy()
+    profile = DataProfile(
+        row_count=len(df),
+        memory_bytes=int(df.memory_usage(index=True, deep=False).sum()),
+        duplicate_count=len(df) - int(pd.unique(hash_rows(df)).size) if with_duplicates else None,
+    )
+    for position, (name, dtype) in enumerate(df.dtypes.items()):
+        profile.columns[name] = ColumnProfile(
+            dtype=str(dtype),
+            null_count=int(null_counts[position]),
+            count=len(df) - int(null_counts[position]),
+            distinct=estimate_distinct(_column_hashes(df[name])) if with_distinct else None,
+        )
+
+    numeric = [name for name, dtype in df.dtypes.items() if _is_numeric(dtype)]
+    if numeric:
+        block = df[numeric].to_numpy(dtype="float64", na_value=np.nan)
+        present = ~np.isnan(block)
+        counts = present.sum(axis=0)
+        sums = np.where(present, block, 0.0).sum(axis=0)
+        means = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        m2 = np.where(present, (block - means) ** 2, 0.0).sum(axis=0)
+        mins = np.where(present, block, np.inf).min(axis=0) if len(df) else np.full(len(numeric), np.inf)
+        maxs = np.where(present, block, -np.inf).max(axis=0) if len(df) else np.full(len(numeric), -np.inf)
+        for position, name in enumerate(numeric):
+            column = profile.columns[name]
+            column.m2 = float(m2[position])
+            if counts[position]:
+                column.mean = float(means[position])
+                column.min = float(mins[position])
+                column.max = float(maxs[position])
+                column.quartiles = _quartiles(block[present[:, position], position])
+    return profile
@@ -12,21 +12,196 @@ re-usable cleaning and preparation methods.
 
 See the associated test script in the tests folder. 
 
+By default every method runs immediately and returns the updated DataFrame.
+Pass lazy=True to record the calls as a plan instead; each method then returns
+the scrubber itself (so calls can be chained) and nothing runs until collect().
+collect() optimizes the plan (fused filters, early column drops, no deep copies)
+and executes it in a single pass. See scripts/scrubber_plan.py for the details.
+
+profile() returns a DataProfile (null counts, duplicate count, per-column statistics,
+distinct estimates, dtypes) computed in one pass and cached on the scrubber. Eager
+cleaning methods update the cached profile in place instead of recomputing it, and
+the consistency checks and inspect_data() are answered from it.
+See scripts/data_profiler.py for the details.
+
 """
 
-import io
+import numpy as np
 import pandas as pd
-from typing import Dict, Tuple, Union, List
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence, Tuple, Union, List
+
+from scripts.column_schema import ColumnSpec, convert_columns, parse_schema, validate
+from scripts.data_profiler import DataProfile, profile_dataframe
+from scripts.date_parser import DateParser
+from scripts.memory_compaction import CATEGORY_RATIO, compact_dataframe
+from scripts.string_normalizer import StringNormalizer, Transform
+from scripts.scrubber_plan import (
+    BARRIER,
+    FILTER,
+    FRAME_FILTER,
+    FRAME_TRANSFORM,
+    PROJECT,
+    TRANSFORM,
+    PlanStep,
+    apply_step,
+    as_bool_array,
+    execute_plan,
+    explain_plan,
+    optimize_plan,
+)
+
+if TYPE_CHECKING:
+    from scripts.dedup_index import RowHashIndex
+
+# Cleaning methods return the updated DataFrame, or the scrubber itself in lazy mode
+ScrubResult = Union[pd.DataFrame, "DataScrubber"]
+
+# Shared normalizers, so their memoized values carry over between columns and scrubbers
+_LOWER_AND_TRIM = StringNormalizer(["lower", "strip"])
+_UPPER_AND_TRIM = StringNormalizer(["upper", "strip"])
+
+# Shared date parser (detects the format per call, memoizes per format)
+_DATE_PARSER = DateParser()
+
+
+def _fill_missing(df: pd.DataFrame, fill_value: Any) -> pd.DataFrame:
+    """fillna that first adds the fill value to any categorical column that needs it."""
+    new_categories = {
+        column: df[column].cat.add_categories([fill_value])
+        for column, dtype in df.dtypes.items()
+        if isinstance(dtype, pd.CategoricalDtype) and fill_value not in dtype.categories and df[column].hasnans
+    }
+    if new_categories:
+        df = df.assign(**new_categories)
+    return df.fillna(fill_value)
 
 class DataScrubber:
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, lazy: bool = False):
         """
         Initialize the DataScrubber with a DataFrame.
         
         Parameters:
             df (pd.DataFrame): The DataFrame to be scrubbed.
+            lazy (bool, optional): If True, record cleaning calls and run them on collect(). Default is False.
         """
         self.df = df
+        self.lazy = lazy
+        self.plan: List[PlanStep] = []
+        self._profile: Optional[DataProfile] = None
+        self.compaction_report: Optional[Dict[str, Any]] = None
+        self.date_report: Optional[Dict[str, Any]] = None
+        self.schema_report: Optional[Dict[str, int]] = None
+        self.rejections: Optional[pd.Series] = None
+        # Row hash indexes waiting for the rows the cleaning keeps (see remove_duplicate_records),
+        # and meanwhile the position in the input of each row of df
+        self._indexes: List["RowHashIndex"] = []
+        self._row_ids: Optional[np.ndarray] = None
+
+    def _run(self, step: PlanStep) -> ScrubResult:
+        """Record the step in lazy mode, otherwise apply it to the DataFrame right away."""
+        if self.lazy:
+            self.plan.append(step)
+            return self
+        if step.kind in (FILTER, FRAME_FILTER):
+            keep = as_bool_array(step.mask(self._with_row_ids(self.df)))
+            if self._profile is not None:
+                self._profile.remove_rows(self.df[~keep], deduplicated=step.name == 'remove_duplicate_records')
+            self.df = self.df[keep]
+            if self._row_ids is not None:
+                self._row_ids = self._row_ids[keep]
+        elif self._profile is None:
+            self.df = apply_step(self.df, step)
+        else:
+            nulls_before = [name for name, column in self._profile.columns.items() if column.null_count]
+            self.df = apply_step(self.df, step)
+            self._update_profile(step, nulls_before)
+        return self.df
+
+    def _update_profile(self, step: PlanStep, nulls_before: List[str]) -> None:
+        """Bring the cached profile up to date after a non-filter step."""
+        if step.name == 'compact_memory':
+            # Values are unchanged, only the dtypes (and memory use) are different
+            self._profile.refresh_dtypes(self.df)
+        elif step.kind == PROJECT:
+            self._profile.drop_columns(step.drops)
+        elif step.kind == TRANSFORM:
+            self._profile.refresh_columns(self.df, step.writes)
+        elif step.kind == FRAME_TRANSFORM:
+            # fillna only changes the columns that had missing values
+            self._profile.refresh_columns(self.df, nulls_before)
+        elif step.name == 'rename_columns':
+            self._profile.rename_columns(step.params['column_mapping'])
+        elif step.name == 'reorder_columns':
+            self._profile.reorder_columns(step.params['columns'])
+        else:
+            self._profile = None
+
+    def collect(self) -> pd.DataFrame:
+        """
+        Optimize and run any recorded steps, then return the resulting DataFrame.
+        
+        In eager mode there is never a pending plan, so this simply returns the DataFrame.
+        Either way, the rows kept are then added to the indexes given to remove_duplicate_records.
+        
+        Returns:
+            pd.DataFrame: Updated DataFrame with every recorded step applied.
+        """
+        self._execute()
+        for index in self._indexes:
+            index.commit(self._row_ids)
+        self._indexes, self._row_ids = [], None
+        return self.df
+
+    def _execute(self) -> None:
+        """Run the recorded plan, if any, keeping track of the input position of each row."""
+        if not self.plan:
+            return
+        plan = optimize_plan(self.plan)
+        if self._row_ids is None:
+            self.df = execute_plan(self.df, plan)
+        else:
+            # Rows keep their labels through a plan, so label them by input position while it runs
+            result = execute_plan(self._with_row_ids(self.df), plan)
+            kept = result.index.to_numpy()
+            self.df = result.set_axis(self.df.index[np.searchsorted(self._row_ids, kept)], axis=0)
+            self._row_ids = kept
+        self.plan = []
+        self._profile = None
+
+    def _with_row_ids(self, df: pd.DataFrame) -> pd.DataFrame:
+        """The frame with its rows labeled by input position, while an index waits for the kept rows."""
+        return df if self._row_ids is None else df.set_axis(pd.Index(self._row_ids), axis=0)
+
+    def _wait_for_kept_rows(self, index: "RowHashIndex") -> None:
+        """Have collect() tell the index which rows the cleaning keeps."""
+        if not any(waiting is index for waiting in self._indexes):
+            self._indexes.append(index)
+        if self._row_ids is None:
+            self._row_ids = np.arange(len(self.df))
+
+    def profile(self) -> DataProfile:
+        """
+        Profile the data: null counts, duplicate count, per-column statistics, and dtypes.
+        
+        The profile is computed in one pass the first time, cached, and kept up to date by
+        the eager cleaning methods. Use .to_dict() or .to_json() on the result to emit it.
+        
+        Returns:
+            DataProfile: The current profile of the DataFrame.
+        """
+        self._execute()
+        if self._profile is None:
+            self._profile = profile_dataframe(self.df)
+        return self._profile.complete(self.df)
+
+    def explain(self) -> str:
+        """
+        Describe the optimized plan that collect() would run.
+        
+        Returns:
+            str: One line per step; steps evaluated together in one pass are marked as fused.
+        """
+        return explain_plan(optimize_plan(self.plan))
 
     def check_data_consistency_before_cleaning(self) -> Dict[str, Union[pd.Series, int]]:
         """
@@ -35,9 +210,8 @@ class DataScrubber:
         Returns:
             dict: Dictionary with counts of null values and duplicate rows.
         """
-        null_counts = self.df.isnull().sum()
-        duplicate_count = self.df.duplicated().sum()
-        return {'null_counts': null_counts, 'duplicate_count': duplicate_count}
+        profile = self.profile()
+        return {'null_counts': profile.null_counts, 'duplicate_count': profile.duplicate_count}
 
     def check_data_consistency_after_cleaning(self) -> Dict[str, Union[pd.Series, int]]:
         """
@@ -46,13 +220,89 @@ class DataScrubber:
         Returns:
             dict: Dictionary with counts of null values and duplicate rows, expected to be zero for each.
         """
-        null_counts = self.df.isnull().sum()
-        duplicate_count = self.df.duplicated().sum()
+        profile = self.profile()
+        null_counts = profile.null_counts
+        duplicate_count = profile.duplicate_count
         assert null_counts.sum() == 0, "Data still contains null values after cleaning."
         assert duplicate_count == 0, "Data still contains duplicate records after cleaning."
         return {'null_counts': null_counts, 'duplicate_count': duplicate_count}
 
-    def convert_column_to_new_data_type(self, column: str, new_type: type) -> pd.DataFrame:
+    def apply_schema(self, schema: Dict[str, Union[ColumnSpec, Dict[str, Any]]],
+                     max_workers: Optional[int] = None, rules: Optional[Dict[str, str]] = None) -> ScrubResult:
+        """
+        Convert all columns to the types in a dataset schema, then drop the rows that break any of its rules.
+        
+        Columns are converted at once (across a thread pool for large frames) and every rule
+        (nullability, min/max, allowed values, row rules) is combined into one mask, so invalid
+        rows are removed with a single filter. The number of rows failing each column's rules
+        and each row rule is stored in `schema_report`, and `rejections` holds the reason code of
+        every removed row (such as 'JoinDate:unparseable'), indexed by its label in the input.
+        See scripts/column_schema.py for the details.
+        
+        Parameters:
+            schema (dict): Column name -> ColumnSpec, or a dict of ColumnSpec fields
+                (e.g. {'dtype': 'numeric', 'nullable': False, 'min': 0}).
+            max_workers (int, optional): Thread pool size for the conversions.
+            rules (dict, optional): Rule name -> row expression across columns, e.g.
+                {'positive_total': 'Quantity * UnitPrice > 0'}.
+        
+        Returns:
+            pd.DataFrame: Updated DataFrame with converted columns and only valid rows.
+        """
+        schema = parse_schema(schema)
+        rules = dict(rules or {})
+        columns = frozenset(schema)
+
+        before: Dict[str, pd.DataFrame] = {}
+
+        def convert(df: pd.DataFrame) -> pd.DataFrame:
+            before['df'] = df[[column for column in df.columns if column in columns]]
+            return convert_columns(df, schema, max_workers)
+
+        def validate_rows(df: pd.DataFrame) -> pd.Series:
+            original = before.pop('df', None)
+            if original is not None and not original.index.equals(df.index):
+                original = None  # cannot line up the values before conversion; report them as missing
+            validation = validate(df, schema, rules, original)
+            self.schema_report = validation.invalid_counts
+            self.rejections = validation.reasons[~validation.mask]
+            return validation.mask
+
+        self._run(PlanStep('apply_schema', TRANSFORM, {'columns': sorted(columns)}, reads=columns, writes=columns,
+                           apply=convert))
+        if rules:
+            # Row rules may read any column, so the filter cannot be moved or narrowed
+            return self._run(PlanStep('apply_schema_rules', FRAME_FILTER, {'columns': sorted(columns),
+                                                                           'rules': sorted(rules)}, mask=validate_rows))
+        return self._run(PlanStep('apply_schema_rules', FILTER, {'columns': sorted(columns)}, reads=columns,
+                                  mask=validate_rows))
+
+    def compact_memory(self, category_ratio: float = CATEGORY_RATIO, nullable_ints: bool = False) -> ScrubResult:
+        """
+        Shrink the DataFrame's memory use without changing its values.
+        
+        Integers are downcast, but not below 32 bits so arithmetic and row rules do not
+        overflow; floats become float32 where lossless; text columns with few distinct
+        values become categoricals (see scripts/memory_compaction.py). Later cleaning
+        steps keep these compact types. The bytes used before and after, and
+        each dtype change, are stored in `compaction_report`.
+        
+        Parameters:
+            category_ratio (float, optional): Maximum distinct/rows ratio for a text column to become categorical.
+            nullable_ints (bool, optional): Turn whole-number float columns, with or without missing
+                values, into nullable integers. Default is False.
+        
+        Returns:
+            pd.DataFrame: Updated DataFrame with compact column types.
+        """
+        def compact(df: pd.DataFrame) -> pd.DataFrame:
+            df, self.compaction_report = compact_dataframe(df, category_ratio, nullable_ints)
+            return df
+
+        return self._run(PlanStep('compact_memory', FRAME_TRANSFORM,
+                                  {'category_ratio': category_ratio, 'nullable_ints': nullable_ints}, apply=compact))
+
+    def convert_column_to_new_data_type(self, column: str, new_type: type) -> ScrubResult:
         """
         Convert a specified column to a new data type.
         
@@ -63,10 +313,14 @@ class DataScrubber:
         Returns:
             pd.DataFrame: Updated DataFrame with the column type converted.
         """
-        self.df[column] = self.df[column].astype(new_type)
-        return self.df
+        def convert(df: pd.DataFrame) -> pd.DataFrame:
+            df[column] = df[column].astype(new_type)
+            return df
+
+        return self._run(PlanStep('convert_column_to_new_data_type', TRANSFORM, {'column': column, 'new_type': new_type},
+                                  reads=frozenset([column]), writes=frozenset([column]), apply=convert))
 
-    def drop_columns(self, columns: List[str]) -> pd.DataFrame:
+    def drop_columns(self, columns: List[str]) -> ScrubResult:
         """
         Drop specified columns from the DataFrame.
         
@@ -76,10 +330,9 @@ class DataScrubber:
         Returns:
             pd.DataFrame: Updated DataFrame with specified columns removed.
         """
-        self.df = self.df.drop(columns=columns, errors='ignore')
-        return self.df
+        return self._run(PlanStep('drop_columns', PROJECT, {'columns': list(columns)}, drops=frozenset(columns)))
 
-    def filter_column_outliers(self, column: str, lower_bound: Union[float, int], upper_bound: Union[float, int]) -> pd.DataFrame:
+    def filter_column_outliers(self, column: str, lower_bound: Union[float, int], upper_bound: Union[float, int]) -> ScrubResult:
         """
         Filter outliers in a specified column based on lower and upper bounds.
         
@@ -91,10 +344,12 @@ class DataScrubber:
         Returns:
             pd.DataFrame: Updated DataFrame with outliers filtered out.
         """
-        self.df = self.df[(self.df[column] >= lower_bound) & (self.df[column] <= upper_bound)]
-        return self.df
+        return self._run(PlanStep('filter_column_outliers', FILTER,
+                                  {'column': column, 'lower_bound': lower_bound, 'upper_bound': upper_bound},
+                                  reads=frozenset([column]),
+                                  mask=lambda df: (df[column] >= lower_bound) & (df[column] <= upper_bound)))
 
-    def format_column_strings_to_lower_and_trim(self, column: str) -> pd.DataFrame:
+    def format_column_strings_to_lower_and_trim(self, column: str) -> ScrubResult:
         """
         Format strings in a specified column by converting to lowercase and trimming whitespace.
         
@@ -104,10 +359,9 @@ class DataScrubber:
         Returns:
             pd.DataFrame: Updated DataFrame with formatted string column.
         """
-        self.df[column] = self.df[column].str.lower().str.strip()
-        return self.df
+        return self._normalize(column, _LOWER_AND_TRIM, 'format_column_strings_to_lower_and_trim', {'column': column})
 
-    def format_column_strings_to_upper_and_trim(self, column: str) -> pd.DataFrame:
+    def format_column_strings_to_upper_and_trim(self, column: str) -> ScrubResult:
         """
         Format strings in a specified column by converting to uppercase and trimming whitespace.
         
@@ -117,10 +371,39 @@ class DataScrubber:
         Returns:
             pd.DataFrame: Updated DataFrame with formatted string column.
         """
-        self.df[column] = self.df[column].str.upper().str.strip()
-        return self.df
+        return self._normalize(column, _UPPER_AND_TRIM, 'format_column_strings_to_upper_and_trim', {'column': column})
+
+    def _normalize(self, column: str, normalizer: StringNormalizer, name: str, params: Dict[str, Any]) -> ScrubResult:
+        """Record or run a string normalization of one column."""
+        def normalize(df: pd.DataFrame) -> pd.DataFrame:
+            df[column] = normalizer.normalize(df[column])
+            return df
 
-    def handle_missing_data(self, drop: bool = False, fill_value: Union[None, float, int, str] = None) -> pd.DataFrame:
+        return self._run(PlanStep(name, TRANSFORM, params, reads=frozenset([column]), writes=frozenset([column]),
+                                  apply=normalize))
+
+    def normalize_column_strings(self, column: str, transforms: Sequence[Transform], stringify: bool = False) -> ScrubResult:
+        """
+        Normalize strings in a specified column with a chain of transforms.
+        
+        Each distinct value is transformed once and mapped back to the rows, so the cost
+        depends on the number of distinct values, not the number of rows. Categorical
+        columns stay categorical.
+        
+        Parameters:
+            column (str): Name of the column to normalize.
+            transforms (list): Transform names applied in order, e.g. ['strip', 'collapse_whitespace', 'capitalize'].
+                See TRANSFORMS in scripts/string_normalizer.py for the available names.
+            stringify (bool, optional): If True, convert non-string values with str() first. Default is False.
+        
+        Returns:
+            pd.DataFrame: Updated DataFrame with normalized string column.
+        """
+        normalizer = StringNormalizer(transforms, stringify=stringify)
+        return self._normalize(column, normalizer, 'normalize_column_strings',
+                               {'column': column, 'transforms': list(transforms)})
+
+    def handle_missing_data(self, drop: bool = False, fill_value: Union[None, float, int, str] = None) -> ScrubResult:
         """
         Handle missing data in the DataFrame.
         
@@ -132,49 +415,75 @@ class DataScrubber:
             pd.DataFrame: Updated DataFrame with missing data handled.
         """
         if drop:
-            self.df = self.df.dropna()
-        elif fill_value is not None:
-            self.df = self.df.fillna(fill_value)
-        return self.df
+            return self._run(PlanStep('handle_missing_data', FRAME_FILTER, {'drop': True},
+                                      mask=lambda df: df.notna().all(axis=1)))
+        if fill_value is not None:
+            return self._run(PlanStep('handle_missing_data', FRAME_TRANSFORM, {'fill_value': fill_value},
+                                      apply=lambda df: _fill_missing(df, fill_value)))
+        return self if self.lazy else self.df
 
     def inspect_data(self) -> Tuple[str, str]:
         """
         Inspect the data by providing DataFrame information and summary statistics.
         
+        Both strings are rendered from the cached profile, so no extra pass over the data is needed.
+        
         Returns:
-            tuple: (info_str, describe_str), where `info_str` is a string representation of DataFrame.info()
-                   and `describe_str` is a string representation of DataFrame.describe().
+            tuple: (info_str, describe_str), where `info_str` summarizes columns, non-null counts and dtypes
+                   (like DataFrame.info()) and `describe_str` tabulates count, mean, std, min, 25%, 50%, 75%
+                   and max of the numeric columns, in the layout of DataFrame.describe().
         """
-        buffer = io.StringIO()
-        self.df.info(buf=buffer)
-        info_str = buffer.getvalue()  # Retrieve the string content of the buffer
-        describe_str = self.df.describe().to_string()  # Convert DataFrame.describe() output to a string
-        return info_str, describe_str
+        profile = self.profile()
+        return profile.info_string(), profile.describe_string()
 
-    def parse_dates_to_add_standard_datetime(self, column: str) -> pd.DataFrame:
+    def parse_dates_to_add_standard_datetime(self, column: str, date_format: Optional[str] = None) -> ScrubResult:
         """
         Parse a specified column as datetime format and add it as a new column named 'StandardDateTime'.
         
+        Each distinct value is parsed once, with the column's dominant format where possible.
+        Counts of the values parsed and of those coerced to NaT are stored in `date_report`.
+        See scripts/date_parser.py for the details.
+        
         Parameters:
             column (str): Name of the column to parse as datetime.
+            date_format (str, optional): Explicit format such as '%m/%d/%Y'. If None, it is detected.
         
         Returns:
             pd.DataFrame: Updated DataFrame with a new 'StandardDateTime' column containing parsed datetime values.
         """
-        self.df['StandardDateTime'] = pd.to_datetime(self.df[column], errors='coerce')
-        return self.df
+        parser = _DATE_PARSER if date_format is None else DateParser(date_format)
+
+        def parse_dates(df: pd.DataFrame) -> pd.DataFrame:
+            df['StandardDateTime'] = parser.parse(df[column])
+            self.date_report = parser.last_report
+            return df
+
+        return self._run(PlanStep('parse_dates_to_add_standard_datetime', TRANSFORM,
+                                  {'column': column, 'date_format': date_format},
+                                  reads=frozenset([column]), writes=frozenset(['StandardDateTime']),
+                                  apply=parse_dates))
     
-    def remove_duplicate_records(self) -> pd.DataFrame:
+    def remove_duplicate_records(self, index: Optional["RowHashIndex"] = None) -> ScrubResult:
         """
         Remove duplicate rows from the DataFrame.
         
+        Parameters:
+            index (RowHashIndex, optional): Persistent index of rows seen in earlier runs.
+                If given, rows already in the index are removed too. The new rows still there
+                when collect() is called are added to it, so rows that a later step rejects are
+                not remembered. Call collect() when the cleaning is done, and index.save() once
+                the cleaned data has been written.
+        
         Returns:
             pd.DataFrame: Updated DataFrame with duplicates removed.
         """
-        self.df = self.df.drop_duplicates()
-        return self.df
+        if index is not None:
+            self._wait_for_kept_rows(index)
+            return self._run(PlanStep('remove_duplicate_records', FRAME_FILTER, {'index': index.name},
+                                      mask=index.pending_rows_mask))
+        return self._run(PlanStep('remove_duplicate_records', FRAME_FILTER, mask=lambda df: ~df.duplicated()))
 
-    def rename_columns(self, column_mapping: Dict[str, str]) -> pd.DataFrame:
+    def rename_columns(self, column_mapping: Dict[str, str]) -> ScrubResult:
         """
         Rename columns in the DataFrame based on a provided mapping.
         
@@ -184,10 +493,10 @@ class DataScrubber:
         Returns:
             pd.DataFrame: Updated DataFrame with renamed columns.
         """
-        self.df = self.df.rename(columns=column_mapping)
-        return self.df
+        return self._run(PlanStep('rename_columns', BARRIER, {'column_mapping': dict(column_mapping)},
+                                  apply=lambda df: df.rename(columns=column_mapping)))
 
-    def reorder_columns(self, columns: List[str]) -> pd.DataFrame:
+    def reorder_columns(self, columns: List[str]) -> ScrubResult:
         """
         Reorder columns in the DataFrame based on the specified order.
         
@@ -197,5 +506,5 @@ class DataScrubber:
         Returns:
             pd.DataFrame: Updated DataFrame with reordered columns.
         """
-        self.df = self.df[columns]
-        return self.df
+        return self._run(PlanStep('reorder_columns', BARRIER, {'columns': list(columns)},
+                                  apply=lambda df: df[columns]))
@@ -0,0 +1,105 @@
+"""
+scripts/date_dimension.py
+
+Do not run this script directly.
+Instead, from this module (scripts.date_dimension)
+import date_keys, calendar_range, and build_date_dim.
+
+The date dimension of the data warehouse (see scripts/etl_to_dw.py). Dates are
+identified by an integer key, yyyymmdd (2024-01-06 is 20240106), so:
+
+- The fact stores sale_date_key next to sale_date. Range filters on it are
+  integer comparisons on an index, and keys sort in date order.
+- Calendar rollups join the fact to date_dim on the key, which holds each date's
+  year, quarter, month, ISO week, day of week, and fiscal year, quarter, and month,
+  computed once per date instead of parsing the date strings of every fact row.
+
+date_keys() turns a column of dates (strings in any format DateParser detects, or
+datetimes) into keys, with <NA> for missing dates. build_date_dim() creates one row
+per day between two dates; calendar_range() gives the whole years spanning a set of
+keys, so the dimension covers every date the fact and customers refer to.
+
+The fiscal year starts in FISCAL_YEAR_START_MONTH and is named after the calendar
+year it ends in: with July, 2024-07-01 to 2025-06-30 is fiscal year 2025.
+
+Example:
+
+    sales_df["sale_date_key"] = date_keys(sales_df["sale_date"])
+    date_dim_df = build_date_dim(*calendar_range(sales_df["sale_date_key"]))
+"""
+
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from scripts.date_parser import DateParser
+
+# First month of the fiscal year (1 makes the fiscal year the calendar year)
+FISCAL_YEAR_START_MONTH = 7
+
+DATE_DIM_COLUMNS = [
+    "date_key", "full_date", "year", "quarter", "month", "month_name", "week_of_year", "day_of_month",
+    "day_of_week", "day_name", "is_weekend", "fiscal_year", "fiscal_quarter", "fiscal_month",
+]
+
+
+def date_keys(dates: pd.Series, parser: Optional[DateParser] = None) -> pd.Series:
+    """
+    The yyyymmdd integer key of each date.
+
+    Parameters:
+        dates (pd.Series): Dates as strings or datetimes.
+        parser (DateParser, optional): Parses string dates. Default: a new DateParser.
+
+    Returns:
+        pd.Series: Int64 keys, <NA> where the date is missing or cannot be parsed.
+    """
+    dates = (parser or DateParser()).parse(dates)
+    keys = dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day
+    return keys.astype("Int64")
+
+
+def calendar_range(*keys: pd.Series) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+    """The first day of the earliest year and the last day of the latest year of date keys, or (None, None)."""
+    present = [column.dropna() for column in keys]
+    present = [column for column in present if len(column)]
+    if not present:
+        return None, None
+    first = min(int(column.min()) for column in present) // 10000
+    last = max(int(column.max()) for column in present) // 10000
+    return pd.Timestamp(year=first, month=1, day=1), pd.Timestamp(year=last, month=12, day=31)
+
+
+def build_date_dim(start: Optional[pd.Timestamp], end: Optional[pd.Timestamp],
+                   fiscal_year_start_month: int = FISCAL_YEAR_START_MONTH) -> pd.DataFrame:
+    """
+    One row per day from start to end (inclusive), with the DATE_DIM_COLUMNS.
+
+    Parameters:
+        start, end (pd.Timestamp): The first and last dates. If either is None, the table is empty.
+        fiscal_year_start_month (int, optional): First month of the fiscal year. Default is FISCAL_YEAR_START_MONTH.
+
+    Returns:
+        pd.DataFrame: The date dimension, in date order.
+    """
+    dates = pd.Series(pd.date_range(start, end, freq="D") if start is not None and end is not None
+                      else pd.DatetimeIndex([]))
+    # Months since the fiscal year started (0-11), and the calendar year the fiscal year ends in
+    fiscal_offset = (dates.dt.month - fiscal_year_start_month) % 12
+    fiscal_year = dates.dt.year + ((dates.dt.month >= fiscal_year_start_month) & (fiscal_year_start_month > 1))
+    return pd.DataFrame({
+        "date_key": dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day,
+        "full_date": dates.dt.strftime("%Y-%m-%d"),
+        "year": dates.dt.year,
+        "quarter": dates.dt.quarter,
+        "month": dates.dt.month,
+        "month_name": dates.dt.month_name(),
+        "week_of_year": dates.dt.isocalendar().week.astype("int64"),
+        "day_of_month": dates.dt.day,
+        "day_of_week": dates.dt.dayofweek + 1,  # ISO: Monday is 1, Sunday is 7
+        "day_name": dates.dt.day_name(),
+        "is_weekend": (dates.dt.dayofweek >= 5).astype(int),
+        "fiscal_year": fiscal_year.astype("int64"),
+        "fiscal_quarter": fiscal_offset // 3 + 1,
+        "fiscal_month": fiscal_offset + 1,
+    }, columns=DATE_DIM_COLUMNS)
@@ -0,0 +1,173 @@
+"""
+scripts/date_parser.py
+
+Do not run this script directly.
+Instead, from this module (scripts.date_parser)
+import the DateParser class.
+
+Letting pd.to_datetime guess the format of every value is one of the slowest
+cleaning steps. DateParser parses a column of date strings in four stages:
+
+1. The column is factorized, so each distinct date string is parsed once
+   (sale dates repeat heavily).
+2. The dominant format is detected from a sample of the distinct values by
+   trying each of the CANDIDATE_FORMATS.
+3. All distinct values are parsed with that explicit format (the fast path).
+4. Only the values that did not match are sent to the slow fallback,
+   pd.to_datetime(format="mixed"), which guesses the format per value.
+
+Parsed values are memoized per parser and format, so later chunks or calls
+skip values already seen. After each call, `last_report` holds counts of the
+rows, distinct values, cache hits, fast-path and fallback parses, and the
+number of values coerced to NaT.
+
+Example:
+
+    parser = DateParser()
+    df["SaleDate"] = parser.parse(df["SaleDate"])
+    logger.info(f"SaleDate parsing: {parser.last_report}")
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Formats tried when detecting the dominant format, in order of preference on ties
+CANDIDATE_FORMATS = (
+    "%m/%d/%Y",
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y/%m/%d",
+    "%m-%d-%Y",
+    "%d/%m/%Y",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%y",
+)
+
+# Number of distinct values sampled when detecting the dominant format
+FORMAT_SAMPLE_SIZE = 200
+
+# Stop memoizing new values once a parser has cached this many
+MAX_CACHE_SIZE = 100_000
+
+_NAT = np.datetime64("NaT", "ns")
+
+
+def _to_datetime64(parsed: pd.Series) -> np.ndarray:
+    # Drop any time zone (mixed input can carry one) and settle on nanosecond resolution
+    if getattr(parsed.dt, "tz", None) is not None:
+        parsed = parsed.dt.tz_convert(None)
+    return parsed.to_numpy(dtype="datetime64[ns]")
+
+
+def detect_format(values: Sequence[str], formats: Sequence[str] = CANDIDATE_FORMATS,
+                  sample_size: int = FORMAT_SAMPLE_SIZE) -> Optional[str]:
+    """
+    Detect the format that matches the most values in an evenly spaced sample.
+
+    Parameters:
+        values (sequence): Distinct date strings.
+        formats (sequence, optional): Candidate strptime formats. Default is CANDIDATE_FORMATS.
+        sample_size (int, optional): Maximum number of values to try. Default is FORMAT_SAMPLE_SIZE.
+
+    Returns:
+        str or None: The best matching format, or None if no format matches any value.
+    """
+    values = np.asarray(values, dtype=object)
+    if len(values) > sample_size:
+        values = values[np.linspace(0, len(values) - 1, sample_size).astype(int)]
+    sample = pd.Series(values, dtype=object)
+    best_format, best_matches = None, 0
+    for date_format in formats:
+        matches = int(pd.to_datetime(sample, format=date_format, errors="coerce").notna().sum())
+        if matches > best_matches:
+            best_format, best_matches = date_format, matches
+            if matches == len(sample):
+                break
+    return best_format
+
+
+class DateParser:
+    def __init__(self, date_format: Optional[str] = None, formats: Sequence[str] = CANDIDATE_FORMATS,
+                 fallback: bool = True):
+        """
+        Create a date parser.
+
+        Parameters:
+            date_format (str, optional): Explicit strptime format for the fast path.
+                If None, the dominant format is detected on every call. Default is None.
+            formats (sequence, optional): Candidate formats for detection. Default is CANDIDATE_FORMATS.
+            fallback (bool, optional): If True, values that do not match the format are parsed
+                with pd.to_datetime(format="mixed"); if False they become NaT. Default is True.
+        """
+        self.date_format = date_format
+        self.formats = tuple(formats)
+        self.fallback = fallback
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._cache: Dict[Any, np.datetime64] = {}
+
+    def _parse_distinct(self, values: np.ndarray, date_format: Optional[str]) -> Dict[str, Any]:
+        """Parse distinct strings that are not cached yet, returning the results and counts."""
+        strings = pd.Series(values, dtype=object)
+        parsed = np.full(len(values), _NAT)
+        if date_format is not None:
+            parsed = _to_datetime64(pd.to_datetime(strings, format=date_format, errors="coerce"))
+        fast_path = int((~np.isnat(parsed)).sum())
+        residue = np.flatnonzero(np.isnat(parsed))
+        fallback = 0
+        if self.fallback and residue.size:
+            guessed = _to_datetime64(pd.to_datetime(strings.iloc[residue], format="mixed", errors="coerce"))
+            parsed[residue] = guessed
+            fallback = int((~np.isnat(guessed)).sum())
+        return {'parsed': parsed, 'fast_path': fast_path, 'fallback': fallback}
+
+    def parse(self, series: pd.Series) -> pd.Series:
+        """
+        Parse a column of dates, coercing values that cannot be parsed to NaT.
+
+        Parameters:
+            series (pd.Series): The column to parse. Datetime columns are returned unchanged.
+
+        Returns:
+            pd.Series: A datetime64[ns] column with the same index and name.
+        """
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            self.last_report = {'rows': len(series), 'distinct': None, 'format': None, 'cache_hits': 0,
+                                'fast_path': 0, 'fallback': 0, 'missing': int(series.isna().sum()), 'failed': 0}
+            return series
+
+        codes, uniques = pd.factorize(series)
+        strings = np.array([value.strip() if isinstance(value, str) else str(value) for value in uniques],
+                           dtype=object)
+        date_format = self.date_format or (detect_format(strings, self.formats) if len(strings) else None)
+
+        parsed = np.full(len(strings), _NAT)
+        todo = []
+        for position, value in enumerate(strings):
+            cached = self._cache.get((date_format, value))
+            if cached is None:
+                todo.append(position)
+            else:
+                parsed[position] = cached
+        fresh = {'parsed': np.array([], dtype="datetime64[ns]"), 'fast_path': 0, 'fallback': 0}
+        if todo:
+            fresh = self._parse_distinct(strings[todo], date_format)
+            parsed[todo] = fresh['parsed']
+            if len(self._cache) + len(todo) <= MAX_CACHE_SIZE:
+                for position, value in zip(todo, fresh['parsed']):
+                    self._cache[(date_format, strings[position])] = value
+
+        values = np.append(parsed, _NAT)[codes]  # code -1 (missing) picks the trailing NaT
+        missing = int((codes < 0).sum())
+        self.last_report = {
+            'rows': len(series),
+            'distinct': len(strings),
+            'format': date_format,
+            'cache_hits': len(strings) - len(todo),
+            'fast_path': fresh['fast_path'],
+            'fallback': fresh['fallback'],
+            'missing': missing,
+            'failed': int(np.isnat(values).sum()) - missing,
+        }
+        return pd.Series(values, index=series.index, name=series.name)
@@ -0,0 +1,142 @@
+"""
+scripts/dedup_index.py
+
+Do not run this script directly.
+Instead, from this module (scripts.dedup_index)
+import the RowHashIndex class.
+
+A RowHashIndex is a RowHashSet that is saved to disk, so duplicate removal
+can span pipeline runs and files. Pass it to remove_duplicate_records on a
+DataScrubber or StreamingScrubber and only rows whose hash is not already in
+the index are kept. The new rows are only added to it once the cleaning is done
+(pending_rows_mask, then commit with the rows kept), so a row that a later step
+rejects is not remembered, and comes back in the next run.
+
+Each dataset's index is stored as two sorted uint64 NumPy arrays:
+
+- <name>.hashes.npy holds the bulk of the hashes. It is memory-mapped on load,
+  so probing it costs O(log n) page reads per new row instead of a full read.
+- <name>.delta.npy holds hashes added since the last compaction. It is the only
+  file rewritten by most saves, so a run costs O(new rows), not O(all rows seen).
+
+The delta is folded into the main file once it grows past a quarter of it.
+
+Example:
+
+    index = RowHashIndex.for_dataset("sales", DEDUP_INDEX_DIR)
+    scrubber.remove_duplicate_records(index=index)
+    ...  # the other cleaning steps
+    df_clean = scrubber.collect()  # adds the rows kept to the index
+    ...  # save the cleaned output
+    index.save()
+"""
+
+import os
+import pathlib
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+
+from scripts.row_hashing import RowHashSet, hash_rows
+
+
+def _write_array(path: pathlib.Path, array: np.ndarray) -> None:
+    """Write an array to a .npy file atomically (write a temporary file, then rename)."""
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "wb") as f:
+        np.save(f, array)
+    os.replace(temporary, path)
+
+
+class RowHashIndex(RowHashSet):
+    def __init__(self, name: str, index_dir: Union[str, pathlib.Path]):
+        """
+        Open (or start) the row hash index for one dataset.
+
+        Parameters:
+            name (str): Dataset name, used as the file name prefix (e.g. 'sales').
+            index_dir (str or Path): Folder holding the index files.
+        """
+        super().__init__()
+        self.index_dir = pathlib.Path(index_dir)
+        self.name = name
+        self.main_path = self.index_dir / f"{name}.hashes.npy"
+        self.delta_path = self.index_dir / f"{name}.delta.npy"
+        if self.main_path.exists():
+            self._main = np.load(self.main_path, mmap_mode="r")
+        if self.delta_path.exists():
+            self._buffer = np.load(self.delta_path)
+        self._saved_main = self._main
+        # New rows flagged by pending_rows_mask(), by row label, until commit() confirms them
+        self._pending_ids: List[np.ndarray] = []
+        self._pending_hashes: List[np.ndarray] = []
+
+    @classmethod
+    def for_dataset(cls, name: str, index_dir: Union[str, pathlib.Path]) -> "RowHashIndex":
+        """Open the index for a dataset, creating the index folder if needed."""
+        pathlib.Path(index_dir).mkdir(parents=True, exist_ok=True)
+        return cls(name, index_dir)
+
+    def new_rows_mask(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Hash the rows of a DataFrame, add them to the index, and flag the new ones.
+
+        Parameters:
+            df (pd.DataFrame): Incoming rows.
+
+        Returns:
+            np.ndarray: Boolean mask, True for rows not seen in any earlier batch
+                        (and not repeated earlier in this one).
+        """
+        return self.add(hash_rows(df))
+
+    def pending_rows_mask(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Flag the new rows like new_rows_mask, but only add them once commit() confirms they were kept.
+
+        Parameters:
+            df (pd.DataFrame): Incoming rows, labeled with unique integers (e.g. their input positions).
+
+        Returns:
+            np.ndarray: Boolean mask, True for rows not in the index (and not repeated earlier in this batch).
+        """
+        hashes = hash_rows(df)
+        new = np.zeros(hashes.shape, dtype=bool)
+        new[np.unique(hashes, return_index=True)[1]] = True
+        new &= ~self.contains(hashes)
+        self._pending_ids.append(df.index.to_numpy()[new])
+        self._pending_hashes.append(hashes[new])
+        return new
+
+    def commit(self, kept: np.ndarray) -> None:
+        """
+        Add the pending rows that the cleaning kept, and forget the others.
+
+        Parameters:
+            kept (np.ndarray): The labels of the rows left after every cleaning step.
+        """
+        if self._pending_ids:
+            ids, hashes = np.concatenate(self._pending_ids), np.concatenate(self._pending_hashes)
+            self.add(hashes[np.isin(ids, kept)])
+        self._pending_ids, self._pending_hashes = [], []
+
+    def save(self) -> None:
+        """Persist the index. Only the delta file is rewritten unless a compaction happened."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        if self._main is not self._saved_main:
+            self._saved_main = None  # release the old memory map before replacing its file
+            _write_array(self.main_path, np.asarray(self._main))
+            self._main = np.load(self.main_path, mmap_mode="r")
+            self._saved_main = self._main
+        _write_array(self.delta_path, self._buffer)
+
+    def clear(self) -> None:
+        """Forget every hash and delete the index files."""
+        self._main = np.empty(0, dtype=np.uint64)
+        self._buffer = np.empty(0, dtype=np.uint64)
+        self._saved_main = self._main
+        self._pending_ids, self._pending_hashes = [], []
+        for path in (self.main_path, self.delta_path):
+            if path.exists():
+                path.unlink()
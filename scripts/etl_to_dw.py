@@ -1,4 +1,3 @@
-import pandas as pd
 import sqlite3
 import pathlib
 import sys
@@ -9,6 +8,15 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.append(str(PROJECT_ROOT))
 
 from utils.utils_logger import logger  # Custom logger
+from scripts.bulk_loader import load_pragmas  # noqa: E402
+from scripts.date_dimension import build_date_dim, calendar_range, date_keys  # noqa: E402
+from scripts.date_parser import DateParser  # noqa: E402
+from scripts.aggregates import AggregateRefresh  # noqa: E402
+from scripts.incremental_load import apply_diff, create_state_tables, diff_table  # noqa: E402
+from scripts.stage_cache import LIBRARY_CODE, StageCache  # noqa: E402
+from scripts.stage_metrics import count_rows_out  # noqa: E402
+from scripts.storage import read_table, table_files  # noqa: E402
+from scripts.warehouse_indexes import build_indexes  # noqa: E402
 
 # Paths
 DATA_DIR = PROJECT_ROOT / "data"
@@ -16,10 +24,43 @@ PREPARED_DATA_DIR = DATA_DIR / "prepared"
 DW_DIR = DATA_DIR / "dw"
 DW_DIR.mkdir(exist_ok=True)
 DB_PATH = DW_DIR / "smart_sales.db"
+PREPARED_FILES = [
+    PREPARED_DATA_DIR / "customers_data_prepared.csv",
+    PREPARED_DATA_DIR / "products_data_prepared.csv",
+    PREPARED_DATA_DIR / "sales_data_prepared.csv",
+]
+
+# Apply only the inserted, changed, and deleted rows (see scripts/incremental_load.py).
+# False, or --full on the command line, deletes and reloads every table.
+INCREMENTAL = True
+TABLE_KEYS = {"date_dim": "date_key", "customers": "customer_id", "products": "product_id",
+              "sales": "transaction_id"}
+
+# Integer yyyymmdd date keys added to tables created before the date dimension
+DATE_KEY_COLUMNS = {"customers": "join_date_key", "sales": "sale_date_key"}
 
 
 def create_schema(cursor):
     logger.info("Creating tables...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS date_dim (
+            date_key INTEGER PRIMARY KEY,
+            full_date TEXT,
+            year INTEGER,
+            quarter INTEGER,
+            month INTEGER,
+            month_name TEXT,
+            week_of_year INTEGER,
+            day_of_month INTEGER,
+            day_of_week INTEGER,
+            day_name TEXT,
+            is_weekend INTEGER,
+            fiscal_year INTEGER,
+            fiscal_quarter INTEGER,
+            fiscal_month INTEGER
+        );
+    """)
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS customers (
             customer_id INTEGER PRIMARY KEY,
@@ -28,7 +69,9 @@ def create_schema(cursor):
             join_date TEXT,
             loyalty_points INTEGER,
             customer_segment TEXT,
-            standard_datetime TEXT
+            standard_datetime TEXT,
+            join_date_key INTEGER,
+            FOREIGN KEY (join_date_key) REFERENCES date_dim(date_key)
         );
     """)
 
@@ -54,83 +97,140 @@ def create_schema(cursor):
             sale_amount REAL,
             discount_percent INTEGER,
             payment_type TEXT,
+            sale_date_key INTEGER,
             FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
-            FOREIGN KEY (product_id) REFERENCES products(product_id)
+            FOREIGN KEY (product_id) REFERENCES products(product_id),
+            FOREIGN KEY (sale_date_key) REFERENCES date_dim(date_key)
         );
     """)
 
-
-def delete_existing_records(cursor):
-    logger.info("Clearing existing records...")
-    cursor.execute("DELETE FROM customers")
-    cursor.execute("DELETE FROM products")
-    cursor.execute("DELETE FROM sales")
-
-
-def insert_data(df, table_name, cursor):
-    logger.info(f"Inserting data into {table_name} table...")
-    df.to_sql(table_name, cursor.connection, if_exists="append", index=False)
-
-
-def load_data_to_dw():
+    for table, column in DATE_KEY_COLUMNS.items():
+        if column not in {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}:
+            logger.info(f"Adding {table}.{column}...")
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER REFERENCES date_dim(date_key)")
+
+
+def dates_as_text(df):
+    """Datetime columns as the date text the tables hold: 2024-01-06, with the time only where one is set."""
+    for column in df.select_dtypes(include="datetime").columns:
+        dates = df[column]
+        whole_days = (dates.dropna() == dates.dropna().dt.normalize()).all()
+        df[column] = dates.dt.strftime("%Y-%m-%d" if whole_days else "%Y-%m-%d %H:%M:%S")
+    return df
+
+
+def load_table(df, table_name, cursor, full=False, before_write=None):
+    """Bring a table up to date with a DataFrame (see scripts/incremental_load.py) and log what changed.
+    before_write(diff) is called once the changes are known, before they are written. Returns the diff."""
+    logger.info(f"Loading data into {table_name} table...")
+    diff = diff_table(cursor.connection, table_name, df, TABLE_KEYS[table_name], full=full)
+    if before_write is not None:
+        before_write(diff)
+    report = apply_diff(cursor.connection, df, diff)
+    count_rows_out(report["inserted"] + report["updated"])
+    logger.info(f"Loaded {table_name} ({report['mode']}) in {report['seconds']:.3f} s: {report['inserted']} "
+                f"inserted, {report['updated']} updated, {report['deleted']} deleted, "
+                f"{report['unchanged']} unchanged")
+    return diff
+
+
+def load_data_to_dw(full=not INCREMENTAL):
+    """Load the warehouse tables from the prepared CSVs, in one transaction with the bulk load
+    settings: only the changed rows, or every row if full. Returns True if the load succeeded;
+    a failed load is rolled back."""
     logger.info("Connecting to SQLite database...")
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     try:
-        create_schema(cursor)
-        delete_existing_records(cursor)
-
-        logger.info("Reading prepared CSVs...")
-        customers_df = pd.read_csv(PREPARED_DATA_DIR / "customers_data_prepared.csv")
-        products_df = pd.read_csv(PREPARED_DATA_DIR / "products_data_prepared.csv")
-        sales_df = pd.read_csv(PREPARED_DATA_DIR / "sales_data_prepared.csv")
-
-        # Rename customer columns to match table schema
-        customers_df.rename(columns={
-            "CustomerID": "customer_id",
-            "Name": "name",
-            "Region": "region",
-            "JoinDate": "join_date",
-            "LoyaltyPoints": "loyalty_points",
-            "CustomerSegment": "customer_segment",
-            "StandardDateTime": "standard_datetime"
-        }, inplace=True)
-
-        # Rename product columns to match table schema
-        products_df.rename(columns={
-            "ProductID": "product_id",
-            "ProductName": "product_name",
-            "Category": "category",
-            "UnitPrice": "unit_price",
-            "StockQuantity": "stock_quantity",
-            "Supplier": "supplier"
-        }, inplace=True)
-
-        # Rename sales columns to match table schema
-        sales_df.rename(columns={
-            "TransactionID": "transaction_id",
-            "SaleDate": "sale_date",
-            "CustomerID": "customer_id",
-            "ProductID": "product_id",
-            "StoreID": "store_id",
-            "CampaignID": "campaign_id",
-            "SaleAmount": "sale_amount",
-            "DiscountPercent": "discount_percent",
-            "PaymentType": "payment_type"
-        }, inplace=True)
-
-        insert_data(customers_df, "customers", cursor)
-        insert_data(products_df, "products", cursor)
-        insert_data(sales_df, "sales", cursor)
-
-        conn.commit()
+        with load_pragmas(conn):
+            load_tables(cursor, full)
         logger.info("ETL process completed successfully.")
+        return True
     except Exception as e:
         logger.error(f"ETL process failed: {e}")
+        return False
     finally:
         conn.close()
         logger.info("Database connection closed.")
 
 
+def load_tables(cursor, full=False):
+    """Make the warehouse rows match the prepared tables (the caller commits)."""
+    create_schema(cursor)
+    create_state_tables(cursor.connection)
+
+    logger.info("Reading prepared tables...")
+    customers_df, products_df, sales_df = (dates_as_text(read_table(path)) for path in PREPARED_FILES)
+
+    # Rename customer columns to match table schema
+    customers_df.rename(columns={
+        "CustomerID": "customer_id",
+        "Name": "name",
+        "Region": "region",
+        "JoinDate": "join_date",
+        "LoyaltyPoints": "loyalty_points",
+        "CustomerSegment": "customer_segment",
+        "StandardDateTime": "standard_datetime"
+    }, inplace=True)
+
+    # Rename product columns to match table schema
+    products_df.rename(columns={
+        "ProductID": "product_id",
+        "ProductName": "product_name",
+        "Category": "category",
+        "UnitPrice": "unit_price",
+        "StockQuantity": "stock_quantity",
+        "Supplier": "supplier"
+    }, inplace=True)
+
+    # Rename sales columns to match table schema
+    sales_df.rename(columns={
+        "TransactionID": "transaction_id",
+        "SaleDate": "sale_date",
+        "CustomerID": "customer_id",
+        "ProductID": "product_id",
+        "StoreID": "store_id",
+        "CampaignID": "campaign_id",
+        "SaleAmount": "sale_amount",
+        "DiscountPercent": "discount_percent",
+        "PaymentType": "payment_type"
+    }, inplace=True)
+
+    # Integer date keys, and the date dimension covering them (see scripts/date_dimension.py)
+    parser = DateParser()
+    customers_df["join_date_key"] = date_keys(customers_df["join_date"], parser)
+    sales_df["sale_date_key"] = date_keys(sales_df["sale_date"], parser)
+    date_dim_df = build_date_dim(*calendar_range(customers_df["join_date_key"], sales_df["sale_date_key"]))
+
+    # The aggregate tables follow the changed sales rows (see scripts/aggregates.py)
+    refresh = AggregateRefresh(cursor.connection)
+    dimensions = {
+        "date_dim": load_table(date_dim_df, "date_dim", cursor, full),
+        "customers": load_table(customers_df, "customers", cursor, full),
+        "products": load_table(products_df, "products", cursor, full),
+    }
+    sales_diff = load_table(sales_df, "sales", cursor, full,
+                            before_write=lambda diff: refresh.before_fact(diff, dimensions))
+    for name, report in refresh.after_fact(sales_diff).items():
+        logger.info(f"Refreshed {name} ({report['mode']}) in {report['seconds']:.3f} s: {report['groups']} groups")
+
+    # Build the query indexes after the rows are in, and update the planner statistics
+    created = build_indexes(cursor.connection)
+    logger.info(f"Indexes created: {created or 'none (all present)'}; statistics updated")
+
+
+def main(force=False, full=not INCREMENTAL):
+    """Load the warehouse unless the prepared tables and the code are unchanged since the last load.
+    A full load always runs."""
+    cache = StageCache(force=force or full)
+    # Every file read_table may read for them, so a changed or missing column type file reloads too
+    inputs = [path for table in PREPARED_FILES for path in table_files(table) if path.exists()]
+    if not cache.run("etl_to_dw", load_data_to_dw, inputs=inputs, outputs=[DB_PATH],
+                     code=LIBRARY_CODE, full=full):
+        logger.info(f"Prepared data unchanged since the last load, kept {DB_PATH}")
+    cache.save()
+    logger.info(f"Stage cache: {cache.summary()}")
+
+
 if __name__ == "__main__":
-    load_data_to_dw()
+    main(force="--force" in sys.argv[1:], full=not INCREMENTAL or "--full" in sys.argv[1:])
@@ -0,0 +1,324 @@
+"""
+Generate Synthetic Data Script
+File: scripts/generate_synthetic_data.py
+
+Generates customers, products, and sales CSV files at any scale for load testing
+the pipeline, in the same columns and formats as the files in data/raw/:
+
+- Every ID in the sales file refers to a generated customer and product (unless an
+  error was injected). Customers and products are picked with skewed popularity.
+- Join dates are uniform; sale dates follow a rising trend with a year-end peak and
+  busier weekends, and are written like the raw files (e.g. 1/6/2024).
+- Errors are injected at a configurable rate per category: missing values, outliers,
+  mis-entered values, and duplicate rows (see ERROR_VALUES for what each one writes).
+- Every table is generated and written in chunks, so memory use depends on the
+  chunk size, not on the number of rows.
+- Output is fully determined by the arguments: the same seed gives the same files.
+
+To run it, open a terminal in the root project folder.
+Activate the local project virtual environment.
+Choose the correct command for your OS to run this script.
+
+py scripts\\generate_synthetic_data.py --sales-rows 1000000
+python3 scripts/generate_synthetic_data.py --sales-rows 1000000 --error-rate missing=0.02
+
+Other scripts can call generate_all() directly.
+"""
+
+import argparse
+import pathlib
+import sys
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from utils.utils_logger import logger  # noqa: E402
+
+# Default output folder and sizes
+SYNTHETIC_DATA_DIR = PROJECT_ROOT / "data" / "synthetic"
+SALES_ROWS = 1_000_000
+SALES_PER_CUSTOMER = 100   # default customer count is sales rows / this
+PRODUCT_COUNT = 1_000
+CHUNK_SIZE = 1_000_000
+SEED = 42
+
+# Default share of rows that get each kind of error
+ERROR_RATES: Dict[str, float] = {
+    "missing": 0.01,
+    "outlier": 0.005,
+    "misentered": 0.005,
+    "duplicate": 0.01,
+}
+
+# First IDs, matching the raw data
+FIRST_CUSTOMER_ID = 1001
+FIRST_PRODUCT_ID = 101
+FIRST_TRANSACTION_ID = 550
+
+# Date ranges
+JOIN_START, JOIN_END = "2019-01-01", "2023-12-31"
+SALES_START, SALES_END = "2020-01-01", "2024-12-31"
+
+REGIONS = np.array(["East", "West", "North", "South"])
+REGION_WEIGHTS = np.array([0.35, 0.3, 0.2, 0.15])
+STORE_IDS = np.arange(401, 407)
+CAMPAIGN_IDS = np.arange(0, 4)
+CAMPAIGN_WEIGHTS = np.array([0.8, 0.07, 0.07, 0.06])
+FIRST_NAMES = np.array(["William", "Olivia", "Dan", "Ava", "Liam", "Emma", "Noah", "Mia", "Lucas", "Zoe",
+                        "Ethan", "Chloe", "Mason", "Grace", "Logan", "Ella", "Aiden", "Lily", "Owen", "Nora"])
+LAST_NAMES = np.array(["White", "Brown", "Smith", "Johnson", "Lee", "Garcia", "Miller", "Davis", "Clark", "Lewis",
+                       "Walker", "Hall", "Young", "King", "Wright", "Lopez", "Hill", "Scott", "Green", "Adams"])
+PRODUCTS_BY_CATEGORY = {
+    "Electronics": (["laptop", "cable", "controller", "protector", "headphones", "monitor", "charger"], 10.0, 1500.0),
+    "Clothing": (["hoodie", "hat", "jacket", "socks", "scarf", "shirt", "gloves"], 8.0, 150.0),
+    "Sports": (["football", "racket", "helmet", "bottle", "mat", "shoes", "ball"], 5.0, 300.0),
+}
+
+# Values written by each error category, per dataset and column. Missing values can hit any column.
+ERROR_VALUES = {
+    "customers": {
+        "outlier": {"CustomerID": [99999, 88888], "Region": ["Outlier"], "JoinDate": ["12/31/2099"]},
+        "misentered": {"CustomerID": ["ABC", "DEF"], "Name": ["123", "???", "", "   "],
+                       "Region": ["123", "!", "None"], "JoinDate": ["notadate", "13-13-2020", "00/00/0000"]},
+    },
+    "products": {
+        "outlier": {"ProductID": [99999, 88888], "Category": ["Outlier"], "UnitPrice": [123456.78, -100.0]},
+        "misentered": {"ProductID": ["A", "B"], "ProductName": ["123", "???", ""],
+                       "Category": ["123", "???", "!!!"], "UnitPrice": ["notanumber", "123.45.67", "0xFF"]},
+    },
+    "sales": {
+        "outlier": {"TransactionID": [99999999999], "SaleDate": ["12/31/2099"], "CustomerID": [99999],
+                    "ProductID": [99999], "StoreID": [999], "CampaignID": [99], "SaleAmount": [99999.99, -100.0]},
+        "misentered": {"TransactionID": ["a", "b"], "SaleDate": ["notadate", "2020/02/30", "abcd"],
+                       "CustomerID": ["x", "y"], "ProductID": ["p", "q"], "StoreID": ["store"],
+                       "CampaignID": ["camp"], "SaleAmount": ["notanumber", "abc", "price"]},
+    },
+}
+
+# Random stream numbers; every (seed, stream, chunk) gets its own independent generator
+_STREAMS = {"customers": 1, "products": 2, "sales": 3, "sales_setup": 4, "errors": 5}
+
+
+def _rng(seed: int, stream: str, chunk: int = 0, dataset: str = "") -> np.random.Generator:
+    """Independent random stream per purpose and chunk, so chunks can be generated in any order."""
+    return np.random.default_rng([seed, _STREAMS[stream], _STREAMS.get(dataset, 0), chunk])
+
+
+def _popularity_cdf(count: int, rng: np.random.Generator) -> np.ndarray:
+    """Cumulative pick probabilities with a long tail: a few customers/products get most sales."""
+    weights = rng.lognormal(mean=0.0, sigma=1.0, size=count)
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def _date_strings(start: str, end: str) -> np.ndarray:
+    """Every day in the range, formatted like the raw files (month/day/year, no zero padding)."""
+    days = pd.date_range(start, end, freq="D")
+    return np.array([f"{day.month}/{day.day}/{day.year}" for day in days], dtype=object)
+
+
+def _sale_date_cdf(start: str, end: str) -> np.ndarray:
+    """Cumulative probability of a sale on each day: rising trend, year-end peak, busier weekends."""
+    days = pd.date_range(start, end, freq="D")
+    trend = np.linspace(1.0, 2.0, len(days))
+    season = np.where(days.month.isin([11, 12]), 1.6, 1.0)
+    weekend = np.where(days.dayofweek >= 5, 1.3, 1.0)
+    cdf = np.cumsum(trend * season * weekend)
+    return cdf / cdf[-1]
+
+
+def _pick(cdf: np.ndarray, size: int, rng: np.random.Generator) -> np.ndarray:
+    """Draw indices from a cumulative distribution (faster than rng.choice(p=...) for large tables)."""
+    return np.minimum(np.searchsorted(cdf, rng.random(size), side="right"), len(cdf) - 1)
+
+
+def inject_errors(df: pd.DataFrame, dataset: str, error_rates: Dict[str, float],
+                  rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Inject errors into a chunk of clean rows.
+
+    Parameters:
+        df (pd.DataFrame): Clean rows. Columns that receive errors become object columns.
+        dataset (str): 'customers', 'products', or 'sales' (selects ERROR_VALUES).
+        error_rates (dict): Share of rows per error category ('missing', 'outlier', 'misentered', 'duplicate').
+        rng (np.random.Generator): Random stream for this chunk.
+
+    Returns:
+        pd.DataFrame: The rows with errors, in shuffled order if duplicates were added.
+    """
+    rows = len(df)
+    categories = {"missing": {column: [None] for column in df.columns}, **ERROR_VALUES[dataset]}
+    changes: Dict[str, np.ndarray] = {}
+    for category, columns_values in categories.items():
+        rate = error_rates.get(category, 0.0)
+        if rate <= 0 or rows == 0:
+            continue
+        hit = np.flatnonzero(rng.random(rows) < rate)
+        columns = list(columns_values)
+        chosen = rng.integers(0, len(columns), size=hit.size)
+        for position, column in enumerate(columns):
+            targets = hit[chosen == position]
+            if targets.size == 0:
+                continue
+            if column not in changes:
+                changes[column] = df[column].to_numpy(dtype=object, copy=True)
+            values = np.array(columns_values[column], dtype=object)
+            changes[column][targets] = values[rng.integers(0, len(values), size=targets.size)]
+    if changes:
+        df = df.assign(**changes)
+
+    duplicate_rate = error_rates.get("duplicate", 0.0)
+    if duplicate_rate > 0 and rows:
+        sources = rng.integers(0, rows, size=int(rng.binomial(rows, duplicate_rate)))
+        if sources.size:
+            # Place each copy right after its original, like a double submission
+            positions = np.concatenate([np.arange(rows), sources])
+            df = df.iloc[positions[np.argsort(positions, kind="stable")]].reset_index(drop=True)
+    return df
+
+
+def customer_chunks(count: int, chunk_size: int, seed: int) -> Iterator[pd.DataFrame]:
+    """Yield clean customer rows in chunks."""
+    join_dates = _date_strings(JOIN_START, JOIN_END)
+    for chunk, start in enumerate(range(0, count, chunk_size)):
+        rng = _rng(seed, "customers", chunk)
+        size = min(chunk_size, count - start)
+        first_names = FIRST_NAMES.astype(object)[rng.integers(0, len(FIRST_NAMES), size)]
+        last_names = LAST_NAMES.astype(object)[rng.integers(0, len(LAST_NAMES), size)]
+        yield pd.DataFrame({
+            "CustomerID": np.arange(FIRST_CUSTOMER_ID + start, FIRST_CUSTOMER_ID + start + size),
+            "Name": first_names + " " + last_names,
+            "Region": REGIONS[_pick(np.cumsum(REGION_WEIGHTS), size, rng)],
+            "JoinDate": join_dates[rng.integers(0, len(join_dates), size)],
+        })
+
+
+def generate_products(count: int, seed: int) -> pd.DataFrame:
+    """Generate the clean products table (small enough to keep in memory for pricing sales)."""
+    rng = _rng(seed, "products")
+    categories = np.array(list(PRODUCTS_BY_CATEGORY))
+    category = categories[rng.integers(0, len(categories), count)]
+    names = np.empty(count, dtype=object)
+    prices = np.empty(count)
+    for name, (nouns, low, high) in PRODUCTS_BY_CATEGORY.items():
+        rows = np.flatnonzero(category == name)
+        numbers = np.arange(rows.size) // len(nouns)
+        base = np.array(nouns, dtype=object)[np.arange(rows.size) % len(nouns)]
+        names[rows] = np.where(numbers == 0, base, base + " " + (numbers + 1).astype(str).astype(object))
+        prices[rows] = np.round(np.exp(rng.uniform(np.log(low), np.log(high), rows.size)), 2)
+    return pd.DataFrame({
+        "ProductID": np.arange(FIRST_PRODUCT_ID, FIRST_PRODUCT_ID + count),
+        "ProductName": names,
+        "Category": category,
+        "UnitPrice": prices,
+    })
+
+
+def sales_chunks(rows: int, customer_count: int, products: pd.DataFrame, chunk_size: int,
+                 seed: int) -> Iterator[pd.DataFrame]:
+    """Yield clean sales rows in chunks, referring to existing customers and products."""
+    setup = _rng(seed, "sales_setup")
+    customer_cdf = _popularity_cdf(customer_count, setup)
+    product_cdf = _popularity_cdf(len(products), setup)
+    date_cdf = _sale_date_cdf(SALES_START, SALES_END)
+    sale_dates = _date_strings(SALES_START, SALES_END)
+    product_ids = products["ProductID"].to_numpy()
+    unit_prices = products["UnitPrice"].to_numpy()
+    for chunk, start in enumerate(range(0, rows, chunk_size)):
+        rng = _rng(seed, "sales", chunk)
+        size = min(chunk_size, rows - start)
+        product = _pick(product_cdf, size, rng)
+        quantity = rng.integers(1, 6, size)
+        discount = np.where(rng.random(size) < 0.2, rng.choice([0.05, 0.1, 0.2], size), 0.0)
+        yield pd.DataFrame({
+            "TransactionID": np.arange(FIRST_TRANSACTION_ID + start, FIRST_TRANSACTION_ID + start + size),
+            "SaleDate": sale_dates[_pick(date_cdf, size, rng)],
+            "CustomerID": FIRST_CUSTOMER_ID + _pick(customer_cdf, size, rng),
+            "ProductID": product_ids[product],
+            "StoreID": STORE_IDS[rng.integers(0, len(STORE_IDS), size)],
+            "CampaignID": CAMPAIGN_IDS[_pick(np.cumsum(CAMPAIGN_WEIGHTS), size, rng)],
+            "SaleAmount": np.round(unit_prices[product] * quantity * (1 - discount), 2),
+        })
+
+
+def write_chunks(chunks: Iterator[pd.DataFrame], path: pathlib.Path, dataset: str,
+                 error_rates: Dict[str, float], seed: int) -> int:
+    """Inject errors into each chunk and append it to a CSV file. Returns the number of rows written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for chunk_number, chunk in enumerate(chunks):
+        chunk = inject_errors(chunk, dataset, error_rates, _rng(seed, "errors", chunk_number, dataset))
+        chunk.to_csv(path, mode="w" if chunk_number == 0 else "a", header=chunk_number == 0, index=False)
+        written += len(chunk)
+    return written
+
+
+def generate_all(sales_rows: int = SALES_ROWS, customer_count: Optional[int] = None,
+                 product_count: int = PRODUCT_COUNT, chunk_size: int = CHUNK_SIZE,
+                 error_rates: Optional[Dict[str, float]] = None, seed: int = SEED,
+                 output_dir: pathlib.Path = SYNTHETIC_DATA_DIR) -> Dict[str, int]:
+    """
+    Generate and write customers_data.csv, products_data.csv, and sales_data.csv.
+
+    Parameters:
+        sales_rows (int, optional): Number of clean sales rows (duplicates come on top). Default is SALES_ROWS.
+        customer_count (int, optional): Number of customers. Default is sales_rows / SALES_PER_CUSTOMER.
+        product_count (int, optional): Number of products. Default is PRODUCT_COUNT.
+        chunk_size (int, optional): Rows generated and written at a time. Default is CHUNK_SIZE.
+        error_rates (dict, optional): Share of rows per error category. Default is ERROR_RATES.
+        seed (int, optional): Random seed. Default is SEED.
+        output_dir (pathlib.Path, optional): Output folder. Default is data/synthetic.
+
+    Returns:
+        dict: Dataset name -> number of rows written.
+    """
+    customer_count = customer_count or max(1, sales_rows // SALES_PER_CUSTOMER)
+    error_rates = ERROR_RATES if error_rates is None else error_rates
+    products = generate_products(product_count, seed)
+    datasets = {
+        "customers": customer_chunks(customer_count, chunk_size, seed),
+        "products": (products.iloc[start:start + chunk_size] for start in range(0, product_count, chunk_size)),
+        "sales": sales_chunks(sales_rows, customer_count, products, chunk_size, seed),
+    }
+    written = {}
+    for dataset, chunks in datasets.items():
+        path = output_dir / f"{dataset}_data.csv"
+        written[dataset] = write_chunks(chunks, path, dataset, error_rates, seed)
+        logger.info(f"Wrote {written[dataset]} {dataset} rows to {path}")
+    return written
+
+
+def _parse_error_rate(text: str) -> tuple:
+    category, _, rate = text.partition("=")
+    if category not in ERROR_RATES or not rate:
+        raise argparse.ArgumentTypeError(f"Expected CATEGORY=RATE with CATEGORY in {sorted(ERROR_RATES)}")
+    return category, float(rate)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic customers, products, and sales data.")
+    parser.add_argument("--sales-rows", type=int, default=SALES_ROWS)
+    parser.add_argument("--customers", type=int, default=None,
+                        help=f"default: sales rows / {SALES_PER_CUSTOMER}")
+    parser.add_argument("--products", type=int, default=PRODUCT_COUNT)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--error-rate", type=_parse_error_rate, action="append", default=[],
+                        metavar="CATEGORY=RATE", help=f"override an error rate (defaults: {ERROR_RATES})")
+    parser.add_argument("--output-dir", type=pathlib.Path, default=SYNTHETIC_DATA_DIR)
+    args = parser.parse_args()
+
+    error_rates = {**ERROR_RATES, **dict(args.error_rate)}
+    logger.info(f"Generating {args.sales_rows} sales rows with error rates {error_rates} (seed {args.seed})")
+    generate_all(args.sales_rows, args.customers, args.products, args.chunk_size, error_rates, args.seed,
+                 args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
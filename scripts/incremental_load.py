@@ -0,0 +1,267 @@
+"""
+scripts/incremental_load.py
+
+Do not run this script directly.
+Instead, from this module (scripts.incremental_load)
+import create_state_tables, sync_table, and read_watermarks
+(or diff_table and apply_diff, to act on the changed rows in between).
+
+Incremental loading of the warehouse tables (see scripts/etl_to_dw.py). Instead of
+deleting every row and loading the whole history again, sync_table() applies only
+the difference between a prepared table and what the warehouse holds:
+
+- Each row gets a 64-bit content hash of its values (hash_rows() in scripts/row_hashing.py).
+- The hash of every loaded row is kept in the warehouse, in HASH_TABLE, by table and key.
+- Comparing the new hashes with the stored ones, by key, classifies each row as new,
+  changed, unchanged, or deleted (stored key no longer present). Only the new and
+  changed rows are written, with INSERT ... ON CONFLICT DO UPDATE, and only the deleted
+  keys are deleted (scripts/bulk_loader.py). Unchanged rows are not touched.
+- After each load, WATERMARK_TABLE records per table when it was loaded, how (incremental
+  or full), its highest key and row count, the rows inserted, updated, and deleted, and a
+  digest of all its row hashes (content_hash).
+- When a table's digest and row count match its watermark, nothing changed since the last
+  load, and the stored hashes are not read at all.
+
+What the watermark saves is the per-row work in the warehouse, not the read of the input:
+the whole prepared table is still read and hashed on every run (its digest is what the
+watermark is compared with), so reads scale with the full history. Skipping a run whose
+prepared files did not change at all is the stage cache's job (see scripts/stage_cache.py).
+
+A table is reloaded in full (delete and insert every row) when asked to, or when its
+stored hashes cannot be trusted: none are stored yet (the first incremental run after
+full loads by older code) or their count differs from the table's row count (the table
+was changed outside the ETL). A full load stores the hashes, so the next run is incremental.
+
+sync_table() is diff_table(), which classifies the rows without writing anything, then
+apply_diff(). In between, the rows about to change are still in the table as they were,
+which the aggregate tables use (see scripts/aggregates.py).
+
+The caller owns the transaction (see load_pragmas() in scripts/bulk_loader.py), so the
+rows, their hashes, and the watermark are committed together or not at all.
+
+Example:
+
+    with load_pragmas(conn):
+        create_state_tables(conn)
+        report = sync_table(conn, "sales", sales_df, key="transaction_id")
+    logger.info(f"{report['inserted']} inserted, {report['updated']} updated, {report['deleted']} deleted")
+"""
+
+import datetime
+import hashlib
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from scripts.bulk_loader import bulk_delete, bulk_insert
+from scripts.row_hashing import hash_rows
+
+HASH_TABLE = "etl_row_hashes"
+WATERMARK_TABLE = "etl_watermarks"
+
+INCREMENTAL = "incremental"
+FULL = "full"
+
+
+def create_state_tables(conn: sqlite3.Connection) -> None:
+    """Create the row hash and watermark tables if they do not exist."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {HASH_TABLE} (
+            table_name TEXT NOT NULL,
+            row_key INTEGER NOT NULL,
+            row_hash INTEGER NOT NULL,
+            PRIMARY KEY (table_name, row_key)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            loaded_at TEXT,
+            mode TEXT,
+            max_key INTEGER,
+            row_count INTEGER,
+            inserted INTEGER,
+            updated INTEGER,
+            deleted INTEGER,
+            content_hash TEXT
+        )
+    """)
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({WATERMARK_TABLE})")]
+    if "content_hash" not in columns:  # created by older code
+        conn.execute(f"ALTER TABLE {WATERMARK_TABLE} ADD COLUMN content_hash TEXT")
+
+
+def stored_hashes(conn: sqlite3.Connection, table: str) -> pd.Series:
+    """The stored row hashes of a table, indexed by key (int64)."""
+    rows = conn.execute(f"SELECT row_key, row_hash FROM {HASH_TABLE} WHERE table_name = ?", (table,)).fetchall()
+    keys, hashes = zip(*rows) if rows else ((), ())
+    return pd.Series(np.array(hashes, dtype=np.int64), index=pd.Index(np.array(keys, dtype=np.int64)))
+
+
+def read_watermarks(conn: sqlite3.Connection) -> pd.DataFrame:
+    """The watermark of every loaded table."""
+    return pd.read_sql(f"SELECT * FROM {WATERMARK_TABLE} ORDER BY table_name", conn)
+
+
+def _hashes(df: pd.DataFrame, key: str) -> pd.Series:
+    """Each row's content hash as int64 (SQLite integers are signed), indexed by key."""
+    if df[key].isna().any() or df[key].duplicated().any():
+        raise ValueError(f"Key column {key} must be unique and not missing")
+    return pd.Series(hash_rows(df).view(np.int64), index=pd.Index(df[key].to_numpy(dtype=np.int64)))
+
+
+def _digest(hashes: pd.Series) -> str:
+    """A digest of every key and row hash of a table, independent of row order."""
+    order = np.argsort(hashes.index.to_numpy(), kind="stable")
+    digest = hashlib.sha256(hashes.index.to_numpy()[order].tobytes())
+    digest.update(hashes.to_numpy()[order].tobytes())
+    return digest.hexdigest()
+
+
+def _unchanged_since_watermark(conn: sqlite3.Connection, table: str, hashes: pd.Series, existing: int) -> bool:
+    """Whether the table holds exactly these rows as of its last load, going by its watermark."""
+    row = conn.execute(f"SELECT row_count, content_hash FROM {WATERMARK_TABLE} WHERE table_name = ?",
+                       (table,)).fetchone()
+    return row is not None and row[0] == existing == len(hashes) and row[1] == _digest(hashes)
+
+
+def _save_hashes(conn: sqlite3.Connection, table: str, hashes: pd.Series) -> None:
+    frame = pd.DataFrame({"table_name": table, "row_key": hashes.index, "row_hash": hashes.to_numpy()})
+    bulk_insert(conn, HASH_TABLE, frame, rebuild_indexes=False, upsert_key=["table_name", "row_key"])
+
+
+def _save_watermark(conn: sqlite3.Connection, table: str, mode: str, hashes: pd.Series,
+                    counts: Dict[str, int]) -> None:
+    frame = pd.DataFrame([{
+        "table_name": table,
+        "loaded_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "mode": mode,
+        "max_key": int(hashes.index.max()) if len(hashes) else None,
+        "row_count": len(hashes),
+        **counts,
+        "content_hash": _digest(hashes),
+    }])
+    bulk_insert(conn, WATERMARK_TABLE, frame, rebuild_indexes=False, upsert_key="table_name")
+
+
+@dataclass
+class TableDiff:
+    """The rows of a DataFrame to write to a table, and the table's keys to delete."""
+    table: str
+    key: str
+    full: bool
+    existing: int  # rows in the table before the load
+    hashes: pd.Series  # each DataFrame row's hash, indexed by key
+    write: np.ndarray  # boolean mask of the DataFrame rows to write (new or changed)
+    updated: np.ndarray  # boolean mask of the DataFrame rows that changed
+    deleted_keys: np.ndarray  # keys in the table that are not in the DataFrame
+
+    @property
+    def mode(self) -> str:
+        return FULL if self.full else INCREMENTAL
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        if self.full:
+            return {"inserted": len(self.hashes), "updated": 0, "deleted": self.existing}
+        updated = int(self.updated.sum())
+        return {"inserted": int(self.write.sum()) - updated, "updated": updated, "deleted": len(self.deleted_keys)}
+
+    @property
+    def stale_keys(self) -> np.ndarray:
+        """Keys whose rows in the table are about to be replaced or deleted."""
+        return np.concatenate([self.hashes.index[self.updated].to_numpy(), self.deleted_keys])
+
+    @property
+    def fresh_keys(self) -> np.ndarray:
+        """Keys of the rows about to be inserted or replaced."""
+        return self.hashes.index[self.write].to_numpy()
+
+
+def diff_table(conn: sqlite3.Connection, table: str, df: pd.DataFrame, key: str, full: bool = False) -> TableDiff:
+    """
+    Compare a DataFrame with the stored row hashes of a table, without writing anything.
+
+    The DataFrame is always hashed in full. The stored hashes are read only when its
+    digest or row count differ from the table's watermark, that is, when something changed.
+
+    Parameters:
+        conn (sqlite3.Connection): The warehouse connection, with the state tables created.
+        table (str): The table; its primary key is `key`.
+        df (pd.DataFrame): Every row the table should hold, with the table's column names.
+        key (str): The integer primary key column.
+        full (bool, optional): Plan a full reload. Default is False.
+
+    Returns:
+        TableDiff: What apply_diff() will write and delete.
+    """
+    hashes = _hashes(df, key)
+    existing = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+    if not full and _unchanged_since_watermark(conn, table, hashes, existing):
+        nothing = np.zeros(len(df), dtype=bool)
+        return TableDiff(table, key, False, existing, hashes, nothing, nothing, np.array([], dtype=np.int64))
+
+    stored = stored_hashes(conn, table)
+    if len(stored) != existing:
+        full = True  # no hashes yet, or the table changed outside the ETL
+
+    if full:
+        return TableDiff(table, key, True, existing, hashes, np.ones(len(df), dtype=bool),
+                         np.zeros(len(df), dtype=bool), stored.index.to_numpy())
+    known = hashes.index.isin(stored.index)
+    changed = np.zeros(len(hashes), dtype=bool)
+    changed[known] = hashes.to_numpy()[known] != stored.reindex(hashes.index[known]).to_numpy()
+    deleted = stored.index[~stored.index.isin(hashes.index)].to_numpy()
+    return TableDiff(table, key, False, existing, hashes, ~known | changed, changed, deleted)
+
+
+def apply_diff(conn: sqlite3.Connection, df: pd.DataFrame, diff: TableDiff) -> Dict[str, Any]:
+    """
+    Write the rows and delete the keys of a diff from diff_table(), with their hashes and the watermark.
+
+    Returns:
+        dict: table, mode, rows (in the DataFrame), inserted, updated, deleted, unchanged, seconds.
+    """
+    start = time.perf_counter()
+    table, key = diff.table, diff.key
+    if diff.full:
+        conn.execute(f'DELETE FROM "{table}"')
+        conn.execute(f"DELETE FROM {HASH_TABLE} WHERE table_name = ?", (table,))
+        bulk_insert(conn, table, df)
+        _save_hashes(conn, table, diff.hashes)
+    else:
+        bulk_delete(conn, table, key, pd.Series(diff.deleted_keys, name=key))
+        bulk_delete(conn, HASH_TABLE, ["table_name", "row_key"],
+                    pd.DataFrame({"table_name": table, "row_key": diff.deleted_keys}))
+        bulk_insert(conn, table, df[diff.write], upsert_key=key)
+        _save_hashes(conn, table, diff.hashes[diff.write])
+
+    counts = diff.counts
+    _save_watermark(conn, table, diff.mode, diff.hashes, counts)
+    written = counts["inserted"] + counts["updated"]
+    return {"table": table, "mode": diff.mode, "rows": len(df), **counts, "unchanged": len(df) - written,
+            "seconds": round(time.perf_counter() - start, 6)}
+
+
+def sync_table(conn: sqlite3.Connection, table: str, df: pd.DataFrame, key: str, full: bool = False) -> Dict[str, Any]:
+    """
+    Make a warehouse table hold exactly the rows of a DataFrame, writing only the rows that differ.
+
+    Parameters:
+        conn (sqlite3.Connection): The warehouse connection, with the state tables created.
+        table (str): The table; its primary key is `key`.
+        df (pd.DataFrame): Every row the table should hold, with the table's column names.
+        key (str): The integer primary key column.
+        full (bool, optional): Delete every row and insert them all again. Default is False.
+
+    Returns:
+        dict: table, mode, rows (in the DataFrame), inserted, updated, deleted, unchanged, seconds.
+    """
+    start = time.perf_counter()
+    report = apply_diff(conn, df, diff_table(conn, table, df, key, full=full))
+    report["seconds"] = round(time.perf_counter() - start, 6)
+    return report
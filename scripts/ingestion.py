@@ -0,0 +1,207 @@
+"""
+scripts/ingestion.py
+
+Do not run this script directly.
+Instead, from this module (scripts.ingestion)
+import the DatasetReader class.
+
+Reads the source CSV files of each dataset with declared column types, instead of
+letting pandas infer them:
+
+- DATASET_COLUMNS declares, for customers, products, and sales, the columns the
+  pipeline uses and their types in the raw files. Only those columns are read.
+  Dates stay text here; they are parsed by DateParser, which detects their format.
+- Dirty files (read with text=True) hold values that do not fit those types, so every
+  column is read as text and the cleaning rules convert them.
+- Files of other datasets are read with all their columns, inferred as usual
+  (or as text with text=True).
+
+The parser engine is ENGINE: pyarrow's multi-threaded CSV reader when pyarrow is
+installed, otherwise pandas' C reader. Both give the same DataFrame: columns in the
+declared order with the declared types.
+
+The C reader uses one core, so with it, on machines with several cores, files of
+PARALLEL_SIZE bytes or more are split into byte ranges that a process pool parses at once (see scripts/csv_ranges.py).
+This needs declared types (or text=True), so every range gets the same column types and
+the result equals a single read. iter_chunks() yields those typed ranges one at a time
+instead, for stages that clean a file chunk by chunk (scripts/clean_all_data.py); columns
+without a declared type get the types of the first range.
+
+Each read stores its throughput in `last_report`: rows, bytes, seconds,
+rows_per_sec, mb_per_sec, and the number of byte ranges parsed in parallel.
+
+Example:
+
+    reader = DatasetReader()
+    df = reader.read(RAW_DATA_DIR / "sales_data.csv", "sales")
+    logger.info(f"Read sales: {reader.last_report}")
+"""
+
+import contextlib
+import os
+import pathlib
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from scripts.csv_ranges import RANGE_SIZE, iter_ranges, split_ranges
+from scripts.stage_metrics import count_rows_in
+from scripts.storage import HAS_PYARROW
+
+# Columns used from each dataset and their types in the raw files
+DATASET_COLUMNS: Dict[str, Dict[str, str]] = {
+    "customers": {"CustomerID": "int64", "Name": "str", "Region": "str", "JoinDate": "str"},
+    "products": {"ProductID": "int64", "ProductName": "str", "Category": "str", "UnitPrice": "float64"},
+    "sales": {"TransactionID": "int64", "SaleDate": "str", "CustomerID": "int64", "ProductID": "int64",
+              "StoreID": "int64", "CampaignID": "int64", "SaleAmount": "float64"},
+}
+
+ENGINES = ("pyarrow", "c", "python")
+ENGINE = "pyarrow" if HAS_PYARROW else "c"
+
+# Files at least this large are parsed as byte ranges in parallel (except by the pyarrow engine)
+PARALLEL_SIZE = 256 * 1024 * 1024
+
+
+def dataset_for_file(path: Union[str, pathlib.Path]) -> Optional[str]:
+    """The dataset a file holds, from names like customers_data.csv or dirty_customers_data.csv."""
+    stem = pathlib.Path(path).stem
+    for name in DATASET_COLUMNS:
+        if stem == f"{name}_data" or stem.endswith(f"_{name}_data"):
+            return name
+    return None
+
+
+def declared_types(path: Union[str, pathlib.Path], dataset: Optional[str] = None) -> Dict[str, str]:
+    """The declared column types of a file's dataset (default: from the file name), or {} for other files."""
+    return dict(DATASET_COLUMNS.get(dataset or dataset_for_file(path), {}))
+
+
+class DatasetReader:
+    def __init__(self, engine: Optional[str] = None, workers: Optional[int] = None):
+        """
+        Create a reader.
+
+        Parameters:
+            engine (str, optional): 'pyarrow', 'c', or 'python'. Default is ENGINE.
+            workers (int, optional): Processes parsing the byte ranges of large files. Default is the CPU count.
+        """
+        self.engine = engine or ENGINE
+        self.workers = workers
+        if self.engine not in ENGINES:
+            raise ValueError(f"Unknown CSV engine: {self.engine}. Choose from {ENGINES}.")
+        if self.engine == "pyarrow" and not HAS_PYARROW:
+            raise ImportError("The pyarrow CSV engine needs pyarrow; install it or use the 'c' engine")
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    def read(self, path: Union[str, pathlib.Path], dataset: Optional[str] = None,
+             columns: Optional[List[str]] = None, text: bool = False) -> pd.DataFrame:
+        """
+        Read a dataset's CSV file with its declared columns and types.
+
+        Parameters:
+            path (str or Path): The CSV file.
+            dataset (str, optional): 'customers', 'products', or 'sales'. Default: from the file name.
+            columns (list, optional): Only read these columns. Default: the dataset's declared columns.
+            text (bool, optional): Read every column as text (for dirty files). Default is False.
+
+        Returns:
+            pd.DataFrame: The data.
+        """
+        path = pathlib.Path(path)
+        usecols, dtypes = self._read_options(path, dataset, columns, text)
+        size = path.stat().st_size
+        ranges = 0
+
+        start = time.perf_counter()
+        workers = self.workers or os.cpu_count() or 1
+        if self.engine != "pyarrow" and size >= PARALLEL_SIZE and dtypes is not None and workers > 1:
+            chunks = list(self._iter_ranges(path, usecols, dtypes, split_ranges(path, RANGE_SIZE)))
+            ranges = len(chunks)
+            df = pd.concat(chunks, ignore_index=True)
+        else:
+            df = self._typed(pd.read_csv(path, engine=self.engine, usecols=usecols, dtype=dtypes), usecols, dtypes)
+        seconds = time.perf_counter() - start
+        count_rows_in(len(df))
+
+        self.last_report = {
+            'file': path.name,
+            'engine': self.engine,
+            'rows': len(df),
+            'columns': df.shape[1],
+            'bytes': size,
+            'seconds': round(seconds, 6),
+            'rows_per_sec': round(len(df) / seconds) if seconds > 0 else None,
+            'mb_per_sec': round(size / 1e6 / seconds, 3) if seconds > 0 else None,
+            'ranges': ranges,
+        }
+        return df
+
+    def iter_chunks(self, path: Union[str, pathlib.Path], dataset: Optional[str] = None,
+                    columns: Optional[List[str]] = None, text: bool = False,
+                    range_size: int = RANGE_SIZE, executor: Optional[Executor] = None) -> Iterator[pd.DataFrame]:
+        """
+        Parse a dataset's CSV file as byte ranges in a process pool, and yield them in file order,
+        each with the declared columns and types (see read). Columns without a declared type
+        (every column, in files of other datasets) get the types of the first chunk, so all
+        chunks have the same types; a later value that does not fit them raises a ValueError.
+        After the last chunk, `last_report` holds the file, engine, rows, columns, bytes, and ranges.
+
+        Parameters:
+            range_size (int, optional): Approximate bytes per chunk. Default is RANGE_SIZE.
+            executor (Executor, optional): Parse the ranges in this pool. Default: a new pool of `workers` processes.
+        """
+        path = pathlib.Path(path)
+        usecols, dtypes = self._read_options(path, dataset, columns, text)
+        ranges = split_ranges(path, range_size)
+        rows = width = 0
+        for chunk in self._iter_ranges(path, usecols, dtypes, ranges, executor):
+            count_rows_in(len(chunk))
+            rows, width = rows + len(chunk), chunk.shape[1]
+            yield chunk
+        self.last_report = {
+            'file': path.name,
+            'engine': self.engine,
+            'rows': rows,
+            'columns': width,
+            'bytes': path.stat().st_size,
+            'ranges': len(ranges),
+        }
+
+    @staticmethod
+    def _read_options(path: pathlib.Path, dataset: Optional[str], columns: Optional[List[str]],
+                      text: bool) -> Tuple[Optional[List[str]], Any]:
+        """The columns to read and their types."""
+        declared = DATASET_COLUMNS.get(dataset or dataset_for_file(path))
+        usecols = list(columns) if columns is not None else (list(declared) if declared else None)
+        if text:
+            dtypes: Any = str
+        elif declared:
+            dtypes = {column: declared[column] for column in (usecols or declared) if column in declared}
+        else:
+            dtypes = None
+        return usecols, dtypes
+
+    @staticmethod
+    def _typed(df: pd.DataFrame, usecols: Optional[List[str]], dtypes: Any) -> pd.DataFrame:
+        if usecols is not None:
+            df = df[usecols]  # engines differ in the column order they return
+        if isinstance(dtypes, dict):
+            df = df.astype(dtypes)
+        return df
+
+    def _iter_ranges(self, path: pathlib.Path, usecols: Optional[List[str]], dtypes: Any,
+                     ranges: List[Tuple[int, int]], executor: Optional[Executor] = None) -> Iterator[pd.DataFrame]:
+        """The parsed ranges in file order. The first range is parsed first, and the others with its types."""
+        engine = "c" if self.engine == "pyarrow" else self.engine  # ranges are parsed one per process
+        with contextlib.ExitStack() as stack:
+            if executor is None:
+                executor = stack.enter_context(ProcessPoolExecutor(max_workers=self.workers))
+            for part in (ranges[:1], ranges[1:]):
+                for chunk in iter_ranges(path, part, executor, engine=engine, usecols=usecols, dtype=dtypes):
+                    chunk = self._typed(chunk, usecols, dtypes)
+                    if dtypes is not str:
+                        dtypes = chunk.dtypes.to_dict()  # types of the first range, declared or inferred
+                    yield chunk
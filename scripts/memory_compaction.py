@@ -0,0 +1,105 @@
+"""
+scripts/memory_compaction.py
+
+Do not run this script directly.
+Instead, use DataScrubber.compact_memory(), or call compact_dataframe() from this module.
+
+Shrinks a DataFrame's memory footprint without changing any of its values:
+
+- Integer columns are downcast to the smallest integer type that holds them, but
+  never below MIN_INT_DTYPE. pandas arithmetic and DataFrame.eval rules keep the
+  column's type and wrap around silently on overflow (int8 101 * 2 is -54), so
+  the compact types must leave room for the results of later steps.
+- Float columns become float32 when that is lossless. They stay floats: with
+  nullable_ints=True, the ones that only hold whole numbers (IDs read as float64,
+  for example) become pandas' nullable Int types instead, also with missing values.
+- Text columns with few distinct values (Region, Category, PaymentType, ...)
+  become categoricals.
+
+compact_dataframe returns the compacted frame together with a report of the
+memory used before and after and the dtype change of every converted column.
+"""
+
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_RATIO = 0.5
+
+# The smallest integer type a column is downcast to
+MIN_INT_DTYPE = np.dtype("int32")
+
+
+def _compact_integers(series: pd.Series) -> pd.Series:
+    compact = pd.to_numeric(series, downcast="integer")
+    if compact.dtype.itemsize < MIN_INT_DTYPE.itemsize:
+        return series.astype(MIN_INT_DTYPE)
+    return compact
+
+
+def _compact_floats(series: pd.Series, nullable_ints: bool) -> pd.Series:
+    values = series.to_numpy(dtype="float64")
+    present = ~np.isnan(values)
+    finite = values[present]
+    whole = bool(np.isfinite(finite).all()) and bool((finite == np.round(finite)).all())
+    in_range = finite.size == 0 or (finite.min() >= np.iinfo(np.int64).min and finite.max() <= np.iinfo(np.int64).max)
+    if whole and in_range and nullable_ints and present.any():
+        compact = _compact_integers(series.dropna().astype("int64"))
+        return series.astype(compact.dtype.name.capitalize())
+    as_float32 = values.astype("float32")
+    if np.array_equal(as_float32.astype("float64"), values, equal_nan=True):
+        return series.astype("float32")
+    return series
+
+
+def _compact_text(series: pd.Series, category_ratio: float) -> pd.Series:
+    if len(series) == 0:
+        return series
+    distinct = series.nunique(dropna=True)
+    if distinct <= category_ratio * len(series):
+        return series.astype("category")
+    return series
+
+
+def compact_dataframe(df: pd.DataFrame, category_ratio: float = CATEGORY_RATIO,
+                      nullable_ints: bool = False) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Downcast numeric columns and convert low-cardinality text columns to categoricals.
+
+    Parameters:
+        df (pd.DataFrame): The data to compact. It is not modified.
+        category_ratio (float, optional): Maximum distinct/rows ratio for a text column
+            to become a categorical. Default is CATEGORY_RATIO.
+        nullable_ints (bool, optional): Turn whole-number float columns, with or
+            without missing values, into nullable integers. Default is False.
+
+    Returns:
+        tuple: (compacted DataFrame, report), where report holds 'bytes_before',
+               'bytes_after', and 'columns' (column -> "old dtype -> new dtype").
+    """
+    bytes_before = int(df.memory_usage(index=True, deep=True).sum())
+    compacted = {}
+    for column, dtype in df.dtypes.items():
+        series = df[column]
+        if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_extension_array_dtype(dtype):
+            new_series = _compact_integers(series)
+        elif pd.api.types.is_float_dtype(dtype) and not pd.api.types.is_extension_array_dtype(dtype):
+            new_series = _compact_floats(series, nullable_ints)
+        elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            new_series = _compact_text(series, category_ratio)
+        else:
+            continue
+        if new_series.dtype != dtype:
+            compacted[column] = new_series
+
+    result = df.assign(**compacted) if compacted else df
+    report = {
+        'bytes_before': bytes_before,
+        'bytes_after': int(result.memory_usage(index=True, deep=True).sum()) if compacted else bytes_before,
+        'columns': {column: f"{df[column].dtype} -> {series.dtype}" for column, series in compacted.items()},
+    }
+    return result, report
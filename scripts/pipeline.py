@@ -0,0 +1,136 @@
+"""
+Module: Pipeline
+File: scripts/pipeline.py
+
+Runs the whole pipeline, or the stages named on the command line, in one process:
+
+    python -m scripts.pipeline                          # every stage
+    python -m scripts.pipeline prep_m3 load_dw          # only these stages
+    python -m scripts.pipeline --list                   # the stage names, in run order
+    python -m scripts.pipeline --force                  # ignore the stage cache
+
+The stages, in dependency order (see scripts/pipeline_runner.py):
+- dirty_data: create_dirty_data.py
+- prepare_<dataset>: the cleaning of each dataset with a rule spec (polished_data.py)
+- record_report: report_record_differences.py
+- prep_m3: data_prep_m3.py
+- load_dw: etl_to_dw.py
+- bi_analysis: bi_analysis.py
+- schema_dimensions, schema_fact: schema_dimension_table.py and schema_fact_table.py
+
+Instead of one interpreter per script, pandas and the project modules are imported
+once, and tables are shared in memory: a prepared table written by one stage is
+handed to the stages that read it without parsing its file again (see
+shared_tables() in scripts/storage.py). The files are still written.
+
+Selected stages run without the stages they depend on, reading their files from
+an earlier run. As in the individual scripts, a stage whose inputs, code, and
+settings are unchanged since its last run is skipped (see scripts/stage_cache.py).
+
+At the end, a table gives each stage's status, wall time, rows in and out, rows per
+second, and peak RSS. The exit code is 1 if a stage failed.
+"""
+
+import argparse
+import runpy
+import sys
+import pathlib
+from typing import List, Optional, Sequence
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from utils.utils_logger import logger  # noqa: E402
+from scripts import bi_analysis, data_prep_m3, etl_to_dw, schema_dimension_table  # noqa: E402
+from scripts.data_preparation import polished_data, report_record_differences  # noqa: E402
+from scripts.data_preparation.cleaning_rules import available_datasets, load_rule_set  # noqa: E402
+from scripts.pipeline_runner import FAILED, Stage, format_report, run_pipeline  # noqa: E402
+from scripts.stage_cache import LIBRARY_CODE, StageCache  # noqa: E402
+from scripts.storage import shared_tables  # noqa: E402
+
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+DATA_DIR = PROJECT_ROOT / "data"
+RAW_FILES = [data_prep_m3.RAW_DATA_DIR / name for name in data_prep_m3.RAW_FILES]
+PREPARED_FILES = data_prep_m3.PREPARED_TABLE_FILES  # with the column types (and parquet) files of each table
+
+
+def run_script(module: str) -> None:
+    """Run a script that does its work when it is run (not in a main function), in this process."""
+    try:
+        runpy.run_module(module, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise RuntimeError(f"{module} exited with code {e.code}") from e
+
+
+def load_warehouse() -> None:
+    """Load the prepared tables into the data warehouse (etl_to_dw.py)."""
+    if not etl_to_dw.load_data_to_dw():
+        raise RuntimeError(f"Loading {etl_to_dw.DB_PATH} failed; see the log")
+
+
+def build_stages() -> List[Stage]:
+    """Every stage of the pipeline, with the files it reads and writes."""
+    rule_sets = [load_rule_set(dataset) for dataset in available_datasets()]
+    return [
+        Stage("dirty_data", run_script, args=("scripts.create_dirty_data",),
+              inputs=RAW_FILES, outputs=[rule_set.input_file for rule_set in rule_sets],
+              code=[SCRIPTS_DIR / "create_dirty_data.py"]),
+        *polished_data.build_stages(),
+        Stage("record_report", report_record_differences.main,
+              inputs=[rule_set.summary_file for rule_set in rule_sets],
+              outputs=[report_record_differences.OUTPUT_FILE]),
+        Stage("prep_m3", data_prep_m3.prepare_all_data, inputs=RAW_FILES, outputs=PREPARED_FILES,
+              code=LIBRARY_CODE, params={"COMPACT_MEMORY": data_prep_m3.COMPACT_MEMORY}),
+        Stage("load_dw", load_warehouse, inputs=PREPARED_FILES, outputs=[etl_to_dw.DB_PATH], code=LIBRARY_CODE),
+        Stage("bi_analysis", bi_analysis.main, inputs=RAW_FILES,
+              outputs=[bi_analysis.processed_data_folder / "P1_BI_Python.txt"]),
+        Stage("schema_dimensions", schema_dimension_table.main,
+              inputs=[rule_set.output_file for rule_set in rule_sets], outputs=[schema_dimension_table.SCHEMA_FILE],
+              code=LIBRARY_CODE),
+        Stage("schema_fact", run_script, args=("scripts.schema_fact_table",),
+              inputs=[data_prep_m3.PREPARED_DATA_DIR / "sales_data_prepared.csv"],
+              outputs=[DATA_DIR / "processed" / "schema_fact_tables.txt"],
+              code=[SCRIPTS_DIR / "schema_fact_table.py", *LIBRARY_CODE]),
+    ]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    stages = build_stages()
+    names = [stage.name for stage in stages]
+    parser = argparse.ArgumentParser(prog="python -m scripts.pipeline",
+                                     description="Run the pipeline, or selected stages, in one process.")
+    parser.add_argument("stages", nargs="*", metavar="STAGE", help=f"stages to run (default: all): {names}")
+    parser.add_argument("--force", action="store_true", help="run the stages even if they are unchanged")
+    parser.add_argument("--list", action="store_true", help="list the stages and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(names))
+        return 0
+    unknown = sorted(set(args.stages) - set(names))
+    if unknown:
+        parser.error(f"unknown stages: {unknown}; choose from {names}")
+    if args.stages:
+        stages = [stage for stage in stages if stage.name in args.stages]
+
+    logger.info(f"Starting the pipeline: {[stage.name for stage in stages]}")
+    cache = StageCache(force=args.force)
+    with shared_tables():
+        results = run_pipeline(stages, parallel=False, cache=cache)
+    report = format_report(results)
+    logger.info(f"Pipeline stages:\n{report}")
+    logger.info(f"Stage cache: {cache.summary()}")
+    print(report)
+
+    failed = [result.name for result in results.values() if result.status == FAILED]
+    if failed:
+        logger.error(f"Pipeline stages failed: {failed}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
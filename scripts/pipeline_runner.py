@@ -0,0 +1,261 @@
+"""
+scripts/pipeline_runner.py
+
+Do not run this script directly.
+Instead, from this module (scripts.pipeline_runner)
+import Stage and run_pipeline.
+
+Runs pipeline stages as a DAG:
+
+- Each Stage names a function to call and the files it reads (inputs) and writes
+  (outputs). A stage depends on every stage that writes one of its inputs, and on
+  any stage listed in `after`.
+- Stages whose dependencies have finished run concurrently in a process pool, so
+  independent stages (e.g. the customers, products, and sales prep) overlap and the
+  interpreter and pandas are only imported once per worker, not once per stage.
+- A stage fails if its function raises, if an input is missing before it starts,
+  or if an output is missing after it finishes. Every stage that depends on a
+  failed stage, directly or not, is skipped; independent stages still run.
+- Every stage gets a StageResult with its status, run time, rows in and out, peak
+  RSS (see scripts/stage_metrics.py), and error traceback. format_report() renders
+  them as a table, with each stage's throughput in rows per second.
+- With a StageCache (see scripts/stage_cache.py), a stage whose inputs, code, and
+  arguments are unchanged since its last successful run is not run again; its
+  result is marked as cached and its outputs from that run are used.
+
+Stage functions must be importable module-level functions (they are pickled to the workers).
+
+Example:
+
+    stages = [
+        Stage("prepare_sales", prepare_by_name, args=("sales",), inputs=[dirty_sales], outputs=[sales]),
+        Stage("load_dw", load_data_to_dw, inputs=[sales, customers]),
+    ]
+    results = run_pipeline(stages, cache=StageCache())
+"""
+
+import pathlib
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from scripts.stage_cache import StageCache, code_files
+from scripts.stage_metrics import measure
+
+OK = "ok"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+@dataclass
+class Stage:
+    """One step of a pipeline: a function call plus the files it reads and writes."""
+
+    name: str
+    func: Callable[..., Any]
+    args: Tuple[Any, ...] = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    inputs: Sequence[pathlib.Path] = ()
+    outputs: Sequence[pathlib.Path] = ()
+    after: Sequence[str] = ()
+    code: Sequence[pathlib.Path] = ()  # source files besides func's module whose changes rerun the stage
+    params: Any = None  # settings besides args and kwargs that change the outputs
+
+
+@dataclass
+class StageResult:
+    """What happened to one stage."""
+
+    name: str
+    status: str
+    seconds: float = 0.0
+    value: Any = None
+    error: Optional[str] = None
+    cached: bool = False
+    rows_in: int = 0
+    rows_out: int = 0
+    peak_rss_mb: Optional[float] = None
+
+    @property
+    def rows_per_sec(self) -> Optional[float]:
+        """Rows processed per second: rows in, or rows out for stages that read none."""
+        rows = self.rows_in or self.rows_out
+        return rows / self.seconds if rows and self.seconds > 0 else None
+
+
+class PipelineError(RuntimeError):
+    """Raised by run_pipeline(raise_on_failure=True) when a stage failed; `results` holds every StageResult."""
+
+    def __init__(self, results: Dict[str, StageResult]):
+        self.results = results
+        failed = [result.name for result in results.values() if result.status == FAILED]
+        super().__init__(f"Pipeline stages failed: {failed}")
+
+
+def stage_dependencies(stages: Sequence[Stage]) -> Dict[str, Set[str]]:
+    """
+    Work out which stages each stage depends on, from its inputs and its `after` list.
+
+    Raises:
+        ValueError: On duplicate stage names, unknown `after` names, two stages writing
+                    the same file, or a dependency cycle.
+    """
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate stage names: {names}")
+    producers: Dict[pathlib.Path, str] = {}
+    for stage in stages:
+        for output in stage.outputs:
+            output = pathlib.Path(output).resolve()
+            if output in producers:
+                raise ValueError(f"{output} is written by both {producers[output]} and {stage.name}")
+            producers[output] = stage.name
+
+    dependencies = {}
+    for stage in stages:
+        unknown = set(stage.after) - set(names)
+        if unknown:
+            raise ValueError(f"Stage {stage.name} runs after unknown stages: {sorted(unknown)}")
+        from_files = {producers[path] for path in (pathlib.Path(p).resolve() for p in stage.inputs)
+                      if path in producers}
+        dependencies[stage.name] = (from_files | set(stage.after)) - {stage.name}
+
+    # Kahn's algorithm: if some stages never become ready, they form a cycle
+    remaining = {name: set(deps) for name, deps in dependencies.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return dependencies
+
+
+def _execute(func: Callable[..., Any], args: Tuple[Any, ...],
+             kwargs: Dict[str, Any]) -> Tuple[str, float, Any, Optional[str], Dict[str, Any]]:
+    """Run a stage function (in a worker) and report its status, time, value, traceback, and metrics."""
+    status, value, error = OK, None, None
+    with measure() as metrics:
+        start = time.perf_counter()
+        try:
+            value = func(*args, **kwargs)
+        except Exception:
+            status, error = FAILED, traceback.format_exc()
+        seconds = time.perf_counter() - start
+    return status, seconds, value, error, metrics
+
+
+def _missing(paths: Sequence[pathlib.Path]) -> List[str]:
+    return [str(path) for path in paths if not pathlib.Path(path).exists()]
+
+
+def stage_fingerprint(stage: Stage, cache: StageCache) -> str:
+    """Fingerprint a stage's inputs, code, and arguments (its inputs must exist)."""
+    return cache.fingerprint(stage.inputs, [*code_files(stage.func), *stage.code],
+                             {"func": f"{stage.func.__module__}.{stage.func.__qualname__}",
+                              "args": stage.args, "kwargs": stage.kwargs, "params": stage.params})
+
+
+def run_pipeline(stages: Sequence[Stage], max_workers: Optional[int] = None, parallel: bool = True,
+                 raise_on_failure: bool = False, cache: Optional[StageCache] = None) -> Dict[str, StageResult]:
+    """
+    Run stages in dependency order, overlapping the ones that are independent.
+
+    Parameters:
+        stages (list): The stages to run.
+        max_workers (int, optional): Process pool size. Default is the CPU count.
+        parallel (bool, optional): If False, run the stages one by one in this process. Default is True.
+        raise_on_failure (bool, optional): Raise PipelineError if any stage failed. Default is False.
+        cache (StageCache, optional): Skip the stages that are unchanged since their last run,
+                                      and record the ones that succeed. The cache is saved at the end.
+
+    Returns:
+        dict: Stage name -> StageResult, in the order the stages finished.
+    """
+    dependencies = stage_dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    results: Dict[str, StageResult] = {}
+    running: Dict[Future, str] = {}
+    fingerprints: Dict[str, str] = {}
+    executor = ProcessPoolExecutor(max_workers=max_workers) if parallel else None
+
+    def finish(name: str, status: str, seconds: float = 0.0, value: Any = None, error: Optional[str] = None,
+               metrics: Optional[Dict[str, Any]] = None) -> None:
+        stage = by_name[name]
+        if status == OK and _missing(stage.outputs):
+            status, error = FAILED, f"Missing outputs: {_missing(stage.outputs)}"
+        results[name] = StageResult(name, status, seconds, value, error, **(metrics or {}))
+        if status == OK and name in fingerprints:
+            cache.record(name, fingerprints[name], stage.outputs, seconds)
+        if status != OK:
+            # Skip every stage that depends on this one, directly or not
+            for other, deps in dependencies.items():
+                if name in deps and other not in results:
+                    finish(other, SKIPPED, error=f"Depends on {name}, which {status}")
+
+    try:
+        while len(results) < len(stages):
+            started = set(running.values())
+            for name, deps in dependencies.items():
+                ready = all(dep in results and results[dep].status == OK for dep in deps)
+                if name in results or name in started or not ready:
+                    continue
+                stage = by_name[name]
+                missing_inputs = _missing(stage.inputs)
+                if missing_inputs:
+                    finish(name, FAILED, error=f"Missing inputs: {missing_inputs}")
+                    continue
+                if cache is not None:
+                    fingerprints[name] = stage_fingerprint(stage, cache)
+                    if cache.is_fresh(name, fingerprints[name], stage.outputs):
+                        results[name] = StageResult(name, OK, cached=True)
+                        continue
+                if executor is None:
+                    finish(name, *_execute(stage.func, stage.args, stage.kwargs))
+                else:
+                    running[executor.submit(_execute, stage.func, stage.args, stage.kwargs)] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    finish(name, *future.result())
+                except Exception:  # the worker died or the result could not be pickled
+                    finish(name, FAILED, error=traceback.format_exc())
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if cache is not None:
+            cache.save()
+
+    if raise_on_failure and any(result.status == FAILED for result in results.values()):
+        raise PipelineError(results)
+    return results
+
+
+def _number(value: Optional[float], digits: int = 0) -> str:
+    return "-" if value is None else f"{value:,.{digits}f}"
+
+
+def format_report(results: Dict[str, StageResult]) -> str:
+    """
+    Return a table of stage names, statuses, run times, rows in and out, rows per second,
+    and peak RSS, followed by any errors. Values that were not measured show as '-'.
+    """
+    width = max((len(name) for name in results), default=5)
+    lines = [f"{'Stage':<{width}}  {'Status':<8}  {'Seconds':>8}  {'Rows in':>10}  {'Rows out':>10}  "
+             f"{'Rows/sec':>11}  {'Peak MB':>8}"]
+    for result in results.values():
+        measured = result.status != SKIPPED and not result.cached
+        lines.append(f"{result.name:<{width}}  {'cached' if result.cached else result.status:<8}  "
+                     f"{result.seconds:>8.3f}  {_number(result.rows_in if measured else None):>10}  "
+                     f"{_number(result.rows_out if measured else None):>10}  {_number(result.rows_per_sec):>11}  "
+                     f"{_number(result.peak_rss_mb, 1):>8}")
+    errors = [f"--- {result.name} ({result.status}) ---\n{result.error.rstrip()}"
+              for result in results.values() if result.error]
+    return "\n".join(lines + errors)
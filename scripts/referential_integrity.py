@@ -0,0 +1,142 @@
+"""
+scripts/referential_integrity.py
+
+Do not run this script directly.
+Instead, from this module (scripts.referential_integrity)
+import KeySet and check_references.
+
+Checks that the foreign keys of a fact table (e.g. sales.CustomerID) exist in
+their dimension tables (customers.CustomerID), without merging the tables:
+
+- A KeySet holds the distinct keys of one dimension column as a sorted NumPy
+  array (8 bytes per numeric key), read from the dimension table's key column only.
+- check_references() probes each foreign key column with np.searchsorted, a
+  vectorized semi-join costing O(rows log keys), and works through the fact table
+  CHUNK_SIZE rows at a time, so temporary memory does not grow with the table.
+- check_file() does the same for a fact table on disk, streaming it in chunks and
+  writing the matching rows and the orphans to separate files.
+
+Rows whose key is missing are kept, as SQL foreign keys allow NULL. Rows whose key
+is present but not in the dimension are orphans, with the reason code '<column>:orphan'.
+Keys are compared as numbers when the dimension keys are all numeric (so 1001 and
+1001.0 match), otherwise as text.
+
+Example:
+
+    references = {'CustomerID': KeySet.from_table(PREPARED_CUSTOMERS, 'CustomerID')}
+    validation = check_references(sales_df, references)
+    sales_df = sales_df[validation.mask]
+"""
+
+import pathlib
+from typing import Dict, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from scripts.column_schema import REASON_COLUMN, Validation
+from scripts.storage import read_table
+
+# Fact rows checked at a time
+CHUNK_SIZE = 1_000_000
+
+ORPHAN = "orphan"
+
+
+class KeySet:
+    def __init__(self, keys: Union[pd.Series, np.ndarray, list]):
+        """
+        Build the set of valid keys of a dimension column. Missing keys are ignored.
+
+        Parameters:
+            keys (Series, array, or list): The key values.
+        """
+        keys = pd.Series(keys).dropna()
+        numeric = pd.to_numeric(keys, errors="coerce")
+        self.numeric = bool(numeric.notna().all())
+        if self.numeric:
+            self.keys = np.unique(numeric.to_numpy(dtype=np.float64))
+        else:
+            self.keys = np.unique(keys.astype(str).to_numpy(dtype=str))
+
+    @classmethod
+    def from_table(cls, path: Union[str, pathlib.Path], column: str) -> "KeySet":
+        """Read only the key column of a stored dimension table (see scripts/storage.py).
+        A lookup, not input data, so its rows are not counted in the stage report."""
+        return cls(read_table(path, columns=[column], count_rows=False)[column])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def contains(self, values: pd.Series) -> np.ndarray:
+        """Return a boolean array marking the values that are keys of the dimension."""
+        if self.numeric:
+            probe = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            probe = values.astype(str).to_numpy(dtype=str)
+        if len(self.keys) == 0:
+            return np.zeros(len(probe), dtype=bool)
+        positions = np.searchsorted(self.keys, probe)
+        positions[positions == len(self.keys)] = 0
+        return self.keys[positions] == probe
+
+
+def check_references(df: pd.DataFrame, references: Mapping[str, KeySet],
+                     chunk_size: int = CHUNK_SIZE) -> Validation:
+    """
+    Find the rows whose foreign keys are not in their dimensions.
+
+    Parameters:
+        df (pd.DataFrame): The fact rows.
+        references (dict): Foreign key column -> KeySet of its dimension.
+        chunk_size (int, optional): Rows probed at a time. Default is CHUNK_SIZE.
+
+    Returns:
+        Validation: mask marks the rows whose keys all exist (or are missing), invalid_counts
+                    counts the orphans per column, and reasons gives each orphan row the code
+                    of its first orphan column (see scripts/column_schema.py).
+    """
+    codes = [f"{column}:{ORPHAN}" for column in references]
+    first = np.full(len(df), -1, dtype=np.int32)
+    invalid_counts: Dict[str, int] = {}
+    for code, (column, keys) in enumerate(references.items()):
+        orphans = 0
+        for start in range(0, len(df), chunk_size):
+            values = df[column].iloc[start:start + chunk_size]
+            orphan = values.notna().to_numpy() & ~keys.contains(values)
+            block = first[start:start + chunk_size]
+            block[orphan & (block < 0)] = code
+            orphans += int(orphan.sum())
+        invalid_counts[column] = orphans
+
+    reasons = pd.Series(pd.Categorical.from_codes(first, categories=codes), index=df.index, name=REASON_COLUMN)
+    counts = np.bincount(first[first >= 0], minlength=len(codes))
+    reason_counts = {code: int(count) for code, count in zip(codes, counts) if count}
+    return Validation(first < 0, invalid_counts, reasons, reason_counts)
+
+
+def check_file(path: Union[str, pathlib.Path], references: Mapping[str, KeySet],
+               output_path: Union[str, pathlib.Path], quarantine_path: Optional[Union[str, pathlib.Path]] = None,
+               chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Stream a fact CSV file in chunks, writing the rows with valid keys to output_path
+    and the orphans, with their reason codes, to quarantine_path.
+
+    Returns:
+        dict: rows_in, rows_out, and the orphan count per reason code.
+    """
+    counts: Dict[str, int] = {'rows_in': 0, 'rows_out': 0}
+    first_chunk = True
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        validation = check_references(chunk, references, chunk_size)
+        valid = chunk[validation.mask]
+        valid.to_csv(output_path, mode="w" if first_chunk else "a", header=first_chunk, index=False)
+        if quarantine_path is not None:
+            orphans = chunk[~validation.mask].assign(**{REASON_COLUMN: validation.reasons[~validation.mask]})
+            orphans.to_csv(quarantine_path, mode="w" if first_chunk else "a", header=first_chunk, index=False)
+        counts['rows_in'] += len(chunk)
+        counts['rows_out'] += len(valid)
+        for code, count in validation.reason_counts.items():
+            counts[code] = counts.get(code, 0) + count
+        first_chunk = False
+    return counts
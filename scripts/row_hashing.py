@@ -0,0 +1,98 @@
+"""
+scripts/row_hashing.py
+
+Do not run this script directly.
+Helpers for identifying rows by a 64-bit hash of their values.
+
+hash_rows turns every row of a DataFrame into one uint64. RowHashSet remembers
+the hashes it has seen in sorted NumPy arrays (8 bytes per distinct row), so
+duplicate detection can span chunks, files, and runs without keeping the rows.
+
+Numeric and boolean columns are hashed as float64, so the same value hashes
+the same whether pandas inferred int64 for one chunk and float64 (because of a
+missing value) for the next. Columns that mix numbers and text should be read
+with an explicit dtype so they are inferred the same way in every chunk.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def hash_rows(df: pd.DataFrame) -> np.ndarray:
+    """
+    Hash every row of a DataFrame to a 64-bit unsigned integer.
+
+    Parameters:
+        df (pd.DataFrame): The rows to hash. The index is ignored.
+
+    Returns:
+        np.ndarray: uint64 array with one hash per row.
+    """
+    if df.shape[1] == 0:
+        return np.zeros(len(df), dtype=np.uint64)
+    numeric = [column for column, dtype in df.dtypes.items()
+               if pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)]
+    if numeric:
+        df = df.astype({column: "float64" for column in numeric})
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+def _contains(sorted_hashes: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+    """Return a boolean mask of which `hashes` are present in the sorted array."""
+    if sorted_hashes.size == 0:
+        return np.zeros(hashes.shape, dtype=bool)
+    positions = np.searchsorted(sorted_hashes, hashes)
+    positions[positions == sorted_hashes.size] = 0
+    return sorted_hashes[positions] == hashes
+
+
+class RowHashSet:
+    """
+    A set of row hashes stored as sorted uint64 arrays.
+
+    New hashes go into a small sorted buffer that is merged into the main
+    array once it grows past a quarter of it, so adding a batch costs
+    O(batch log batch) plus an amortized linear merge.
+    """
+
+    def __init__(self, hashes: np.ndarray = None):
+        self._main = np.unique(np.asarray(hashes, dtype=np.uint64)) if hashes is not None else np.empty(0, np.uint64)
+        self._buffer = np.empty(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return int(self._main.size + self._buffer.size)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """Return a boolean mask of which hashes are already in the set."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        return _contains(self._main, hashes) | _contains(self._buffer, hashes)
+
+    def add(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Add a batch of hashes and report which rows are seen for the first time.
+
+        Parameters:
+            hashes (np.ndarray): uint64 hashes, one per row, in row order.
+
+        Returns:
+            np.ndarray: Boolean mask, True for the first occurrence of a hash that
+                        was not in the set before this call.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        unique, first_positions = np.unique(hashes, return_index=True)
+        new = ~self.contains(unique)
+        first_seen = np.zeros(hashes.shape, dtype=bool)
+        first_seen[first_positions[new]] = True
+        if new.any():
+            self._buffer = np.union1d(self._buffer, unique[new])
+            if self._buffer.size * 4 > self._main.size:
+                self._main = np.union1d(self._main, self._buffer)
+                self._buffer = np.empty(0, dtype=np.uint64)
+        return first_seen
+
+    def to_array(self) -> np.ndarray:
+        """Return every hash in the set as one sorted uint64 array."""
+        if self._buffer.size:
+            self._main = np.union1d(self._main, self._buffer)
+            self._buffer = np.empty(0, dtype=np.uint64)
+        return self._main
@@ -1,6 +1,5 @@
 import pathlib
 import sys
-import pandas as pd
 
 # Get project root directory and add it to sys.path
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
@@ -9,6 +8,7 @@ if str(PROJECT_ROOT) not in sys.path:
 
 # Now, import logger from utils
 from utils.utils_logger import logger  
+from scripts.storage import read_table  # noqa: E402
 
 # Define file paths
 DATA_DIR = PROJECT_ROOT / "data"
@@ -29,10 +29,10 @@ def get_schema(df, table_name):
 def main():
     logger.info("Generating schema for dimension tables...")
 
-    # Load prepared CSVs
-    customers_df = pd.read_csv(PREPARED_DIR / "customers_data_prepared.csv")
-    products_df = pd.read_csv(PREPARED_DIR / "products_data_prepared.csv")
-    sales_df = pd.read_csv(PREPARED_DIR / "sales_data_prepared.csv")
+    # Load prepared tables with their saved column types
+    customers_df = read_table(PREPARED_DIR / "customers_data_prepared.csv")
+    products_df = read_table(PREPARED_DIR / "products_data_prepared.csv")
+    sales_df = read_table(PREPARED_DIR / "sales_data_prepared.csv")
 
     # Generate schemas
     schema_text = ""
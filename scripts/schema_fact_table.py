@@ -4,7 +4,6 @@ Description: Generates a schema for the fact table from the sales_data_prepared.
 Output: data/processed/schema_fact_tables.txt
 """
 
-import pandas as pd
 import pathlib
 import sys
 
@@ -15,6 +14,7 @@ if str(PROJECT_ROOT) not in sys.path:
 
 # Import logger
 from utils.utils_logger import logger  
+from scripts.storage import read_table  # noqa: E402
 
 # File paths
 DATA_DIR = PROJECT_ROOT / "data" / "prepared"
@@ -27,7 +27,7 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 # Load sales data
 sales_file = DATA_DIR / "sales_data_prepared.csv"
 try:
-    df_sales = pd.read_csv(sales_file)
+    df_sales = read_table(sales_file)
     logger.info(f"Loaded sales data from {sales_file}")
 except Exception as e:
     logger.error(f"Error loading sales data: {e}")
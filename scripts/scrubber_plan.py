@@ -0,0 +1,242 @@
+"""
+scripts/scrubber_plan.py
+
+Deferred execution support for the DataScrubber class.
+
+Do not run this script directly.
+When a DataScrubber is created with lazy=True, each cleaning method records a
+PlanStep instead of touching the DataFrame. Calling collect() on the scrubber
+optimizes the recorded plan and runs it in a single pass:
+
+- Column drops are pushed ahead of the string and type work that does not need them.
+  Transforms whose output is dropped unused are skipped; a check that the columns they
+  read exist takes their place, so a missing column still raises KeyError as in eager
+  mode. Other errors a skipped transform would raise (e.g. a failed type conversion)
+  are not raised.
+- Row filters are pushed ahead of column transforms they do not depend on.
+- Runs of adjacent filters and drops are fused into one boolean mask and one
+  projection, so the rows are materialized once per run instead of once per call.
+- The working frame is only ever shallow-copied, never deep-copied.
+
+The same PlanStep objects are used by eager scrubbers (see apply_step),
+so both modes share one implementation of every cleaning operation.
+"""
+
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, FrozenSet, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Step kinds, from most to least movable
+FILTER = "filter"                    # row-wise mask that reads only the `reads` columns
+FRAME_FILTER = "frame_filter"        # mask that depends on every column (duplicates, dropna)
+PROJECT = "project"                  # drops the `drops` columns
+TRANSFORM = "transform"              # replaces the `writes` columns using the `reads` columns
+FRAME_TRANSFORM = "frame_transform"  # column-wise transform of every column (fillna)
+BARRIER = "barrier"                  # anything else (rename, reorder); nothing moves past it
+CHECK = "check"                      # raises KeyError unless the `reads` columns exist (see _push_projection)
+
+ROW_STEPS = {FILTER, FRAME_FILTER, PROJECT, CHECK}
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    """A single recorded DataScrubber operation."""
+
+    name: str
+    kind: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    reads: FrozenSet[str] = frozenset()
+    writes: FrozenSet[str] = frozenset()
+    drops: FrozenSet[str] = frozenset()
+    mask: Optional[Callable[[pd.DataFrame], pd.Series]] = None
+    apply: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None
+
+    def describe(self) -> str:
+        """Return a one-line, human-readable description of the step."""
+        args = ", ".join(f"{key}={value!r}" for key, value in self.params.items())
+        return f"{self.name}({args}) [{self.kind}]"
+
+
+def as_bool_array(mask: pd.Series) -> np.ndarray:
+    """Convert a (possibly nullable) boolean mask to a NumPy array, treating NA as False."""
+    if isinstance(mask, pd.Series):
+        return mask.to_numpy(dtype=bool, na_value=False)
+    return np.asarray(mask, dtype=bool)
+
+
+def apply_step(df: pd.DataFrame, step: PlanStep) -> pd.DataFrame:
+    """Apply one step eagerly, exactly as the corresponding DataScrubber method would."""
+    if step.kind in (FILTER, FRAME_FILTER):
+        return df[as_bool_array(step.mask(df))]
+    if step.kind == PROJECT:
+        return df.drop(columns=list(step.drops), errors="ignore")
+    return step.apply(df)
+
+
+def _columns_needed(step: PlanStep) -> Optional[FrozenSet[str]]:
+    """Columns a step needs to see, or None if it needs (or changes) the whole frame."""
+    if step.kind in (FILTER, TRANSFORM, CHECK):
+        return step.reads | step.writes
+    if step.kind == FRAME_TRANSFORM:
+        return frozenset()
+    return None
+
+
+def _check_columns(columns: FrozenSet[str]) -> PlanStep:
+    return PlanStep("check_columns", CHECK, {"columns": sorted(columns)}, reads=columns)
+
+
+def _push_projection(result: List[PlanStep], step: PlanStep) -> None:
+    """Insert a drop step into `result` as early as the steps already there allow."""
+    drops = step.drops
+    required: FrozenSet[str] = frozenset()  # columns read by the dead transforms removed on the way
+    position = len(result)
+    while position > 0 and drops:
+        previous = result[position - 1]
+        if previous.kind == PROJECT:
+            # Merge adjacent drops into one projection
+            merged = previous.drops | drops
+            result[position - 1] = replace(previous, drops=merged, params={"columns": sorted(merged)})
+            if required:
+                result.insert(position - 1, _check_columns(required))
+            return
+        if previous.kind == TRANSFORM and previous.writes <= drops:
+            # The transform only produces columns that are dropped afterwards: it is dead code.
+            # Its columns are still checked, where it would have read them or earlier.
+            required = (required - previous.writes) | previous.reads
+            del result[position - 1]
+            position -= 1
+            continue
+        needed = _columns_needed(previous)
+        blocked = drops & needed if needed is not None else frozenset()
+        if blocked:
+            # Leave the columns the previous step needs here, keep moving the rest
+            result.insert(position, replace(step, drops=blocked, params={"columns": sorted(blocked)}))
+            drops = drops - blocked
+        if required and (needed is None or previous.writes & required):
+            # The previous step may create a checked column: check here, before any drop
+            result.insert(position, _check_columns(required))
+            required = frozenset()
+        if needed is None:
+            break
+        position -= 1
+    if drops:
+        result.insert(position, replace(step, drops=drops, params={"columns": sorted(drops)}))
+    if required:
+        result.insert(position, _check_columns(required))
+
+
+def _push_filter(result: List[PlanStep], step: PlanStep) -> None:
+    """Insert a row filter into `result` ahead of the transforms it does not depend on."""
+    position = len(result)
+    while position > 0:
+        previous = result[position - 1]
+        if previous.kind == TRANSFORM and not (previous.writes & step.reads):
+            position -= 1
+        elif previous.kind == FRAME_FILTER:
+            # Row-wise filters commute with duplicate removal and dropna:
+            # identical rows always pass or fail a row-wise filter together.
+            position -= 1
+        else:
+            break
+    result.insert(position, step)
+
+
+def optimize_plan(steps: List[PlanStep]) -> List[PlanStep]:
+    """
+    Reorder and simplify a recorded plan without changing its result.
+
+    Parameters:
+        steps (list): Steps in the order they were recorded.
+
+    Returns:
+        list: An equivalent list of steps, ready for execute_plan.
+    """
+    result: List[PlanStep] = []
+    for step in steps:
+        if step.kind == PROJECT:
+            _push_projection(result, step)
+        elif step.kind == FILTER:
+            _push_filter(result, step)
+        else:
+            result.append(step)
+    return result
+
+
+def execute_plan(df: pd.DataFrame, steps: List[PlanStep]) -> pd.DataFrame:
+    """
+    Run an (optimized) plan against a DataFrame in a single pass.
+
+    Each run of adjacent filters and drops is evaluated against the same frame,
+    combined into one mask and one column list, and materialized with a single
+    .loc selection. Frame-level filters (duplicates, dropna) in a run see only the
+    rows the filters before them keep, as in eager mode. The input DataFrame is
+    never modified.
+
+    Parameters:
+        df (pd.DataFrame): The input data.
+        steps (list): Steps to run, usually the output of optimize_plan.
+
+    Returns:
+        pd.DataFrame: The resulting DataFrame.
+    """
+    owned = False
+    index = 0
+    while index < len(steps):
+        step = steps[index]
+        if step.kind in ROW_STEPS:
+            columns = list(df.columns)
+            mask: Optional[np.ndarray] = None
+            while index < len(steps) and steps[index].kind in ROW_STEPS:
+                step = steps[index]
+                if step.kind == PROJECT:
+                    columns = [column for column in columns if column not in step.drops]
+                elif step.kind == CHECK:
+                    missing = sorted(step.reads - set(columns))
+                    if missing:
+                        raise KeyError(missing[0] if len(missing) == 1 else missing)
+                else:
+                    view = df if len(columns) == df.shape[1] else df[columns]
+                    if step.kind == FRAME_FILTER and mask is not None:
+                        # Which rows are duplicates depends on the rows left: evaluate on the kept rows only
+                        kept = np.flatnonzero(mask)
+                        step_mask = np.zeros(len(mask), dtype=bool)
+                        step_mask[kept] = as_bool_array(step.mask(view.iloc[kept]))
+                    else:
+                        step_mask = as_bool_array(step.mask(view))
+                    mask = step_mask if mask is None else mask & step_mask
+                index += 1
+            if mask is not None:
+                df = df[mask] if len(columns) == df.shape[1] else df.loc[mask, columns]
+                owned = True
+            elif len(columns) != df.shape[1]:
+                df = df[columns]
+                owned = True
+            continue
+        if step.kind == TRANSFORM and not owned:
+            # Column transforms assign whole columns, so a shallow copy protects the input
+            df = df.copy(deep=False)
+            owned = True
+        df = step.apply(df)
+        owned = owned or step.kind != TRANSFORM
+        index += 1
+    return df
+
+
+def explain_plan(steps: List[PlanStep]) -> str:
+    """Return a multi-line description of a plan, marking the fused row segments."""
+    lines = []
+    segment = 0
+    in_segment = False
+    for step in steps:
+        if step.kind in ROW_STEPS:
+            if not in_segment:
+                segment += 1
+                in_segment = True
+            lines.append(f"  [fused #{segment}] {step.describe()}")
+        else:
+            in_segment = False
+            lines.append(f"  {step.describe()}")
+    return "\n".join(["Plan:"] + lines) if lines else "Plan: (empty)"
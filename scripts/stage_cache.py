@@ -0,0 +1,208 @@
+"""
+scripts/stage_cache.py
+
+Do not run this script directly.
+Instead, from this module (scripts.stage_cache)
+import the StageCache class.
+
+A build cache for pipeline stages. A stage's fingerprint is a hash of:
+
+- the contents of its input files,
+- the source code it runs (the stage function's module plus any listed code files),
+- its parameters (anything JSON-serializable; other values by their str()).
+
+After a stage succeeds, its fingerprint and the size and modification time of its
+outputs are recorded in STAGE_CACHE_FILE. The next run with the same fingerprint,
+whose outputs are still there and unchanged, skips the stage and keeps the outputs
+it wrote last time. Changing an input, the code, or a parameter, or touching an
+output, makes the stage run again.
+
+File digests are themselves cached by path, size, and modification time, so a run
+where nothing changed only stats the files instead of reading them.
+
+Every lookup counts as a hit or a miss; summary() reports the counts and the stage
+time the hits saved (from each stage's last recorded run time).
+
+Example:
+
+    cache = StageCache(force="--force" in sys.argv)
+    cache.run("load_dw", load_data_to_dw, inputs=prepared_files, outputs=[DB_PATH])
+    cache.save()
+    logger.info(cache.summary())
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import pathlib
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+STAGE_CACHE_FILE = PROJECT_ROOT / "data" / "stage_cache.json"
+
+# Library modules used by most stages (scripts/, its subpackages such as scripts/data_preparation/,
+# and utils/); a change to any of them invalidates those stages
+LIBRARY_CODE = sorted(path for folder in ("scripts", "utils") for path in (PROJECT_ROOT / folder).rglob("*.py"))
+
+PathLike = Union[str, pathlib.Path]
+READ_BLOCK_SIZE = 1 << 20
+
+
+def code_files(func: Callable[..., Any]) -> List[pathlib.Path]:
+    """The source file that defines a function, as a one-item list (empty for built-ins)."""
+    try:
+        return [pathlib.Path(inspect.getsourcefile(func))]
+    except TypeError:
+        return []
+
+
+class StageCache:
+    def __init__(self, path: PathLike = STAGE_CACHE_FILE, force: bool = False):
+        """
+        Open the stage cache.
+
+        Parameters:
+            path (str or Path, optional): The cache file. Default is STAGE_CACHE_FILE.
+            force (bool, optional): Treat every stage as changed (but still record the new runs).
+        """
+        self.path = pathlib.Path(path)
+        self.force = force
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._removed: set = set()
+        if self.path.exists():
+            saved = json.loads(self.path.read_text(encoding="utf-8"))
+            self._stages = saved.get("stages", {})
+            self._files = saved.get("files", {})
+
+    def file_digest(self, path: PathLike) -> str:
+        """SHA-256 of a file's contents, reusing the last digest if its size and mtime are unchanged."""
+        path = pathlib.Path(path).resolve()
+        stat = path.stat()
+        known = self._files.get(str(path))
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["sha256"]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(READ_BLOCK_SIZE), b""):
+                digest.update(block)
+        self._files[str(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def fingerprint(self, inputs: Sequence[PathLike] = (), code: Sequence[PathLike] = (),
+                    params: Optional[Any] = None) -> str:
+        """
+        Hash everything a stage's outputs depend on.
+
+        Parameters:
+            inputs (list): Data files the stage reads.
+            code (list): Source files whose changes should rerun the stage.
+            params (any, optional): Settings that change the outputs, e.g. a dict of constants.
+
+        Returns:
+            str: Hex digest; equal digests mean the stage would produce the same outputs.
+        """
+        payload = {
+            "inputs": [[str(path), self.file_digest(path)] for path in inputs],
+            "code": sorted({str(pathlib.Path(path).resolve()): self.file_digest(path) for path in code}.items()),
+            "params": params,
+        }
+        text = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _output_state(outputs: Iterable[PathLike]) -> Optional[Dict[str, list]]:
+        state = {}
+        for output in outputs:
+            path = pathlib.Path(output)
+            if not path.exists():
+                return None
+            stat = path.stat()
+            state[str(path.resolve())] = [stat.st_size, stat.st_mtime_ns]
+        return state
+
+    def is_fresh(self, name: str, fingerprint: str, outputs: Sequence[PathLike] = ()) -> bool:
+        """
+        Check whether a stage can be skipped, and count the lookup as a hit or a miss.
+
+        Returns:
+            bool: True if the last successful run had this fingerprint and its outputs are unchanged.
+        """
+        entry = self._stages.get(name)
+        fresh = (not self.force and entry is not None and entry["fingerprint"] == fingerprint
+                 and entry["outputs"] == self._output_state(outputs))
+        if fresh:
+            self.hits += 1
+            self.seconds_saved += entry.get("seconds", 0.0)
+        else:
+            self.misses += 1
+        return fresh
+
+    def record(self, name: str, fingerprint: str, outputs: Sequence[PathLike] = (), seconds: float = 0.0) -> None:
+        """Remember a successful run of a stage, after it has written its outputs."""
+        state = self._output_state(outputs)
+        if state is None:
+            return  # an output is missing, so there is nothing to reuse next time
+        self._stages[name] = {"fingerprint": fingerprint, "outputs": state, "seconds": round(seconds, 6)}
+        self._removed.discard(name)
+
+    def run(self, name: str, func: Callable[..., Any], *args: Any, inputs: Sequence[PathLike] = (),
+            outputs: Sequence[PathLike] = (), code: Sequence[PathLike] = (), params: Optional[Any] = None,
+            **kwargs: Any) -> bool:
+        """
+        Call func(*args, **kwargs) unless the stage is fresh. The function's own module is always
+        part of the code fingerprint, as are args and kwargs (in addition to params).
+        If func raises or returns False, the run is not recorded, so the stage runs again next time.
+
+        Returns:
+            bool: True if the stage ran, False if it was skipped.
+        """
+        fingerprint = self.fingerprint(inputs, [*code_files(func), *code],
+                                       {"params": params, "args": args, "kwargs": kwargs})
+        if self.is_fresh(name, fingerprint, outputs):
+            return False
+        start = time.perf_counter()
+        if func(*args, **kwargs) is not False:
+            self.record(name, fingerprint, outputs, time.perf_counter() - start)
+        return True
+
+    def invalidate(self, names: Optional[Iterable[str]] = None) -> None:
+        """Forget the given stages (all stages if names is None), so they run next time."""
+        names = list(self._stages) if names is None else list(names)
+        for name in names:
+            self._stages.pop(name, None)
+            self._removed.add(name)
+
+    def save(self) -> None:
+        """
+        Write the cache file atomically. Entries written meanwhile by other scripts are kept;
+        this cache's own entries win.
+        """
+        stages, files = {}, {}
+        if self.path.exists():
+            saved = json.loads(self.path.read_text(encoding="utf-8"))
+            stages, files = saved.get("stages", {}), saved.get("files", {})
+        for name in self._removed:
+            stages.pop(name, None)
+        stages.update(self._stages)
+        files.update(self._files)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        temporary.write_text(json.dumps({"stages": stages, "files": files}, indent=2, sort_keys=True),
+                             encoding="utf-8")
+        os.replace(temporary, self.path)
+
+    def summary(self) -> Dict[str, Any]:
+        """Hit and miss counts, hit rate, and the recorded stage time the hits saved."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "seconds_saved": round(self.seconds_saved, 3),
+        }
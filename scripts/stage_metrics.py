@@ -0,0 +1,90 @@
+"""
+scripts/stage_metrics.py
+
+Do not run this script directly.
+Instead, from this module (scripts.stage_metrics)
+import count_rows_in, count_rows_out, and measure.
+
+Per-stage measurements for the pipeline report (see scripts/pipeline_runner.py):
+
+- Rows in and rows out. The readers and writers count the rows they move:
+  DatasetReader.read and read_table count rows in, write_table counts rows out.
+  Lookups (the keys of referenced tables, see scripts/referential_integrity.py) are
+  not rows in. Scripts that read or write by other means count their rows themselves
+  (e.g. clean_file in scripts/clean_all_data.py) or report none.
+- Peak RSS, the most memory the process held while the stage ran. On Linux the
+  kernel's high-water mark is reset before each stage (/proc/self/clear_refs), so
+  each stage gets its own peak; elsewhere it is the process peak so far. Without the
+  resource module (Windows), it is not reported.
+
+Counters are per process, so stages running in pool workers count their own rows.
+
+Example:
+
+    with measure() as metrics:
+        prepare_all_data()
+    logger.info(f"rows in: {metrics['rows_in']}, peak RSS: {metrics['peak_rss_mb']} MB")
+"""
+
+import contextlib
+import pathlib
+import sys
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROWS = {"in": 0, "out": 0}
+
+PROC_STATUS = pathlib.Path("/proc/self/status")
+PROC_CLEAR_REFS = pathlib.Path("/proc/self/clear_refs")
+
+
+def count_rows_in(rows: int) -> None:
+    """Count rows read by the current stage."""
+    ROWS["in"] += rows
+
+
+def count_rows_out(rows: int) -> None:
+    """Count rows written by the current stage."""
+    ROWS["out"] += rows
+
+
+def reset_peak_rss() -> bool:
+    """Reset the process's peak RSS to its current RSS, where the OS allows it. Returns True if it was reset."""
+    try:
+        PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> Optional[float]:
+    """The process's peak resident memory in MB, or None if it cannot be measured."""
+    try:
+        for line in PROC_STATUS.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20) if sys.platform == "darwin" else peak / 1024, 1)  # bytes on macOS, KB elsewhere
+
+
+@contextlib.contextmanager
+def measure() -> Iterator[Dict[str, Any]]:
+    """
+    Measure the code in the block. The yielded dict is filled in when the block exits
+    (even if it raises) with rows_in, rows_out, and peak_rss_mb.
+    """
+    start_in, start_out = ROWS["in"], ROWS["out"]
+    reset_peak_rss()
+    metrics: Dict[str, Any] = {}
+    try:
+        yield metrics
+    finally:
+        metrics.update(rows_in=ROWS["in"] - start_in, rows_out=ROWS["out"] - start_out, peak_rss_mb=peak_rss_mb())
@@ -0,0 +1,292 @@
+"""
+scripts/storage.py
+
+Do not run this script directly.
+Instead, from this module (scripts.storage)
+import write_table and read_table (and table_files, to list the files of a table).
+
+Storage for the tables handed from one pipeline stage to the next.
+
+write_table() saves a DataFrame in STORAGE_FORMAT:
+
+- 'parquet' (needs pyarrow): a compressed columnar file that keeps the column types.
+  read_table() only reads the requested columns, and skips row groups whose
+  min/max statistics rule out the filters.
+- 'csv': a CSV file plus a small <name>.dtypes.json file with the column types, so
+  read_table() restores the types (integer IDs stay integers, dates are parsed)
+  instead of inferring them from the text again. The file holds each column's
+  logical type, not its in-memory compaction (see scripts/memory_compaction.py):
+  small integers and float32 are saved as 64-bit, categoricals as their categories' type.
+  The .dtypes.json files are generated with the tables and are not tracked by git.
+
+With EXPORT_CSV (the default), a parquet table is also written as CSV next to it,
+so there is always a file people can open. read_table() accepts either path and
+reads the parquet file when it is at least as new as the CSV file.
+
+STORAGE_FORMAT is 'parquet' when pyarrow is installed, otherwise 'csv'.
+
+Filters use the pyarrow form: a list of (column, op, value) tuples that must all
+hold, with op one of ==, !=, <, <=, >, >=, in, not in.
+
+Inside a `with shared_tables():` block, every table written or read is also kept in
+memory, and reading it again returns a copy of that frame instead of parsing the file.
+The files are still written, so the next run and other scripts can read them. A kept
+frame is dropped when its file changes on disk (e.g. when another process rewrites it).
+The pipeline entry point (scripts/pipeline.py) uses this to hand tables from one stage
+to the next within one process.
+
+The rows read and written are counted for the stage report (see scripts/stage_metrics.py).
+
+Example:
+
+    path = write_table(df, PREPARED_DATA_DIR / "sales_data_prepared.csv")
+    sales = read_table(path, columns=["CustomerID", "SaleAmount"], filters=[("SaleAmount", ">", 100)])
+"""
+
+import contextlib
+import importlib.util
+import json
+import pathlib
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from scripts.stage_metrics import count_rows_in, count_rows_out
+
+FORMATS = ("parquet", "csv")
+SUFFIXES = {"parquet": ".parquet", "csv": ".csv"}
+DTYPES_SUFFIX = ".dtypes.json"
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+STORAGE_FORMAT = "parquet" if HAS_PYARROW else "csv"
+
+# Also write a CSV copy of every parquet table, for people to read
+EXPORT_CSV = True
+
+# Parquet options: codec ('zstd', 'snappy', 'gzip', None) and rows per row group
+COMPRESSION = "zstd"
+ROW_GROUP_SIZE = 100_000
+
+PathLike = Union[str, pathlib.Path]
+Filter = Tuple[str, str, Any]
+
+# Tables kept in memory inside shared_tables(): table path without suffix -> (file mtime_ns, frame)
+_shared: Optional[Dict[pathlib.Path, Tuple[int, pd.DataFrame]]] = None
+
+
+def _check_format(fmt: str) -> None:
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown storage format: {fmt}. Choose from {FORMATS}.")
+    if fmt == "parquet" and not HAS_PYARROW:
+        raise ImportError("The parquet format needs pyarrow; install it or use the csv format")
+
+
+def dtypes_path(csv_path: PathLike) -> pathlib.Path:
+    """The column type file that goes with a CSV table."""
+    path = pathlib.Path(csv_path)
+    return path.with_name(path.stem + DTYPES_SUFFIX)
+
+
+def table_files(path: PathLike, fmt: Optional[str] = None, export_csv: bool = EXPORT_CSV) -> List[pathlib.Path]:
+    """Every file write_table() writes for a table (with the same arguments), e.g. to check they all exist."""
+    fmt = fmt or STORAGE_FORMAT
+    _check_format(fmt)
+    path = pathlib.Path(path)
+    csv = path.with_suffix(SUFFIXES["csv"])
+    files = [csv, dtypes_path(csv)] if fmt == "csv" or export_csv else []
+    if fmt == "parquet":
+        files.append(path.with_suffix(SUFFIXES["parquet"]))
+    return files
+
+
+def _schema_dtype(dtype: Any) -> str:
+    """The type a column is saved as: its 64-bit (or, for a categorical, its categories') type."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    if dtype.kind in "iu" and dtype.itemsize < 8:
+        return "int64" if isinstance(dtype, np.dtype) else "Int64"
+    if dtype.kind == "f" and dtype.itemsize < 8:
+        return "float64" if isinstance(dtype, np.dtype) else "Float64"
+    return str(dtype)
+
+
+def write_table(df: pd.DataFrame, path: PathLike, fmt: Optional[str] = None, compression: Optional[str] = COMPRESSION,
+                row_group_size: int = ROW_GROUP_SIZE, export_csv: bool = EXPORT_CSV) -> pathlib.Path:
+    """
+    Save a table. The suffix of `path` is replaced by the format's suffix.
+
+    Parameters:
+        df (pd.DataFrame): The table. Its index is not saved.
+        path (str or Path): Where to save it, e.g. data/prepared/sales_data_prepared.csv.
+        fmt (str, optional): 'parquet' or 'csv'. Default is STORAGE_FORMAT.
+        compression (str, optional): Parquet codec. Default is COMPRESSION.
+        row_group_size (int, optional): Parquet rows per row group. Default is ROW_GROUP_SIZE.
+        export_csv (bool, optional): Also write a CSV copy of a parquet table. Default is EXPORT_CSV.
+
+    Returns:
+        pathlib.Path: The file written in `fmt`.
+    """
+    fmt = fmt or STORAGE_FORMAT
+    _check_format(fmt)
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "parquet":
+        if export_csv:
+            _write_csv(df, path)  # first, so the parquet file is the newer one
+        target = path.with_suffix(SUFFIXES["parquet"])
+        df.to_parquet(target, engine="pyarrow", index=False, compression=compression, row_group_size=row_group_size)
+    else:
+        target = _write_csv(df, path)
+        df = _as_saved(df)  # shared as read_table() reads it back
+    count_rows_out(len(df))
+    _share(target, df.reset_index(drop=True))
+    return target
+
+
+def _saved_dtypes(df: pd.DataFrame) -> Dict[str, str]:
+    return {str(column): _schema_dtype(dtype) for column, dtype in df.dtypes.items()}
+
+
+def _as_saved(df: pd.DataFrame) -> pd.DataFrame:
+    """The frame with the types its CSV file is read back with."""
+    changed = {column: dtype for column, dtype in _saved_dtypes(df).items() if dtype != str(df[column].dtype)}
+    return df.astype(changed) if changed else df
+
+
+def _write_csv(df: pd.DataFrame, path: pathlib.Path) -> pathlib.Path:
+    target = path.with_suffix(SUFFIXES["csv"])
+    df.to_csv(target, index=False)
+    dtypes_path(target).write_text(json.dumps(_saved_dtypes(df), indent=2), encoding="utf-8")
+    return target
+
+
+@contextlib.contextmanager
+def shared_tables() -> Iterator[None]:
+    """Keep the tables written and read in this block in memory, and serve reads from there."""
+    global _shared
+    outer = _shared
+    if outer is None:
+        _shared = {}
+    try:
+        yield
+    finally:
+        if outer is None:
+            _shared = None
+
+
+def _share(path: pathlib.Path, df: pd.DataFrame) -> None:
+    if _shared is not None:
+        _shared[path.resolve().with_suffix("")] = (path.stat().st_mtime_ns, df)
+
+
+def _shared_frame(path: pathlib.Path) -> Optional[pd.DataFrame]:
+    if _shared is None:
+        return None
+    key = path.resolve().with_suffix("")
+    kept = _shared.get(key)
+    if kept is None:
+        return None
+    if not path.exists() or path.stat().st_mtime_ns != kept[0]:
+        del _shared[key]  # the file changed since the frame was kept
+        return None
+    return kept[1]
+
+
+def resolve_table(path: PathLike) -> pathlib.Path:
+    """
+    Find the file to read for a table: the parquet file if it exists (and pyarrow is installed)
+    and is not older than the CSV file, otherwise the CSV file.
+    """
+    path = pathlib.Path(path)
+    parquet, csv = path.with_suffix(SUFFIXES["parquet"]), path.with_suffix(SUFFIXES["csv"])
+    if HAS_PYARROW and parquet.exists() and (not csv.exists() or parquet.stat().st_mtime >= csv.stat().st_mtime):
+        return parquet
+    if csv.exists() or path.suffix == SUFFIXES["csv"]:
+        return csv
+    return path
+
+
+def _filter_mask(df: pd.DataFrame, filters: Sequence[Filter]) -> np.ndarray:
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in filters:
+        series = df[column]
+        if op in ("=", "=="):
+            result = series == value
+        elif op == "!=":
+            result = series != value
+        elif op == "<":
+            result = series < value
+        elif op == "<=":
+            result = series <= value
+        elif op == ">":
+            result = series > value
+        elif op == ">=":
+            result = series >= value
+        elif op == "in":
+            result = series.isin(value)
+        elif op == "not in":
+            result = ~series.isin(value)
+        else:
+            raise ValueError(f"Unknown filter operator: {op}")
+        mask &= result.to_numpy(dtype=bool, na_value=False)
+    return mask
+
+
+def _read_csv(path: pathlib.Path, columns: Optional[List[str]]) -> pd.DataFrame:
+    types_file = dtypes_path(path)
+    dtypes: Dict[str, str] = json.loads(types_file.read_text(encoding="utf-8")) if types_file.exists() else {}
+    if columns is not None:
+        dtypes = {column: dtype for column, dtype in dtypes.items() if column in columns}
+    dates = [column for column, dtype in dtypes.items() if dtype.startswith("datetime64")]
+    others = {column: dtype for column, dtype in dtypes.items() if column not in dates}
+    df = pd.read_csv(path, usecols=columns, dtype=others or None, parse_dates=dates or None)
+    for column in dates:
+        df[column] = df[column].astype(dtypes[column])
+    return df
+
+
+def read_table(path: PathLike, columns: Optional[List[str]] = None,
+               filters: Optional[Sequence[Filter]] = None, count_rows: bool = True) -> pd.DataFrame:
+    """
+    Read a table saved with write_table (or any CSV file).
+
+    Parameters:
+        path (str or Path): The table's parquet or CSV path (see resolve_table).
+        columns (list, optional): Only read these columns.
+        filters (list, optional): Only return rows matching every (column, op, value) filter.
+            Parquet files skip the row groups that cannot match.
+        count_rows (bool, optional): Count the rows as the stage's input. Default is True;
+            lookups such as the keys of a referenced table pass False.
+
+    Returns:
+        pd.DataFrame: The table, with its saved column types.
+    """
+    path = resolve_table(path)
+    df = _shared_frame(path)
+    if df is not None:
+        if filters:
+            df = df[_filter_mask(df, filters)].reset_index(drop=True)
+        df = (df[columns] if columns is not None else df).copy()
+    elif path.suffix == SUFFIXES["parquet"]:
+        df = pd.read_parquet(path, engine="pyarrow", columns=columns, filters=list(filters) if filters else None)
+    else:
+        read_columns = columns
+        if columns is not None and filters:
+            read_columns = list(dict.fromkeys([*columns, *(column for column, _, _ in filters)]))
+        df = _read_csv(path, read_columns)
+        if filters:
+            df = df[_filter_mask(df, filters)].reset_index(drop=True)
+        df = df[columns] if columns is not None else df
+    if _shared is not None and columns is None and not filters and path.resolve().with_suffix("") not in _shared:
+        _share(path, df.copy())
+    if count_rows:
+        count_rows_in(len(df))
+    return df
+
+
+def export_csv(path: PathLike, csv_path: Optional[PathLike] = None) -> pathlib.Path:
+    """Write a stored table as a plain CSV file (by default next to it) and return the CSV path."""
+    csv_path = pathlib.Path(csv_path) if csv_path else pathlib.Path(path).with_suffix(SUFFIXES["csv"])
+    read_table(path).to_csv(csv_path, index=False)
+    return csv_path
@@ -0,0 +1,243 @@
+"""
+scripts/streaming_scrubber.py
+
+Do not run this script directly.
+Instead, from this module (scripts.streaming_scrubber)
+import the StreamingScrubber class.
+
+StreamingScrubber is the chunked variant of DataScrubber. Pass it any iterator
+of DataFrames, for example pd.read_csv(path, chunksize=100_000), call the usual
+DataScrubber cleaning methods to record the steps, then write the result with
+to_csv() (or iterate over iter_chunks()). Only one chunk is held in memory at a time.
+
+Steps that need to see the whole dataset still give global results:
+
+- remove_duplicate_records keeps the first occurrence across all chunks.
+- check_data_consistency_before_cleaning and check_data_consistency_after_cleaning
+  report null and duplicate counts for the whole stream once it has been consumed.
+- profile() gives the profile of the whole cleaned stream, built chunk by chunk,
+  and inspect_data() the info and describe summaries rendered from it.
+
+Both use 64-bit row hashes (see scripts/row_hashing.py), so the only state that
+grows with the input is 8 bytes per distinct row.
+
+Example:
+
+    stream = StreamingScrubber(pd.read_csv(path, chunksize=100_000))
+    stream.handle_missing_data(fill_value="Unknown")
+    stream.remove_duplicate_records()
+    stream.to_csv(output_path)
+"""
+
+import pathlib
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from scripts.data_profiler import DataProfile, DistinctSketch, QuantileSketch, profile_dataframe
+from scripts.data_scrubber import DataScrubber, ScrubResult
+from scripts.row_hashing import RowHashSet, hash_rows
+from scripts.scrubber_plan import FRAME_FILTER, PlanStep, execute_plan, optimize_plan
+
+if TYPE_CHECKING:
+    from scripts.dedup_index import RowHashIndex
+
+
+class _StreamProfile:
+    """A DataProfile built over a stream of chunks, with the duplicate rows across all of them."""
+
+    def __init__(self, with_distinct: bool = True):
+        self._profile: Optional[DataProfile] = None
+        self._seen = RowHashSet()
+        self._duplicate_count = 0
+        self._distinct: Optional[Dict[str, DistinctSketch]] = {} if with_distinct else None
+        self._quantiles: Dict[str, QuantileSketch] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if self._profile is None:
+            self._profile = profile_dataframe(chunk, with_distinct=False, with_duplicates=False)
+        else:
+            self._profile.add_rows(chunk)
+        self._duplicate_count += int((~self._seen.add(hash_rows(chunk))).sum())
+        if self._distinct is not None:
+            for name in chunk.columns:
+                self._distinct.setdefault(name, DistinctSketch()).add(chunk[name])
+        for name, column in self._profile.columns.items():
+            if column.numeric:
+                self._quantiles.setdefault(name, QuantileSketch()).add(chunk[name])
+
+    def profile(self) -> DataProfile:
+        profile = self._profile or profile_dataframe(pd.DataFrame())
+        profile.duplicate_count = self._duplicate_count
+        for name, sketch in (self._distinct or {}).items():
+            profile.columns[name].distinct = sketch.estimate()
+        for name, sketch in self._quantiles.items():
+            if profile.columns[name].numeric:
+                profile.columns[name].quartiles = sketch.quartiles()
+        return profile
+
+    def as_dict(self) -> Dict[str, Union[pd.Series, int]]:
+        return {'null_counts': self.profile().null_counts, 'duplicate_count': self._duplicate_count}
+
+
+class StreamingScrubber(DataScrubber):
+    def __init__(self, chunks: Iterable[pd.DataFrame], track_consistency: bool = True):
+        """
+        Initialize the StreamingScrubber with an iterator of DataFrame chunks.
+
+        Parameters:
+            chunks (iterable): DataFrames to clean, e.g. pd.read_csv(path, chunksize=100_000).
+            track_consistency (bool, optional): If True, collect null and duplicate counts
+                before and after cleaning, and the profile of the cleaned data, while the
+                stream is processed. Default is True.
+        """
+        super().__init__(pd.DataFrame(), lazy=True)
+        self.chunks = iter(chunks)
+        self.track_consistency = track_consistency
+        self.rows_in = 0
+        self.rows_out = 0
+        self.consumed = False
+        self._seen_rows = RowHashSet()
+        self._before = _StreamProfile(with_distinct=False)
+        self._after = _StreamProfile()
+
+    def _wait_for_kept_rows(self, index: "RowHashIndex") -> None:
+        """Have iter_chunks() tell the index which rows of each chunk the cleaning keeps."""
+        if not any(waiting is index for waiting in self._indexes):
+            self._indexes.append(index)
+
+    def _clean_chunk(self, chunk: pd.DataFrame, plan: List[PlanStep]) -> pd.DataFrame:
+        """Run the plan on one chunk, then add the rows it keeps to the waiting indexes."""
+        if not self._indexes:
+            return execute_plan(chunk, plan)
+        # Rows keep their labels through a plan, so label them by position while it runs
+        cleaned = execute_plan(chunk.set_axis(pd.RangeIndex(len(chunk)), axis=0), plan)
+        kept = cleaned.index.to_numpy()
+        for index in self._indexes:
+            index.commit(kept)
+        return cleaned.set_axis(chunk.index[kept], axis=0)
+
+    def _first_seen_mask(self, df: pd.DataFrame) -> np.ndarray:
+        """Mask of rows that have not appeared in this chunk or any earlier chunk."""
+        return self._seen_rows.add(hash_rows(df))
+
+    def remove_duplicate_records(self, index: Optional["RowHashIndex"] = None) -> ScrubResult:
+        """
+        Remove duplicate rows across the whole stream, keeping the first occurrence.
+
+        Parameters:
+            index (RowHashIndex, optional): Persistent index of rows seen in earlier runs.
+                If given, rows already in the index are removed too, and the new rows that the
+                cleaning keeps are added to it as each chunk is cleaned. Call index.save() once
+                the cleaned data has been written.
+
+        Returns:
+            StreamingScrubber: The scrubber itself; the step runs as the chunks are processed.
+        """
+        if index is not None:
+            self._wait_for_kept_rows(index)
+            return self._run(PlanStep('remove_duplicate_records', FRAME_FILTER, {'index': index.name},
+                                      mask=index.pending_rows_mask))
+        return self._run(PlanStep('remove_duplicate_records', FRAME_FILTER, mask=self._first_seen_mask))
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        Clean the stream one chunk at a time.
+
+        The recorded steps are optimized once and then applied to every chunk.
+        The stream can only be consumed once.
+
+        Yields:
+            pd.DataFrame: Each cleaned chunk, in input order.
+        """
+        if self.consumed:
+            raise RuntimeError("The chunk stream has already been consumed.")
+        plan = optimize_plan(self.plan)
+        for chunk in self.chunks:
+            self.rows_in += len(chunk)
+            if self.track_consistency:
+                self._before.update(chunk)
+            cleaned = self._clean_chunk(chunk, plan)
+            self.rows_out += len(cleaned)
+            if self.track_consistency:
+                self._after.update(cleaned)
+            yield cleaned
+        self.consumed = True
+
+    def to_csv(self, file_path: Union[str, pathlib.Path], **kwargs) -> int:
+        """
+        Clean the stream and write it to a CSV file incrementally.
+
+        Parameters:
+            file_path (str or Path): Destination CSV file. It is overwritten.
+            **kwargs: Extra keyword arguments for DataFrame.to_csv (index defaults to False).
+
+        Returns:
+            int: Number of rows written.
+        """
+        kwargs.setdefault('index', False)
+        header = True
+        with open(file_path, 'w', newline='', encoding=kwargs.pop('encoding', 'utf-8')) as f:
+            for cleaned in self.iter_chunks():
+                cleaned.to_csv(f, header=header, **kwargs)
+                header = False
+        return self.rows_out
+
+    def collect(self) -> pd.DataFrame:
+        """
+        Clean the whole stream and return it as a single DataFrame.
+
+        This holds the full result in memory; prefer to_csv() or iter_chunks() for large inputs.
+
+        Returns:
+            pd.DataFrame: All cleaned chunks concatenated.
+        """
+        if not self.consumed:
+            chunks = list(self.iter_chunks())
+            self.df = pd.concat(chunks) if chunks else pd.DataFrame()
+            self.plan = []
+        return self.df
+
+    def _require_consumed(self) -> None:
+        if not self.consumed:
+            raise RuntimeError("Consistency counts and the profile are available once the stream has been processed.")
+        if not self.track_consistency:
+            raise RuntimeError("Consistency counts and the profile were not tracked (track_consistency=False).")
+
+    def check_data_consistency_before_cleaning(self) -> Dict[str, Union[pd.Series, int]]:
+        """
+        Report null and duplicate counts for the raw stream.
+
+        Returns:
+            dict: Dictionary with counts of null values and duplicate rows across every input chunk.
+        """
+        self._require_consumed()
+        return self._before.as_dict()
+
+    def check_data_consistency_after_cleaning(self) -> Dict[str, Union[pd.Series, int]]:
+        """
+        Check the cleaned stream has no null or duplicate entries.
+
+        Returns:
+            dict: Dictionary with counts of null values and duplicate rows across every cleaned chunk,
+                  expected to be zero for each.
+        """
+        self._require_consumed()
+        consistency = self._after.as_dict()
+        assert consistency['null_counts'].sum() == 0, "Data still contains null values after cleaning."
+        assert consistency['duplicate_count'] == 0, "Data still contains duplicate records after cleaning."
+        return consistency
+
+    def profile(self) -> DataProfile:
+        """
+        Profile the cleaned stream, as DataScrubber.profile() profiles a whole DataFrame.
+
+        The profile is built chunk by chunk while the stream is processed (see DataProfile.add_rows);
+        distinct counts and quartiles are estimated in bounded memory, and the memory use is that of all the chunks.
+
+        Returns:
+            DataProfile: The profile of every cleaned chunk together.
+        """
+        self._require_consumed()
+        return self._after.profile()
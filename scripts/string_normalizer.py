@@ -0,0 +1,136 @@
+"""
+scripts/string_normalizer.py
+
+Do not run this script directly.
+Instead, from this module (scripts.string_normalizer)
+import the StringNormalizer class.
+
+Text columns such as Region or Category hold a handful of distinct values
+repeated across millions of rows. StringNormalizer applies a chain of
+transforms (strip, case, whitespace, Unicode normalization) once per distinct
+value and maps the results back by code, so the cost grows with the number of
+distinct values rather than the number of rows:
+
+- Plain columns are factorized into codes and unique values first.
+- Categorical columns already have codes, so only their categories are
+  transformed, and the column stays categorical.
+- Results are memoized per normalizer, so values seen in earlier calls
+  (e.g. earlier chunks of a stream) are not transformed again.
+
+Example:
+
+    normalizer = StringNormalizer(["strip", "capitalize"])
+    df["Region"] = normalizer.normalize(df["Region"])
+"""
+
+from typing import Any, Callable, Dict, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# Named transforms; each one maps a Series of (unique) values to a Series
+TRANSFORMS: Dict[str, Callable[[pd.Series], pd.Series]] = {
+    "strip": lambda values: values.str.strip(),
+    "lower": lambda values: values.str.lower(),
+    "upper": lambda values: values.str.upper(),
+    "capitalize": lambda values: values.str.capitalize(),
+    "title": lambda values: values.str.title(),
+    "collapse_whitespace": lambda values: values.str.replace(r"\s+", " ", regex=True),
+    "nfc": lambda values: values.str.normalize("NFC"),
+    "nfkc": lambda values: values.str.normalize("NFKC"),
+    "nfd": lambda values: values.str.normalize("NFD"),
+    "nfkd": lambda values: values.str.normalize("NFKD"),
+}
+
+# Stop memoizing new values once a normalizer has cached this many
+MAX_CACHE_SIZE = 100_000
+
+Transform = Union[str, Callable[[pd.Series], pd.Series]]
+
+
+def _cache_key(value: Any) -> Any:
+    # Keep 1, 1.0 and True apart: they are equal as dict keys but may normalize differently
+    return value if isinstance(value, str) else (type(value), value)
+
+
+class StringNormalizer:
+    def __init__(self, transforms: Sequence[Transform] = ("strip",), stringify: bool = False):
+        """
+        Create a normalizer for a chain of transforms.
+
+        Parameters:
+            transforms (list): Transform names from TRANSFORMS, or callables that take and
+                return a Series, applied in order. Default is ("strip",).
+            stringify (bool, optional): If True, convert non-string values with str() before
+                transforming (like .astype(str), but missing values stay missing). If False,
+                non-string values become missing, as with the .str accessor. Default is False.
+        """
+        unknown = [name for name in transforms if isinstance(name, str) and name not in TRANSFORMS]
+        if unknown:
+            raise ValueError(f"Unknown string transforms: {unknown}. Choose from {sorted(TRANSFORMS)}.")
+        self.transforms = [TRANSFORMS[name] if isinstance(name, str) else name for name in transforms]
+        self.stringify = stringify
+        self._cache: Dict[Any, Any] = {}
+
+    def _transform(self, values: pd.Series) -> pd.Series:
+        if self.stringify:
+            values = values.map(lambda value: value if isinstance(value, str) else str(value))
+        for transform in self.transforms:
+            values = transform(values)
+        return values
+
+    def normalize_values(self, values: np.ndarray) -> np.ndarray:
+        """
+        Normalize an array of distinct, non-missing values, using the memo where possible.
+
+        Parameters:
+            values (np.ndarray): Distinct values to normalize.
+
+        Returns:
+            np.ndarray: Object array of normalized values, in the same order.
+        """
+        result = np.empty(len(values), dtype=object)
+        todo = []
+        for position, value in enumerate(values):
+            try:
+                result[position] = self._cache[_cache_key(value)]
+            except (KeyError, TypeError):
+                todo.append(position)
+        if todo:
+            fresh = self._transform(pd.Series(values[todo], dtype=object)).to_numpy(dtype=object)
+            result[todo] = fresh
+            if len(self._cache) + len(todo) <= MAX_CACHE_SIZE:
+                for position, value in zip(todo, fresh):
+                    try:
+                        self._cache[_cache_key(values[position])] = value
+                    except TypeError:
+                        pass
+        return result
+
+    def normalize(self, series: pd.Series) -> pd.Series:
+        """
+        Normalize a column, transforming each distinct value only once.
+
+        Parameters:
+            series (pd.Series): The column to normalize.
+
+        Returns:
+            pd.Series: The normalized column, with the same index. Categorical input stays
+                       categorical (categories that become equal are merged); string input
+                       keeps its string dtype.
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            normalized = self.normalize_values(series.cat.categories.to_numpy(dtype=object))
+            new_codes, new_categories = pd.factorize(pd.Series(normalized, dtype=object))
+            codes = np.where(codes >= 0, new_codes[codes], -1)
+            categorical = pd.Categorical.from_codes(codes, categories=new_categories)
+            return pd.Series(categorical, index=series.index, name=series.name)
+
+        codes, uniques = pd.factorize(series)
+        normalized = self.normalize_values(np.asarray(uniques, dtype=object))
+        values = np.append(normalized, np.nan).astype(object)[codes]  # code -1 picks the trailing NaN
+        result = pd.Series(values, index=series.index, name=series.name, dtype=object)
+        if pd.api.types.is_string_dtype(series.dtype) and not pd.api.types.is_object_dtype(series.dtype):
+            result = result.astype(series.dtype)
+        return result
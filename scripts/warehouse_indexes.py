@@ -0,0 +1,147 @@
+"""
+scripts/warehouse_indexes.py
+
+Do not run this script directly.
+Instead, from this module (scripts.warehouse_indexes)
+import build_indexes and query_plans.
+
+Secondary indexes and planner statistics for the data warehouse (data/dw/smart_sales.db).
+
+The tables have only their primary keys, so every analytical query on the sales fact
+would scan it. INDEXES declares an index for each common access path of the fact:
+the joins to customers and products, date-range filters and calendar rollups on the
+integer sale_date_key (which joins to date_dim, see scripts/date_dimension.py), and
+group by store_id or campaign_id. Each index also holds sale_amount (and the product
+index, customer_id), so the standard queries are answered from the index alone (a
+covering index), without reading the table rows.
+
+- build_indexes() creates the declared indexes that do not exist yet, or whose columns
+  changed, and runs ANALYZE, so the query planner has row counts and key distributions
+  to choose them with.
+  etl_to_dw.py calls it after each load: the first load inserts into bare tables and
+  the indexes are built once at the end (see also bulk_insert() in scripts/bulk_loader.py).
+- query_plans() gives the EXPLAIN QUERY PLAN of each query in QUERIES, the standard BI
+  queries of spark.ipynb, to confirm which indexes they use.
+
+To list the query plans from the command line (after building the indexes, with --build), run it as a module:
+
+    python -m scripts.warehouse_indexes
+    python -m scripts.warehouse_indexes --build
+"""
+
+import argparse
+import pathlib
+import sqlite3
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from utils.utils_logger import logger  # noqa: E402
+
+DB_PATH = PROJECT_ROOT / "data" / "dw" / "smart_sales.db"  # as in etl_to_dw.py
+
+# Index name -> (table, columns). The leading column is the access path; the rest make it covering.
+INDEXES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "idx_sales_customer": ("sales", ("customer_id", "sale_amount")),
+    "idx_sales_product": ("sales", ("product_id", "customer_id", "sale_amount")),
+    "idx_sales_date": ("sales", ("sale_date_key", "sale_amount")),
+    "idx_sales_store": ("sales", ("store_id", "sale_amount")),
+    "idx_sales_campaign": ("sales", ("campaign_id", "sale_amount")),
+}
+
+# The standard BI queries (spark.ipynb), by name
+QUERIES: Dict[str, str] = {
+    "top_customers": """
+        SELECT c.name, ROUND(SUM(s.sale_amount), 2) AS total_spent
+        FROM sales s JOIN customers c ON s.customer_id = c.customer_id
+        GROUP BY c.name ORDER BY total_spent DESC""",
+    "product_region_matrix": """
+        SELECT p.product_name, c.region, SUM(s.sale_amount) AS total_sales
+        FROM sales s JOIN products p ON s.product_id = p.product_id
+        JOIN customers c ON s.customer_id = c.customer_id
+        GROUP BY p.product_name, c.region""",
+    "sales_since": """
+        SELECT * FROM sales WHERE sale_date_key >= 20230101""",
+    "sales_by_month": """
+        SELECT d.year, d.quarter, d.month, SUM(s.sale_amount) AS total_sales
+        FROM sales s JOIN date_dim d ON s.sale_date_key = d.date_key
+        GROUP BY d.year, d.quarter, d.month ORDER BY d.year, d.quarter, d.month""",
+    "sales_by_store": """
+        SELECT store_id, SUM(sale_amount) AS total_sales FROM sales GROUP BY store_id""",
+    "sales_by_campaign": """
+        SELECT campaign_id, SUM(sale_amount) AS total_sales FROM sales GROUP BY campaign_id""",
+}
+
+
+def index_sql(name: str) -> str:
+    """The CREATE INDEX statement of a declared index, as SQLite stores it in sqlite_master."""
+    table, columns = INDEXES[name]
+    return f'CREATE INDEX "{name}" ON "{table}" ({", ".join(columns)})'
+
+
+def build_indexes(conn: sqlite3.Connection, analyze: bool = True) -> List[str]:
+    """
+    Create the declared indexes that are missing, then update the planner statistics.
+    An index whose columns differ from its declaration is dropped and created again.
+
+    Parameters:
+        conn (sqlite3.Connection): The warehouse connection, with the tables created.
+        analyze (bool, optional): Run ANALYZE afterwards. Default is True.
+
+    Returns:
+        list: The names of the indexes created.
+    """
+    existing = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index'").fetchall())
+    created = [name for name in INDEXES if existing.get(name) != index_sql(name)]
+    for name in created:
+        if name in existing:
+            conn.execute(f'DROP INDEX "{name}"')
+        conn.execute(index_sql(name))
+    if analyze:
+        conn.execute("ANALYZE")
+    return created
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> List[str]:
+    """The steps of a query's plan (the detail column of EXPLAIN QUERY PLAN)."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def query_plans(conn: sqlite3.Connection, queries: Optional[Dict[str, str]] = None) -> Dict[str, List[str]]:
+    """The plan of each query, by name. Default is QUERIES."""
+    return {name: explain(conn, sql) for name, sql in (QUERIES if queries is None else queries).items()}
+
+
+def format_plans(plans: Dict[str, List[str]]) -> str:
+    """The plans as text, one query per block."""
+    return "\n\n".join(f"{name}:\n" + "\n".join(f"    {step}" for step in steps) for name, steps in plans.items())
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m scripts.warehouse_indexes",
+                                     description="List the query plans of the standard BI queries.")
+    parser.add_argument("--build", action="store_true", help="build the indexes and run ANALYZE first")
+    parser.add_argument("--db", type=pathlib.Path, default=DB_PATH, help=f"the warehouse (default: {DB_PATH})")
+    args = parser.parse_args(argv)
+
+    if not args.db.exists():
+        logger.error(f"{args.db} not found; run scripts/etl_to_dw.py first")
+        return 1
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.build:
+            created = build_indexes(conn)
+            conn.commit()
+            logger.info(f"Indexes created: {created or 'none (all present)'}; statistics updated")
+        print(format_plans(query_plans(conn)))
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+r"""
+tests/test_aggregates.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_aggregates.py
+    python3 tests\test_aggregates.py
+
+This test suite verifies that the aggregate tables refreshed from the changed sales
+rows equal aggregates rebuilt from the whole fact, that a dimension change rebuilds the
+aggregates that depend on it, and that the query router answers from the smallest
+suitable aggregate, by the row counts recorded at refresh, with the same result as the fact.
+"""
+
+import unittest
+import pathlib
+import sqlite3
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.aggregates import (  # noqa: E402
+    AGGREGATES,
+    STATE_TABLE,
+    AggregateRefresh,
+    _group_sql,
+    aggregate_sizes,
+    query_sales,
+    route,
+)
+from scripts.bulk_loader import load_pragmas  # noqa: E402
+from scripts.date_dimension import build_date_dim  # noqa: E402
+from scripts.etl_to_dw import create_schema  # noqa: E402
+from scripts.incremental_load import apply_diff, create_state_tables, diff_table  # noqa: E402
+
+rng = np.random.default_rng(7)
+customers = pd.DataFrame({'customer_id': [1001, 1002, 1003, 1004], 'region': ["East", "West", "East", "South"]})
+products = pd.DataFrame({'product_id': [101, 102, 103], 'category': ["Clothing", "Sports", "Electronics"]})
+date_dim = build_date_dim(pd.Timestamp("2024-01-01"), pd.Timestamp("2024-12-31"))
+dates = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 366, 300), "D")
+sales = pd.DataFrame({
+    'transaction_id': np.arange(1, 301),
+    'sale_date_key': dates.year * 10000 + dates.month * 100 + dates.day,
+    'customer_id': rng.choice(customers['customer_id'], 300),
+    'product_id': rng.choice(products['product_id'], 300),
+    'store_id': rng.integers(401, 406, 300),
+    'sale_amount': np.round(rng.random(300) * 100, 2),
+})
+
+# The next day: one sale changed amount, one changed store, one deleted, two added
+next_day = sales[sales['transaction_id'] != 3].copy()
+next_day.loc[next_day['transaction_id'] == 1, 'sale_amount'] = 500.0
+next_day.loc[next_day['transaction_id'] == 2, 'store_id'] = 409
+next_day = pd.concat([next_day, sales.head(2).assign(transaction_id=[301, 302])], ignore_index=True)
+
+KEYS = {'date_dim': "date_key", 'customers': "customer_id", 'products': "product_id", 'sales': "transaction_id"}
+
+
+class TestAggregates(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(pathlib.Path(self.tmp.name) / "dw.db")
+        create_schema(self.conn.cursor())
+        create_state_tables(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def load(self, sales_df, customers_df=customers):
+        """Load the tables as etl_to_dw.load_tables does, returning the aggregate refresh reports."""
+        with load_pragmas(self.conn):
+            refresh = AggregateRefresh(self.conn)
+            dimensions = {}
+            for table, df in (("date_dim", date_dim), ("customers", customers_df), ("products", products)):
+                dimensions[table] = diff_table(self.conn, table, df, KEYS[table])
+                apply_diff(self.conn, df, dimensions[table])
+            diff = diff_table(self.conn, "sales", sales_df, KEYS['sales'])
+            refresh.before_fact(diff, dimensions)
+            apply_diff(self.conn, sales_df, diff)
+            return refresh.after_fact(diff)
+
+    def assert_aggregates_match_fact(self):
+        for aggregate in AGGREGATES:
+            columns = list(aggregate.columns)
+            stored = pd.read_sql(f"SELECT * FROM {aggregate.name}", self.conn)
+            expected = pd.read_sql(_group_sql(aggregate), self.conn)
+            pd.testing.assert_frame_equal(stored.sort_values(columns, ignore_index=True),
+                                          expected.sort_values(columns, ignore_index=True),
+                                          check_dtype=False, atol=1e-6)
+            self.assertEqual(aggregate_sizes(self.conn)[aggregate.name], len(stored), "Recorded row count is stale")
+
+    def test_incremental_refresh_matches_rebuild(self):
+        first = self.load(sales)
+        self.assertEqual({report['mode'] for report in first.values()}, {"rebuild"})
+        reports = self.load(next_day)
+        self.assertEqual({report['mode'] for report in reports.values()}, {"incremental"})
+        self.assert_aggregates_match_fact()
+        unchanged = self.load(next_day)
+        self.assertEqual({report['groups'] for report in unchanged.values()}, {0})
+
+    def test_dimension_change_rebuilds_its_aggregates(self):
+        self.load(sales)
+        moved = customers.assign(region=customers['region'].replace({"South": "North"}))
+        reports = self.load(next_day, moved)
+        self.assertEqual(reports['agg_sales_month_region_category']['mode'], "rebuild")
+        self.assertEqual(reports['agg_sales_month_customer']['mode'], "incremental")
+        self.assert_aggregates_match_fact()
+
+    def test_router_uses_smallest_aggregate(self):
+        self.load(sales)
+        sizes = {aggregate.name: self.conn.execute(f"SELECT COUNT(*) FROM {aggregate.name}").fetchone()[0]
+                 for aggregate in AGGREGATES}
+        self.assertEqual(route(self.conn, ["year", "quarter"]).name, min(sizes, key=sizes.get))
+        self.assertEqual(route(self.conn, ["store_id"]).name, "agg_sales_day_product_store")
+        self.assertIsNone(route(self.conn, ["store_id", "region"]))
+        with self.assertRaises(ValueError):
+            route(self.conn, ["payment_type"])
+
+    def test_router_uses_recorded_row_counts(self):
+        self.load(sales)
+        self.conn.execute(f"UPDATE {STATE_TABLE} SET row_count = 0 "
+                          f"WHERE aggregate_name = 'agg_sales_day_product_store'")
+        self.assertEqual(route(self.conn, ["year"]).name, "agg_sales_day_product_store",
+                         "Router should choose by the row counts recorded at refresh")
+        self.conn.execute(f"DELETE FROM {STATE_TABLE} WHERE aggregate_name = 'agg_sales_day_product_store'")
+        self.assertIsNone(route(self.conn, ["store_id"]), "An aggregate with no recorded refresh should not be used")
+
+    def test_router_matches_fact(self):
+        self.load(sales)
+        questions = [
+            dict(group_by=["year", "quarter", "month"], measures=["total_sales", "sale_count"]),
+            dict(group_by=["customer_id"], filters={'quarter': [1, 2]}, order_by="total_sales", descending=True,
+                 limit=2),
+            dict(group_by=["store_id"], filters={'date_key': (20240301, 20240630)}, measures=["avg_sale"]),
+            dict(group_by=["store_id", "region"]),
+            dict(measures=["total_sales"]),
+        ]
+        for question in questions:
+            answer = query_sales(self.conn, **question)
+            from_fact = query_sales(self.conn, aggregates=(), **question)
+            self.assertEqual(from_fact.attrs['source'], "sales")
+            pd.testing.assert_frame_equal(answer, from_fact, check_dtype=False, atol=1e-6)
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
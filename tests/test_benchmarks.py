@@ -0,0 +1,52 @@
+r"""
+tests/test_benchmarks.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_benchmarks.py
+    python3 tests\test_benchmarks.py
+
+This test suite verifies that the benchmark suite covers every DataScrubber method
+and flags only the regressions beyond the threshold.
+"""
+
+import unittest
+import pathlib
+import sys
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.run_benchmarks import find_regressions, missing_scrubber_cases  # noqa: E402
+
+baseline = {
+    'profile@1000': {'seconds': 1.0, 'peak_bytes': 10_000_000},
+    'collect@1000': {'seconds': 1.0, 'peak_bytes': 10_000_000},
+    'inspect_data@1000': {'seconds': 0.001, 'peak_bytes': 1_000},
+}
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_every_scrubber_method_has_a_case(self):
+        self.assertEqual(missing_scrubber_cases(), [], "DataScrubber method without a benchmark case")
+
+    def test_regressions_beyond_threshold_fail(self):
+        results = {
+            'profile@1000': {'seconds': 1.5, 'peak_bytes': 10_000_000},      # 50% slower
+            'collect@1000': {'seconds': 1.1, 'peak_bytes': 20_000_000},      # 10% slower, twice the memory
+            'inspect_data@1000': {'seconds': 0.003, 'peak_bytes': 3_000},    # slower, but below the noise floor
+            'drop_columns@1000': {'seconds': 9.0, 'peak_bytes': 1},          # not in the baseline
+        }
+        regressions = find_regressions(results, baseline, threshold=0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('profile@1000'))
+        self.assertIn('peak', regressions[1])
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,111 @@
+r"""
+tests/test_bulk_loader.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_bulk_loader.py
+    python3 tests\test_bulk_loader.py
+
+This test suite verifies that bulk inserts store the same values as DataFrame.to_sql,
+that the load settings are restored afterwards, that a failed load is rolled back,
+that indexes dropped for a large load are rebuilt, and that upserts and deletes by key
+change only the rows given.
+"""
+
+import unittest
+import pathlib
+import sqlite3
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.bulk_loader import bulk_delete, bulk_insert, load_pragmas  # noqa: E402
+
+SALES_TABLE = """
+    CREATE TABLE sales (
+        transaction_id INTEGER PRIMARY KEY,
+        sale_date TEXT,
+        customer_id INTEGER,
+        sale_amount REAL,
+        payment_type TEXT
+    )
+"""
+
+sales = pd.DataFrame({
+    'transaction_id': [1, 2, 3, 4, 5],
+    'sale_date': pd.to_datetime(["2024-01-06", "2024-01-16", None, "2024-02-01", "2024-02-03"]),
+    'customer_id': pd.array([1008, None, 1004, 1001, 1002], dtype="Int64"),
+    'sale_amount': [39.1, 19.78, np.nan, 12.0, 8.5],
+    'payment_type': pd.array(["VISA", None, "Cash", "VISA", "MC"], dtype="str"),
+})
+
+
+def table_contents(conn, table):
+    return conn.execute(f"SELECT quote(transaction_id), quote(sale_date), quote(customer_id), quote(sale_amount), "
+                        f"quote(payment_type) FROM {table} ORDER BY transaction_id").fetchall()
+
+
+class TestBulkLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(pathlib.Path(self.tmp.name) / "dw.db")
+        self.conn.execute(SALES_TABLE)
+        self.conn.execute("CREATE INDEX idx_sales_customer ON sales (customer_id)")
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_same_values_as_to_sql(self):
+        with load_pragmas(self.conn):
+            report = bulk_insert(self.conn, "sales", sales, batch_size=2)
+        self.assertEqual(report['rows'], 5)
+        self.conn.execute(SALES_TABLE.replace("sales", "sales_to_sql"))
+        sales.to_sql("sales_to_sql", self.conn, if_exists="append", index=False)
+        self.assertEqual(table_contents(self.conn, "sales"), table_contents(self.conn, "sales_to_sql"))
+
+    def test_settings_are_restored(self):
+        before = [self.conn.execute(f"PRAGMA {name}").fetchone()[0] for name in ("journal_mode", "synchronous")]
+        with load_pragmas(self.conn):
+            self.assertEqual(self.conn.execute("PRAGMA synchronous").fetchone()[0], 0)
+            self.assertEqual(self.conn.execute("PRAGMA journal_mode").fetchone()[0], "memory")
+        after = [self.conn.execute(f"PRAGMA {name}").fetchone()[0] for name in ("journal_mode", "synchronous")]
+        self.assertEqual(after, before)
+
+    def test_failed_load_is_rolled_back(self):
+        bad = pd.concat([sales, sales.head(1)])  # duplicate primary key
+        with self.assertRaises(sqlite3.IntegrityError):
+            with load_pragmas(self.conn):
+                bulk_insert(self.conn, "sales", bad)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0], 0)
+
+    def test_indexes_are_rebuilt(self):
+        with load_pragmas(self.conn):
+            report = bulk_insert(self.conn, "sales", sales, rebuild_indexes=True)
+        self.assertEqual(report['indexes_rebuilt'], ["idx_sales_customer"])
+        indexes = self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+        self.assertEqual(indexes, [("idx_sales_customer",)])
+        self.assertEqual(self.conn.execute("PRAGMA integrity_check").fetchone()[0], "ok")
+
+    def test_upsert_and_delete(self):
+        with load_pragmas(self.conn):
+            bulk_insert(self.conn, "sales", sales)
+            changed = sales.iloc[[1]].assign(sale_amount=25.0)
+            bulk_insert(self.conn, "sales", changed, upsert_key="transaction_id")
+            deleted = bulk_delete(self.conn, "sales", "transaction_id", sales['transaction_id'].iloc[3:])
+        self.assertEqual(deleted, 2)
+        amounts = self.conn.execute("SELECT transaction_id, sale_amount FROM sales ORDER BY 1").fetchall()
+        self.assertEqual(amounts, [(1, 39.1), (2, 25.0), (3, None)])
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
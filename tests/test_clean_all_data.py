@@ -0,0 +1,135 @@
+r"""
+tests/test_clean_all_data.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_clean_all_data.py
+    python3 tests\test_clean_all_data.py
+
+This test suite verifies that the batch cleaner isolates a failing file from the
+others, retries only transient I/O errors, records every file in its manifest,
+cleans a file split into byte ranges as if it were read whole, and reports the
+rows each file stage read and wrote.
+"""
+
+import errno
+import functools
+import json
+import unittest
+import pathlib
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts import clean_all_data  # noqa: E402
+from scripts.pipeline_runner import run_pipeline  # noqa: E402
+from scripts.stage_cache import StageCache  # noqa: E402
+
+
+def run_in_process(stages, **kwargs):
+    """run_pipeline without a process pool, so the patched settings apply under any start method."""
+    return run_pipeline(stages, **{**kwargs, "parallel": False})
+
+
+class TestCleanAllData(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        folder = pathlib.Path(self.tmp.name)
+        self.raw, self.clean = folder / "raw", folder / "clean"
+        self.raw.mkdir()
+        self.clean.mkdir()
+        self.patches = [
+            mock.patch.object(clean_all_data, "RAW_DATA_DIR", self.raw),
+            mock.patch.object(clean_all_data, "CLEANED_DATA_DIR", self.clean),
+            mock.patch.object(clean_all_data, "MANIFEST_FILE", self.clean / "manifest.json"),
+            mock.patch.object(clean_all_data, "StageCache", functools.partial(StageCache, folder / "cache.json")),
+            mock.patch.object(clean_all_data, "RETRY_DELAY", 0),
+            mock.patch.object(clean_all_data, "MAX_WORKERS", 2),
+            mock.patch.object(clean_all_data, "run_pipeline", run_in_process),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.tmp.cleanup()
+
+    def test_failing_file_does_not_stop_the_others(self):
+        (self.raw / "good.csv").write_text("a,b\n1,2\n1,2\n3,\n")
+        (self.raw / "bad.csv").write_text("a,b\n1,2\n3,4,5\n")
+        (self.raw / "big.csv").write_text("a,b\n" + "".join(f"{i},{i % 3}\n" for i in range(300)) + "0,0\n")
+        with mock.patch.object(clean_all_data, "RANGE_SIZE", 1000):
+            self.assertEqual(clean_all_data.main(), 1)
+
+        manifest = json.loads((self.clean / "manifest.json").read_text())
+        files = {pathlib.Path(entry["file"]).name: entry for entry in manifest["files"]}
+        self.assertEqual((manifest["succeeded"], manifest["failed"]), (2, 1))
+        self.assertEqual(files["bad.csv"]["status"], "failed")
+        self.assertIn("Expected 2 fields", files["bad.csv"]["error"])
+        self.assertEqual((files["good.csv"]["rows_in"], files["good.csv"]["rows_out"]), (3, 2))
+        self.assertGreater(files["big.csv"]["ranges"], 1, "A large file should be parsed as byte ranges")
+        self.assertEqual(files["big.csv"]["rows_out"], 300, "Duplicates across ranges should be removed")
+        self.assertEqual((self.clean / "clean_good.csv").read_text(), "a,b\n1,2.0\n3,Unknown\n")
+
+    def test_split_file_matches_whole_file_read(self):
+        # Decimals only in the first range: later ranges must not be written as whole numbers
+        rows = [f"{i},{i % 3 if i != 5 else 0.5},{'x' if i % 7 else ''}\n" for i in range(300)]
+        big = self.raw / "big.csv"
+        big.write_text("a,b,c\n" + "".join(rows))
+        clean_all_data.clean_file(big)
+        whole = (self.clean / "clean_big.csv").read_bytes()
+        with mock.patch.object(clean_all_data, "RANGE_SIZE", 1000), ProcessPoolExecutor(max_workers=2) as executor:
+            counts = clean_all_data.clean_file(big, executor)
+        self.assertGreater(counts["ranges"], 1, "The file should be parsed as byte ranges")
+        self.assertEqual((self.clean / "clean_big.csv").read_bytes(), whole)
+
+    def test_split_file_is_read_with_declared_types(self):
+        # UnitPrice is declared float64: whole numbers in the first range must not make it int64
+        rows = [f"{100 + i},item{i},Toys,{i if i < 150 else i + 0.25}\n" for i in range(300)]
+        products = self.raw / "products_data.csv"
+        products.write_text("ProductID,ProductName,Category,UnitPrice\n" + "".join(rows))
+        clean_all_data.clean_file(products)
+        whole = (self.clean / "clean_products_data.csv").read_text()
+        with mock.patch.object(clean_all_data, "RANGE_SIZE", 1000), ProcessPoolExecutor(max_workers=2) as executor:
+            counts = clean_all_data.clean_file(products, executor)
+        self.assertGreater(counts["ranges"], 1, "The file should be parsed as byte ranges")
+        self.assertEqual((self.clean / "clean_products_data.csv").read_text(), whole)
+        self.assertIn("100,item0,Toys,0.0\n", whole, "Declared float column written as whole numbers")
+
+    def test_stage_report_counts_rows(self):
+        (self.raw / "small.csv").write_text("a,b\n1,2\n1,2\n3,\n")
+        (self.raw / "big.csv").write_text("a,b\n" + "".join(f"{i},{i % 3}\n" for i in range(300)) + "0,0\n")
+        with mock.patch.object(clean_all_data, "RANGE_SIZE", 1000):
+            for name, split, rows_in, rows_out in [("small.csv", False, 3, 2), ("big.csv", True, 301, 300)]:
+                with self.subTest(file=name):
+                    stages = clean_all_data.build_stages([self.raw / name], split=split)
+                    result = run_in_process(stages)[f"clean_all_data:{name}"]
+                    if split:
+                        self.assertGreater(result.value["ranges"], 1, "The file should be parsed as byte ranges")
+                    self.assertEqual((result.rows_in, result.rows_out), (rows_in, rows_out),
+                                     "Stage report disagrees with the rows read and written")
+
+    def test_transient_errors_are_retried(self):
+        counts = {"rows_in": 1, "rows_out": 1, "ranges": 0}
+        with mock.patch.object(clean_all_data, "clean_file",
+                               side_effect=[OSError(errno.EIO, "I/O error"), TimeoutError(), counts]) as clean:
+            self.assertEqual(clean_all_data.process_file(self.raw / "sales.csv"), {**counts, "attempts": 3})
+            self.assertEqual(clean.call_count, 3)
+        with mock.patch.object(clean_all_data, "clean_file", side_effect=FileNotFoundError("gone")) as clean:
+            with self.assertRaises(FileNotFoundError):
+                clean_all_data.process_file(self.raw / "sales.csv")
+            self.assertEqual(clean.call_count, 1, "Missing files should not be retried")
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
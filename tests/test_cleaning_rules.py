@@ -0,0 +1,151 @@
+r"""
+tests/test_cleaning_rules.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_cleaning_rules.py
+    python3 tests\test_cleaning_rules.py
+
+This test suite verifies that declarative rule specs are loaded for every dataset,
+that a rule set cleans data in one pass, including named row rules across columns,
+and that rejected rows, including rows with unknown foreign keys, are kept
+with their reason codes. It also checks that a cached prepare stage runs again
+when one of the files it wrote is missing, and that the keys of referenced tables
+are not counted as input rows.
+"""
+
+import json
+import unittest
+import pathlib
+import sys
+import tempfile
+from unittest import mock
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.data_preparation import cleaning_rules, polished_data  # noqa: E402
+from scripts.data_preparation.cleaning_rules import (  # noqa: E402
+    RuleSet,
+    available_datasets,
+    clean_with_rejects,
+    clean_with_rules,
+    load_rule_set,
+)
+from scripts.pipeline_runner import run_pipeline  # noqa: E402
+from scripts.referential_integrity import KeySet  # noqa: E402
+from scripts.stage_cache import StageCache  # noqa: E402
+from scripts.stage_metrics import measure  # noqa: E402
+from scripts.storage import dtypes_path, write_table  # noqa: E402
+
+orders_spec = {
+    'dataset': 'orders',
+    'input_file': 'data/dirty_data/dirty_orders_data.csv',
+    'output_file': 'data/_prepared/orders_data_prepared.csv',
+    'columns': {
+        'OrderID': {'dtype': 'int', 'nullable': False, 'min': 1},
+        'Quantity': {'dtype': 'int', 'nullable': False, 'min': 1},
+        'UnitPrice': {'dtype': 'float', 'nullable': False},
+        'Total': {'dtype': 'float'},
+    },
+    'rules': {'total_matches': 'abs(Total - Quantity * UnitPrice) < 0.01'},
+}
+
+orders = pd.DataFrame({
+    'OrderID': ["1", "2", "2", "3", "4", "x"],
+    'Quantity': ["2", "1", "1", "0", "3", "1"],
+    'UnitPrice': ["5.0", "3.5", "3.5", "1", "2", "1"],
+    'Total': ["10.0", "3.5", "3.5", "0", "7", "1"],
+})
+
+
+def write_orders_spec(folder, **changes):
+    """Write the dirty orders and their rule spec to folder (rules in folder/rules); returns the spec."""
+    (folder / "rules").mkdir()
+    dirty = folder / "dirty_orders_data.csv"
+    orders.to_csv(dirty, index=False)
+    spec = {**orders_spec, 'input_file': str(dirty), 'output_file': str(folder / "orders_data_prepared.csv"),
+            **changes}
+    (folder / "rules" / "orders.json").write_text(json.dumps(spec))
+    return spec
+
+
+class TestCleaningRules(unittest.TestCase):
+
+    def test_every_prepare_dataset_has_rules(self):
+        self.assertTrue({'customers', 'products', 'sales'} <= set(available_datasets()))
+        customers = load_rule_set('customers')
+        self.assertEqual(customers.schema['Region'].allowed, frozenset({'East', 'West', 'North', 'South'}))
+        self.assertEqual(customers.schema['CustomerID'].max, 1100)
+
+    def test_new_dataset_from_spec_only(self):
+        rule_set = RuleSet.from_dict(orders_spec)
+        cleaned = clean_with_rules(orders, rule_set)
+        self.assertEqual(cleaned['OrderID'].tolist(), [1, 2], "Duplicate, invalid, and rule-breaking rows not removed")
+
+    def test_row_rules_combine_with_column_rules(self):
+        rule_set = RuleSet.from_dict({**orders_spec, 'rules': {}})
+        self.assertEqual(clean_with_rules(orders, rule_set)['OrderID'].tolist(), [1, 2, 4],
+                         "Without the row rule only the column rules should apply")
+
+    def test_rejected_rows_are_quarantined_with_reasons(self):
+        result = clean_with_rejects(orders, RuleSet.from_dict(orders_spec))
+        self.assertEqual(result.rejected['RejectReason'].tolist(),
+                         ['duplicate', 'Quantity:below_min', 'rule:total_matches', 'OrderID:unparseable'])
+        self.assertEqual(result.rejected['OrderID'].tolist(), ["2", "3", "4", "x"], "Original values not kept")
+        self.assertEqual(result.summary('orders'),
+                         {'dataset': 'orders', 'rows_in': 6, 'rows_out': 2,
+                          'rejected': {'duplicate': 1, 'OrderID:unparseable': 1, 'Quantity:below_min': 1,
+                                       'rule:total_matches': 1}})
+
+    def test_orphan_keys_are_quarantined(self):
+        rule_set = RuleSet.from_dict({**orders_spec, 'rules': {}, 'references': {'OrderID': 'orders'}})
+        self.assertEqual(rule_set.references, {'OrderID': 'orders'})
+        result = clean_with_rejects(orders, rule_set, {'OrderID': KeySet([1, 4])})
+        self.assertEqual(result.clean['OrderID'].tolist(), [1, 4])
+        self.assertEqual(result.reason_counts.get('OrderID:orphan'), 1)
+        self.assertEqual(result.rejected.loc[result.rejected['RejectReason'] == 'OrderID:orphan', 'OrderID'].tolist(),
+                         ["2"], "Orphans should keep their original values")
+
+    def test_cached_stage_runs_again_when_an_output_is_missing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = pathlib.Path(tmp)
+            spec = write_orders_spec(folder)
+            with mock.patch.object(cleaning_rules, "RULES_DIR", folder / "rules"), \
+                    mock.patch.object(cleaning_rules, "QUARANTINE_DIR", folder / "quarantine"):
+                cache = StageCache(folder / "cache.json")
+                run_pipeline(polished_data.build_stages(), parallel=False, cache=cache)
+                self.assertTrue(run_pipeline(polished_data.build_stages(), parallel=False,
+                                             cache=cache)["prepare_orders"].cached, "Unchanged stage not skipped")
+
+                types_file = dtypes_path(spec['output_file'])
+                self.assertIn(types_file, load_rule_set("orders").written_files)
+                types_file.unlink()
+                result = run_pipeline(polished_data.build_stages(), parallel=False, cache=cache)["prepare_orders"]
+                self.assertFalse(result.cached, "Stage skipped although one of its files is missing")
+                self.assertEqual(result.value, 2)
+                self.assertTrue(types_file.exists(), "Missing file not written again")
+
+    def test_reference_keys_are_not_counted_as_rows_in(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = pathlib.Path(tmp)
+            write_orders_spec(folder, rules={}, references={'OrderID': 'order_keys'})
+            keys_spec = {'dataset': 'order_keys', 'input_file': str(folder / "keys.csv"),
+                         'output_file': str(folder / "order_keys_prepared.csv"), 'columns': {}}
+            (folder / "rules" / "order_keys.json").write_text(json.dumps(keys_spec))
+            write_table(pd.DataFrame({'OrderID': range(1, 100)}), keys_spec['output_file'], fmt="csv")
+            with mock.patch.object(cleaning_rules, "RULES_DIR", folder / "rules"), \
+                    mock.patch.object(cleaning_rules, "QUARANTINE_DIR", folder / "quarantine"), \
+                    measure() as metrics:
+                rows = cleaning_rules.prepare_by_name("orders")
+            self.assertEqual(metrics['rows_in'], len(orders), "Reference keys counted as input rows")
+            self.assertEqual(metrics['rows_out'], rows)
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,96 @@
+r"""
+tests/test_column_schema.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_column_schema.py
+    python3 tests\test_column_schema.py
+
+This test suite verifies that DataScrubber.apply_schema converts every column of a dataset
+schema and removes the rows that break any of its rules with a single combined mask.
+"""
+
+import unittest
+import pathlib
+import sys
+import numpy as np
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts import column_schema  # noqa: E402
+from scripts.column_schema import ColumnSpec, convert_columns  # noqa: E402
+from scripts.data_scrubber import DataScrubber  # noqa: E402
+
+products = pd.DataFrame({
+    'ProductID': ["101", "102", "abc", "103", "250", None],
+    'ProductName': [" laptop", "hoodie ", "cable", "  ", "tent", "ball"],
+    'Category': ["electronics", " Clothing", "Electronics", "sports", "Sports", "toys"],
+    'UnitPrice': ["793.12", "39.10", "5", "-1", "80", "10"],
+    'InStock': ["yes", "no", "Y", "true", "0", "maybe"],
+})
+
+schema = {
+    'ProductID': ColumnSpec('int', nullable=False, min=100, max=200),
+    'ProductName': ColumnSpec('string', nullable=False, transforms=('strip',)),
+    'Category': ColumnSpec('category', nullable=False, transforms=('strip', 'capitalize'),
+                           allowed={'Electronics', 'Clothing', 'Sports'}),
+    'UnitPrice': {'dtype': 'float', 'nullable': False, 'min': 0.1},
+    'InStock': ColumnSpec('bool'),
+}
+
+
+class TestColumnSchema(unittest.TestCase):
+
+    def test_apply_schema_converts_and_filters_once(self):
+        scrubber = DataScrubber(products.copy())
+        df = scrubber.apply_schema(schema)
+        self.assertEqual(df['ProductID'].tolist(), [101, 102], "Only rows passing every rule should remain")
+        self.assertEqual(str(df['ProductID'].dtype), "Int64")
+        self.assertEqual(df['ProductName'].tolist(), ["laptop", "hoodie"])
+        self.assertIsInstance(df['Category'].dtype, pd.CategoricalDtype, "Category not converted to categorical")
+        self.assertEqual(df['UnitPrice'].dtype, np.float64)
+        self.assertEqual(df['InStock'].tolist(), [True, False])
+        self.assertEqual(scrubber.schema_report,
+                         {'ProductID': 3, 'ProductName': 1, 'Category': 1, 'UnitPrice': 1, 'InStock': 0},
+                         "Invalid rows not counted per column")
+
+    def test_rejected_rows_get_reason_codes(self):
+        scrubber = DataScrubber(products.copy())
+        scrubber.apply_schema(schema)
+        self.assertEqual(scrubber.rejections.astype(str).to_dict(),
+                         {2: 'ProductID:unparseable', 3: 'ProductName:missing', 4: 'ProductID:above_max',
+                          5: 'ProductID:missing'}, "Each rejected row should get its first failed check")
+        validation = column_schema.validate(pd.DataFrame({'Price': [0.5, 5.0, None, 0.0]}),
+                                            {'Price': ColumnSpec('float', nullable=False, min=0.1, max=1)})
+        self.assertEqual(validation.reasons.tolist(), [np.nan, 'Price:above_max', 'Price:missing', 'Price:below_min'])
+        self.assertEqual(validation.reason_counts, {'Price:missing': 1, 'Price:below_min': 1, 'Price:above_max': 1})
+
+    def test_lazy_schema_matches_eager(self):
+        eager = DataScrubber(products.copy()).apply_schema(schema)
+        lazy = DataScrubber(products.copy(), lazy=True).apply_schema(schema).drop_columns(['InStock']).collect()
+        pd.testing.assert_frame_equal(lazy, eager.drop(columns=['InStock']))
+
+    def test_parallel_conversion_matches_sequential(self):
+        large = pd.concat([products] * 10, ignore_index=True)
+        sequential = convert_columns(large, column_schema.parse_schema(schema), max_workers=1)
+        original = column_schema.PARALLEL_MIN_ROWS
+        column_schema.PARALLEL_MIN_ROWS = 0
+        try:
+            parallel = convert_columns(large, column_schema.parse_schema(schema), max_workers=4)
+        finally:
+            column_schema.PARALLEL_MIN_ROWS = original
+        pd.testing.assert_frame_equal(parallel, sequential)
+
+    def test_unknown_type_rejected(self):
+        with self.assertRaises(ValueError):
+            ColumnSpec('decimal')
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
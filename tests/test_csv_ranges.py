@@ -0,0 +1,81 @@
+r"""
+tests/test_csv_ranges.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_csv_ranges.py
+    python3 tests\test_csv_ranges.py
+
+This test suite verifies that a CSV file split into byte ranges of whole records,
+parsed in parallel, gives the same rows, in the same order, as reading it in one go,
+also when quoted fields contain line breaks and quotes.
+"""
+
+import unittest
+import pathlib
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.csv_ranges import iter_ranges, read_header, split_ranges  # noqa: E402
+
+sales = pd.DataFrame({
+    'TransactionID': range(1, 201),
+    'Region': ["East", "West", "North", "South"] * 50,
+    'SaleAmount': [round(i * 1.25, 2) for i in range(200)],
+})
+
+
+class TestCsvRanges(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmp.name) / "sales.csv"
+        sales.to_csv(self.path, index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_ranges_cover_whole_lines(self):
+        columns, data_start = read_header(self.path)
+        self.assertEqual(columns, list(sales.columns))
+        ranges = split_ranges(self.path, range_size=500)
+        self.assertGreater(len(ranges), 1)
+        self.assertEqual(ranges[0][0], data_start)
+        self.assertEqual(ranges[-1][1], self.path.stat().st_size)
+        data = self.path.read_bytes()
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start, "Ranges should leave no gaps")
+            self.assertEqual(data[end - 1:end], b"\n", "Ranges should end at a line break")
+
+    def test_parallel_ranges_match_whole_file(self):
+        ranges = split_ranges(self.path, range_size=700)
+        for executor in (ThreadPoolExecutor(2), ProcessPoolExecutor(2)):
+            with executor:
+                chunks = list(iter_ranges(self.path, ranges, executor, max_pending=2))
+            self.assertEqual(len(chunks), len(ranges))
+            pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), pd.read_csv(self.path))
+
+    def test_line_breaks_in_quoted_fields(self):
+        notes = sales.assign(Note=['said "hi"\nthen left, quickly' if i % 3 else "plain" for i in range(200)])
+        notes.to_csv(self.path, index=False)
+        for range_size in (1, 90, 1000):
+            with ThreadPoolExecutor(2) as executor:
+                chunks = list(iter_ranges(self.path, split_ranges(self.path, range_size), executor))
+            pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), notes)
+        self.assertEqual(len(split_ranges(self.path, parts=4)), 4)
+
+    def test_small_file_is_one_range(self):
+        self.assertEqual(len(split_ranges(self.path)), 1)
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
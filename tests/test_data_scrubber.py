@@ -10,6 +10,7 @@ Activate your virtual environment if needed, and run one of the following comman
 This test suite verifies that each function in the DataScrubber class works as expected.
 """
 
+import json
 import unittest
 import pathlib
 import sys
@@ -93,6 +94,15 @@ class TestDataScrubber(unittest.TestCase):
         info, describe = self.scrubber.inspect_data()
         self.assertIsNotNone(info, "DataFrame info should not be None")
         self.assertIsNotNone(describe, "DataFrame description should not be None")
+        self.assertEqual(describe, df.describe().to_string(), "Description not in the layout of DataFrame.describe()")
+
+    def test_inspect_data_after_cleaning_matches_describe(self):
+        self.scrubber.profile()  # cached, then updated by the eager steps below
+        self.scrubber.filter_column_outliers('Score', 10, 25)
+        self.scrubber.remove_duplicate_records()
+        describe = self.scrubber.inspect_data()[1]
+        self.assertIn("25%", describe, "Percentiles missing from the description")
+        self.assertEqual(describe, self.scrubber.df.describe().to_string(), "Stale percentiles after cleaning")
 
     def test_parse_dates_to_add_standard_datetime(self):
         df_parsed = self.scrubber.parse_dates_to_add_standard_datetime('Date')
@@ -112,6 +122,139 @@ class TestDataScrubber(unittest.TestCase):
         df_reordered = self.scrubber.reorder_columns(['Name', 'ID', 'Date'])
         self.assertEqual(df_reordered.columns.tolist(), ['Name', 'ID', 'Date'], "Columns not reordered correctly")
 
+    def test_lazy_mode_defers_until_collect(self):
+        lazy_scrubber = DataScrubber(df.copy(), lazy=True)
+        result = lazy_scrubber.filter_column_outliers('Score', 10, 25)
+        self.assertIs(result, lazy_scrubber, "Lazy methods should return the scrubber for chaining")
+        self.assertEqual(len(lazy_scrubber.df), len(df), "Lazy mode should not touch the data before collect()")
+        df_collected = lazy_scrubber.collect()
+        self.assertLessEqual(df_collected['Score'].max(), 25, "Outliers not filtered on collect()")
+        self.assertEqual(lazy_scrubber.plan, [], "Plan not cleared after collect()")
+
+    def test_lazy_mode_matches_eager_results(self):
+        def chain(scrubber):
+            scrubber.parse_dates_to_add_standard_datetime('Date')
+            scrubber.format_column_strings_to_upper_and_trim('Name')
+            scrubber.handle_missing_data(fill_value=0)
+            scrubber.filter_column_outliers('Score', 0, 25)
+            scrubber.remove_duplicate_records()
+            scrubber.filter_column_outliers('ID', 2, 10)
+            scrubber.drop_columns(['Date'])
+            return scrubber.collect()
+
+        eager = chain(DataScrubber(df.copy()))
+        lazy = chain(DataScrubber(df.copy(), lazy=True))
+        pd.testing.assert_frame_equal(lazy, eager)
+
+    def test_lazy_mode_matches_eager_when_dedup_follows_filter(self):
+        def chain(scrubber):
+            scrubber.filter_column_outliers('A', 0, 10)
+            scrubber.drop_columns(['A'])
+            scrubber.remove_duplicate_records()
+            return scrubber.collect()
+
+        data = pd.DataFrame({'A': [100, 5], 'B': [1, 1]})
+        eager = chain(DataScrubber(data.copy()))
+        lazy = chain(DataScrubber(data.copy(), lazy=True))
+        self.assertEqual(len(eager), 1)
+        pd.testing.assert_frame_equal(lazy, eager)
+
+    def test_lazy_mode_fuses_filters_and_pushes_projections(self):
+        lazy_scrubber = DataScrubber(df.copy(), lazy=True)
+        lazy_scrubber.format_column_strings_to_lower_and_trim('Name')
+        lazy_scrubber.filter_column_outliers('Score', 10, 25)
+        lazy_scrubber.parse_dates_to_add_standard_datetime('Date')
+        lazy_scrubber.drop_columns(['StandardDateTime', 'Date'])
+        plan = lazy_scrubber.explain()
+        self.assertNotIn('parse_dates_to_add_standard_datetime', plan, "Dead date parsing not removed from plan")
+        self.assertTrue(plan.splitlines()[-1].strip().startswith('format_column_strings_to_lower_and_trim'),
+                        "Filter and drop not pushed ahead of string formatting")
+        self.assertNotIn('[fused #2]', plan, "Filter and drop not fused into a single pass")
+        df_collected = lazy_scrubber.collect()
+        self.assertEqual(df_collected.columns.tolist(), ['ID', 'Name', 'Score'], "Columns not dropped correctly")
+        self.assertTrue(df_collected['Name'].str.islower().all(), "Strings not formatted on collect()")
+
+    def test_lazy_mode_raises_like_eager_for_dropped_transform_input(self):
+        def chain(scrubber):
+            scrubber.parse_dates_to_add_standard_datetime('Missing')
+            scrubber.drop_columns(['StandardDateTime'])
+            return scrubber.collect()
+
+        for lazy in (False, True):
+            with self.subTest(lazy=lazy), self.assertRaises(KeyError):
+                chain(DataScrubber(df.copy(), lazy=lazy))
+
+    def test_lazy_mode_does_not_modify_input(self):
+        original = df.copy()
+        lazy_scrubber = DataScrubber(original, lazy=True)
+        lazy_scrubber.format_column_strings_to_upper_and_trim('Name')
+        lazy_scrubber.collect()
+        pd.testing.assert_frame_equal(original, df)
+
+    def test_profile_single_pass_statistics(self):
+        profile = self.scrubber.profile()
+        self.assertEqual(profile.row_count, 6, "Row count not profiled correctly")
+        self.assertEqual(profile.duplicate_count, 0, "Duplicate count not profiled correctly")
+        self.assertEqual(profile.columns['Score'].null_count, 1, "Null count not profiled correctly")
+        self.assertAlmostEqual(profile.columns['Score'].std, df['Score'].std(), msg="Std not profiled correctly")
+        self.assertEqual(profile.columns['Name'].distinct, 4, "Distinct values not profiled correctly")
+        self.assertIs(self.scrubber.profile(), profile, "Profile should be cached on the scrubber")
+        self.assertEqual(json.loads(profile.to_json())['columns']['ID']['max'], 5, "Profile not emitted as JSON")
+
+    def test_profile_updated_incrementally_after_cleaning(self):
+        self.scrubber.profile()
+        self.scrubber.handle_missing_data(fill_value=0)
+        self.scrubber.filter_column_outliers('Score', 10, 25)
+        self.scrubber.drop_columns(['Score'])
+        self.scrubber.remove_duplicate_records()
+        self.scrubber.format_column_strings_to_upper_and_trim('Name')
+        self.scrubber.rename_columns({'ID': 'Identifier'})
+        incremental = self.scrubber.profile().to_dict()
+        fresh = DataScrubber(self.scrubber.df).profile().to_dict()
+        incremental['memory_bytes'] = fresh['memory_bytes'] = None
+        self.assertEqual(incremental, fresh, "Incrementally updated profile differs from a fresh profile")
+
+    def test_compact_memory(self):
+        wide = pd.DataFrame({
+            'ID': [1001.0, 1002.0, 1003.0, 1004.0],
+            'Region': ['East', 'West', 'East', 'East'],
+            'Price': [0.5, 1.25, 2.0, 3.5],
+            'Amount': [39.1, 19.78, 335.1, 195.5],
+        })
+        scrubber = DataScrubber(wide.copy())
+        df_compact = scrubber.compact_memory()
+        self.assertEqual(str(df_compact['ID'].dtype), 'float32', "Whole-number floats should stay floats")
+        self.assertIsInstance(df_compact['Region'].dtype, pd.CategoricalDtype, "Low-cardinality text not categorical")
+        self.assertEqual(str(df_compact['Price'].dtype), 'float32', "Lossless float32 downcast not applied")
+        self.assertEqual(str(df_compact['Amount'].dtype), 'float64', "Lossy float32 downcast should be skipped")
+        report = scrubber.compaction_report
+        self.assertLess(report['bytes_after'], report['bytes_before'], "Memory use not reduced")
+        pd.testing.assert_frame_equal(df_compact.astype(wide.dtypes), wide)
+        nullable = DataScrubber(wide.copy()).compact_memory(nullable_ints=True)
+        self.assertEqual(str(nullable['ID'].dtype), 'Int32', "Whole-number floats not turned into nullable integers")
+
+    def test_arithmetic_on_compacted_frame_does_not_overflow(self):
+        products = pd.DataFrame({'ProductID': [101, 108, 120], 'Quantity': [1, 100, 127],
+                                 'UnitPrice': [2.5, 1.0, 4.0]})
+        compact = DataScrubber(products.copy()).compact_memory()
+        self.assertEqual((compact['ProductID'] * 2).tolist(), [202, 216, 240], "Compact integers overflowed")
+        pd.testing.assert_series_equal(compact.eval('Quantity * Quantity + ProductID'),
+                                       products.eval('Quantity * Quantity + ProductID'), check_dtype=False)
+        scrubber = DataScrubber(products.copy())
+        scrubber.compact_memory()
+        df_valid = scrubber.apply_schema({'Quantity': {'dtype': 'int'}}, rules={'big_order': 'Quantity * Quantity > 1000'})
+        self.assertEqual(df_valid['ProductID'].tolist(), [108, 120], "Row rule evaluated with overflowed values")
+
+    def test_compact_types_kept_by_later_steps(self):
+        self.scrubber.compact_memory(category_ratio=0.9)
+        self.scrubber.format_column_strings_to_upper_and_trim('Name')
+        self.scrubber.handle_missing_data(fill_value=0)
+        df_cleaned = self.scrubber.remove_duplicate_records()
+        self.assertIsInstance(df_cleaned['Name'].dtype, pd.CategoricalDtype, "Categorical lost by string formatting")
+        self.assertEqual(df_cleaned['Name'].tolist(), ['ALICE', 'BOB', 'CHARLIE', 'ALICE', 'EVE', 'EVE'])
+        self.assertEqual(str(df_cleaned['ID'].dtype), 'int32', "Downcast integers lost by later steps")
+        self.assertEqual(self.scrubber.profile().columns['ID'].dtype, 'int32', "Profile dtypes not refreshed")
+
 
 # Run the tests with verbosity=2 for detailed output
 if __name__ == "__main__":
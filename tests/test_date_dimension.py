@@ -0,0 +1,62 @@
+r"""
+tests/test_date_dimension.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_date_dimension.py
+    python3 tests\test_date_dimension.py
+
+This test suite verifies the yyyymmdd date keys, the calendar and fiscal attributes
+of the date dimension, and that the dimension spans whole years of the keys given.
+"""
+
+import unittest
+import pathlib
+import sys
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.date_dimension import DATE_DIM_COLUMNS, build_date_dim, calendar_range, date_keys  # noqa: E402
+
+
+class TestDateDimension(unittest.TestCase):
+
+    def test_date_keys(self):
+        keys = date_keys(pd.Series(["11/11/2021", "2/14/2023", None, "not a date"]))
+        self.assertEqual(str(keys.dtype), "Int64")
+        self.assertEqual(keys.tolist(), [20211111, 20230214, pd.NA, pd.NA])
+        self.assertEqual(date_keys(pd.Series(pd.to_datetime(["2024-01-06"]))).tolist(), [20240106])
+
+    def test_calendar_attributes(self):
+        dim = build_date_dim(pd.Timestamp("2024-06-30"), pd.Timestamp("2024-07-01")).set_index("date_key")
+        self.assertEqual(list(dim.reset_index().columns), DATE_DIM_COLUMNS)
+        sunday, monday = dim.loc[20240630], dim.loc[20240701]
+        self.assertEqual((sunday['full_date'], sunday['quarter'], sunday['day_of_week'], sunday['is_weekend']),
+                         ("2024-06-30", 2, 7, 1))
+        self.assertEqual((monday['month_name'], monday['week_of_year'], monday['day_of_week']), ("July", 27, 1))
+
+    def test_fiscal_year(self):
+        dim = build_date_dim(pd.Timestamp("2024-06-30"), pd.Timestamp("2024-07-01"),
+                             fiscal_year_start_month=7).set_index("date_key")
+        fiscal = dim[['fiscal_year', 'fiscal_quarter', 'fiscal_month']]
+        self.assertEqual(fiscal.loc[20240630].tolist(), [2024, 4, 12])
+        self.assertEqual(fiscal.loc[20240701].tolist(), [2025, 1, 1])
+        calendar = build_date_dim(pd.Timestamp("2024-06-30"), pd.Timestamp("2024-06-30"), fiscal_year_start_month=1)
+        self.assertEqual(calendar[['fiscal_year', 'fiscal_quarter', 'fiscal_month']].iloc[0].tolist(), [2024, 2, 6])
+
+    def test_calendar_range(self):
+        start, end = calendar_range(pd.Series([20240106, None], dtype="Int64"), pd.Series([20211111]))
+        self.assertEqual((start, end), (pd.Timestamp("2021-01-01"), pd.Timestamp("2024-12-31")))
+        self.assertEqual(len(build_date_dim(start, end)), 1461)
+        self.assertEqual(calendar_range(pd.Series([], dtype="Int64")), (None, None))
+        self.assertTrue(build_date_dim(None, None).empty)
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
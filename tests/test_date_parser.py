@@ -0,0 +1,70 @@
+r"""
+tests/test_date_parser.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_date_parser.py
+    python3 tests\test_date_parser.py
+
+This test suite verifies that the DateParser class detects the dominant date format,
+sends only the non-matching values to the fallback, memoizes repeated dates,
+and reports values it could not parse.
+"""
+
+import unittest
+import pathlib
+import sys
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.data_scrubber import DataScrubber  # noqa: E402
+from scripts.date_parser import DateParser, detect_format  # noqa: E402
+
+sale_dates = pd.Series(["1/6/2024", "1/16/2024", "1/6/2024", "2024-02-03", None, "not a date", "12/31/2023"])
+
+
+class TestDateParser(unittest.TestCase):
+
+    def test_detects_dominant_format(self):
+        self.assertEqual(detect_format(["1/6/2024", "1/16/2024", "2024-02-03"]), "%m/%d/%Y")
+        self.assertEqual(detect_format(["2024-02-03", "2023-12-31"]), "%Y-%m-%d")
+        self.assertIsNone(detect_format(["not a date"]), "No format should match")
+
+    def test_parses_fast_path_and_residue(self):
+        parser = DateParser()
+        parsed = parser.parse(sale_dates)
+        expected = pd.to_datetime(pd.Series(["2024-01-06", "2024-01-16", "2024-01-06", "2024-02-03",
+                                             None, None, "2023-12-31"])).astype("datetime64[ns]")
+        pd.testing.assert_series_equal(parsed, expected)
+        report = parser.last_report
+        self.assertEqual(report['format'], "%m/%d/%Y")
+        self.assertEqual(report['distinct'], 5, "Each distinct date string should be parsed once")
+        self.assertEqual((report['fast_path'], report['fallback']), (3, 1), "Only the residue should fall back")
+        self.assertEqual((report['missing'], report['failed']), (1, 1), "Coerced failures not reported")
+
+    def test_repeated_dates_come_from_cache(self):
+        parser = DateParser()
+        parser.parse(sale_dates)
+        parser.parse(pd.Series(["1/6/2024", "3/1/2024"]))
+        self.assertEqual(parser.last_report['cache_hits'], 1, "Previously parsed date not memoized")
+
+    def test_explicit_format_without_fallback(self):
+        parser = DateParser("%Y-%m-%d", fallback=False)
+        parsed = parser.parse(sale_dates)
+        self.assertEqual(parsed.notna().sum(), 1, "Only values in the explicit format should parse")
+
+    def test_scrubber_reports_date_parsing(self):
+        scrubber = DataScrubber(pd.DataFrame({'SaleDate': sale_dates}))
+        df = scrubber.parse_dates_to_add_standard_datetime('SaleDate')
+        self.assertEqual(df['StandardDateTime'].notna().sum(), 5)
+        self.assertEqual(scrubber.date_report['failed'], 1)
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
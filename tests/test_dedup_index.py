@@ -0,0 +1,112 @@
+r"""
+tests/test_dedup_index.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_dedup_index.py
+    python3 tests\test_dedup_index.py
+
+This test suite verifies that the RowHashIndex class removes duplicates across runs
+and remembers only the rows the cleaning keeps.
+"""
+
+import unittest
+import pathlib
+import sys
+import tempfile
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.data_scrubber import DataScrubber  # noqa: E402
+from scripts.dedup_index import RowHashIndex  # noqa: E402
+from scripts.row_hashing import hash_rows  # noqa: E402
+from scripts.streaming_scrubber import StreamingScrubber  # noqa: E402
+
+day_one = pd.DataFrame({'ID': [1, 2, 2, 3], 'Name': ['Alice', 'Bob', 'Bob', 'Charlie']})
+day_two = pd.DataFrame({'ID': [3.0, 4.0, 5.0, 4.0], 'Name': ['Charlie', 'Dan', 'Eve', 'Dan']})
+
+
+class TestRowHashIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index_dir = pathlib.Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hash_rows_ignores_int_float_inference(self):
+        self.assertEqual(hash_rows(day_one.iloc[[3]]).tolist(), hash_rows(day_two.iloc[[0]]).tolist(),
+                         "Same values should hash the same regardless of int/float dtype")
+
+    def test_duplicates_removed_across_runs(self):
+        index = RowHashIndex.for_dataset('customers', self.index_dir)
+        scrubber = DataScrubber(day_one.copy())
+        scrubber.remove_duplicate_records(index=index)
+        first = scrubber.collect()
+        index.save()
+        self.assertEqual(first['ID'].tolist(), [1, 2, 3], "In-batch duplicates not removed")
+
+        reopened = RowHashIndex.for_dataset('customers', self.index_dir)
+        self.assertEqual(len(reopened), 3, "Index not persisted")
+        second = DataScrubber(day_two.copy()).remove_duplicate_records(index=reopened)
+        self.assertEqual(second['ID'].tolist(), [4.0, 5.0], "Rows from an earlier run not removed")
+
+    def test_rows_rejected_after_dedup_are_not_indexed(self):
+        batch = pd.DataFrame({'ID': [1, 2, 2, 3, 4], 'Name': ['Alice', 'Bob', 'Bob', None, 'Dan']})
+
+        def clean(scrubber, index):
+            scrubber.remove_duplicate_records(index=index)
+            scrubber.format_column_strings_to_upper_and_trim('Name')  # a transform between dedup and the filters
+            scrubber.handle_missing_data(drop=True)
+            scrubber.filter_column_outliers('ID', 1, 3)
+            return scrubber.collect()
+
+        for mode, scrubber in [('eager', DataScrubber(batch.copy())),
+                               ('lazy', DataScrubber(batch.copy(), lazy=True)),
+                               ('streaming', StreamingScrubber([batch.iloc[:2], batch.iloc[2:]]))]:
+            with self.subTest(mode=mode):
+                index = RowHashIndex.for_dataset(mode, self.index_dir)
+                self.assertEqual(clean(scrubber, index)['ID'].tolist(), [1, 2])
+                index.save()
+
+                reopened = RowHashIndex.for_dataset(mode, self.index_dir)
+                self.assertEqual(len(reopened), 2, "Rows rejected after dedup were indexed")
+                rejected = hash_rows(batch.iloc[[3, 4]])
+                self.assertFalse(reopened.contains(rejected).any(), "Rejected rows are in the saved index")
+                fixed = pd.DataFrame({'ID': [2, 3, 4], 'Name': ['Bob', 'Carol', 'Dan']})
+                next_run = DataScrubber(fixed.copy())
+                next_run.remove_duplicate_records(index=reopened)
+                self.assertEqual(next_run.collect()['ID'].tolist(), [3, 4],
+                                 "Rows rejected in the last run should come back in the next one")
+
+    def test_small_batches_only_rewrite_delta(self):
+        index = RowHashIndex.for_dataset('sales', self.index_dir)
+        index.new_rows_mask(pd.DataFrame({'ID': range(100)}))
+        index.save()
+        main_mtime = index.main_path.stat().st_mtime_ns
+
+        index = RowHashIndex.for_dataset('sales', self.index_dir)
+        mask = index.new_rows_mask(pd.DataFrame({'ID': [99, 100, 101]}))
+        index.save()
+        self.assertEqual(mask.tolist(), [False, True, True], "New rows not detected")
+        self.assertEqual(index.main_path.stat().st_mtime_ns, main_mtime, "Main index rewritten for a small batch")
+        self.assertEqual(len(RowHashIndex.for_dataset('sales', self.index_dir)), 102, "Delta not persisted")
+
+    def test_clear_removes_files(self):
+        index = RowHashIndex.for_dataset('products', self.index_dir)
+        index.new_rows_mask(day_one)
+        index.save()
+        index.clear()
+        self.assertFalse(index.main_path.exists(), "Index files not removed")
+        self.assertEqual(len(index), 0, "Index not emptied")
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
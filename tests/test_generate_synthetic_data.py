@@ -0,0 +1,73 @@
+r"""
+tests/test_generate_synthetic_data.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_generate_synthetic_data.py
+    python3 tests\test_generate_synthetic_data.py
+
+This test suite verifies that the synthetic data generator is reproducible, keeps the
+keys of the sales data consistent with the customers and products, and injects errors
+at the requested rates.
+"""
+
+import unittest
+import pathlib
+import sys
+import tempfile
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.generate_synthetic_data import generate_all  # noqa: E402
+
+NO_ERRORS = {"missing": 0.0, "outlier": 0.0, "misentered": 0.0, "duplicate": 0.0}
+
+
+class TestGenerateSyntheticData(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = pathlib.Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, dataset: str, output_dir: pathlib.Path = None) -> pd.DataFrame:
+        return pd.read_csv((output_dir or self.output_dir) / f"{dataset}_data.csv")
+
+    def test_clean_data_has_consistent_keys(self):
+        written = generate_all(sales_rows=5_000, customer_count=200, product_count=30, chunk_size=1_000,
+                               error_rates=NO_ERRORS, output_dir=self.output_dir)
+        self.assertEqual(written, {"customers": 200, "products": 30, "sales": 5_000})
+        customers, products, sales = self.read("customers"), self.read("products"), self.read("sales")
+        self.assertTrue(sales["CustomerID"].isin(customers["CustomerID"]).all(), "Sale refers to unknown customer")
+        self.assertTrue(sales["ProductID"].isin(products["ProductID"]).all(), "Sale refers to unknown product")
+        self.assertTrue(sales["TransactionID"].is_unique)
+        self.assertEqual(pd.to_datetime(sales["SaleDate"], format="%m/%d/%Y").isna().sum(), 0)
+
+    def test_same_seed_gives_same_files(self):
+        other_dir = self.output_dir / "again"
+        generate_all(sales_rows=2_000, product_count=20, chunk_size=500, output_dir=self.output_dir)
+        generate_all(sales_rows=2_000, product_count=20, chunk_size=500, output_dir=other_dir)
+        for dataset in ("customers", "products", "sales"):
+            pd.testing.assert_frame_equal(self.read(dataset), self.read(dataset, other_dir))
+
+    def test_error_rates_are_applied(self):
+        rates = {"missing": 0.05, "outlier": 0.0, "misentered": 0.0, "duplicate": 0.02}
+        generate_all(sales_rows=20_000, product_count=20, chunk_size=5_000, error_rates=rates,
+                     output_dir=self.output_dir)
+        sales = self.read("sales")
+        missing_share = sales.isna().any(axis=1).mean()
+        duplicate_share = sales.duplicated().sum() / 20_000
+        self.assertAlmostEqual(missing_share, 0.05, delta=0.01, msg="Missing values not injected at the rate")
+        self.assertAlmostEqual(duplicate_share, 0.02, delta=0.005, msg="Duplicates not injected at the rate")
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
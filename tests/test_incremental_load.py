@@ -0,0 +1,142 @@
+r"""
+tests/test_incremental_load.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_incremental_load.py
+    python3 tests\test_incremental_load.py
+
+This test suite verifies that an incremental load writes only the inserted, changed,
+and deleted rows, that it leaves the table as a full reload would, that the watermarks
+are recorded, that a table without stored hashes is reloaded in full, that a diff
+names the changed keys before anything is written, and that the stored hashes are
+not read when the rows match the watermark.
+"""
+
+import unittest
+import pathlib
+import sqlite3
+import sys
+import tempfile
+from unittest import mock
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.bulk_loader import load_pragmas  # noqa: E402
+import scripts.incremental_load as incremental_load  # noqa: E402
+from scripts.incremental_load import (FULL, INCREMENTAL, apply_diff, create_state_tables,  # noqa: E402
+                                      diff_table, read_watermarks, stored_hashes, sync_table)
+
+SALES_TABLE = """
+    CREATE TABLE {name} (
+        transaction_id INTEGER PRIMARY KEY,
+        sale_date TEXT,
+        customer_id INTEGER,
+        sale_amount REAL,
+        payment_type TEXT
+    )
+"""
+
+sales = pd.DataFrame({
+    'transaction_id': [1, 2, 3, 4, 5],
+    'sale_date': ["2024-01-06", "2024-01-16", None, "2024-02-01", "2024-02-03"],
+    'customer_id': [1008, 1003, 1004, 1001, 1002],
+    'sale_amount': [39.1, 19.78, 5.0, 12.0, 8.5],
+    'payment_type': ["VISA", None, "Cash", "VISA", "MC"],
+})
+
+# The next day: sale 2 changed, sale 4 deleted, sale 6 added
+next_day = pd.concat([
+    sales[sales['transaction_id'] != 4],
+    pd.DataFrame({'transaction_id': [6], 'sale_date': ["2024-02-04"], 'customer_id': [1005],
+                  'sale_amount': [20.0], 'payment_type': ["Cash"]}),
+], ignore_index=True)
+next_day.loc[next_day['transaction_id'] == 2, 'sale_amount'] = 21.5
+
+
+def table_contents(conn, table):
+    return conn.execute(f"SELECT quote(transaction_id), quote(sale_date), quote(customer_id), quote(sale_amount), "
+                        f"quote(payment_type) FROM {table} ORDER BY transaction_id").fetchall()
+
+
+class TestIncrementalLoad(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(pathlib.Path(self.tmp.name) / "dw.db")
+        for name in ("sales", "sales_full"):
+            self.conn.execute(SALES_TABLE.format(name=name))
+        create_state_tables(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def sync(self, table, df, full=False):
+        with load_pragmas(self.conn):
+            return sync_table(self.conn, table, df, "transaction_id", full=full)
+
+    def test_only_changes_are_written(self):
+        self.sync("sales", sales)
+        report = self.sync("sales", next_day)
+        self.assertEqual(report['mode'], INCREMENTAL)
+        self.assertEqual((report['inserted'], report['updated'], report['deleted'], report['unchanged']),
+                         (1, 1, 1, 3))
+        self.assertEqual(self.sync("sales", next_day)['unchanged'], 5)
+
+    def test_same_rows_as_full_reload(self):
+        self.sync("sales", sales)
+        self.sync("sales", next_day)
+        self.sync("sales_full", next_day, full=True)
+        self.assertEqual(table_contents(self.conn, "sales"), table_contents(self.conn, "sales_full"))
+        self.assertEqual(len(stored_hashes(self.conn, "sales")), len(next_day))
+
+    def test_watermarks(self):
+        self.sync("sales", sales)
+        self.sync("sales", next_day)
+        watermark = read_watermarks(self.conn).set_index("table_name").loc["sales"]
+        self.assertEqual(watermark['mode'], INCREMENTAL)
+        self.assertEqual((watermark['max_key'], watermark['row_count']), (6, 5))
+        self.assertEqual((watermark['inserted'], watermark['updated'], watermark['deleted']), (1, 1, 1))
+
+    def test_table_without_hashes_is_reloaded(self):
+        sales.to_sql("sales", self.conn, if_exists="append", index=False)  # loaded before hashes were kept
+        report = self.sync("sales", next_day)
+        self.assertEqual(report['mode'], FULL)
+        self.assertEqual(report['deleted'], len(sales))
+        self.assertEqual(self.sync("sales", next_day)['mode'], INCREMENTAL)
+
+    def test_diff_before_apply(self):
+        self.sync("sales", sales)
+        diff = diff_table(self.conn, "sales", next_day, "transaction_id")
+        self.assertEqual(sorted(diff.stale_keys), [2, 4])
+        self.assertEqual(sorted(diff.fresh_keys), [2, 6])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0], len(sales))
+        with load_pragmas(self.conn):
+            report = apply_diff(self.conn, next_day, diff)
+        self.assertEqual((report['inserted'], report['updated'], report['deleted']), (1, 1, 1))
+
+    def test_unchanged_table_skips_stored_hashes(self):
+        self.sync("sales", sales)
+        with mock.patch.object(incremental_load, "stored_hashes", wraps=stored_hashes) as read:
+            report = self.sync("sales", sales.iloc[::-1])  # same rows, another order
+            self.assertEqual(read.call_count, 0)
+            self.assertEqual((report['mode'], report['unchanged']), (INCREMENTAL, len(sales)))
+            self.assertEqual(self.sync("sales", next_day)['updated'], 1)
+            self.assertEqual(read.call_count, 1)
+        self.conn.execute("DELETE FROM sales WHERE transaction_id = 6")  # changed outside the ETL
+        self.assertEqual(self.sync("sales", next_day)['mode'], FULL)
+
+    def test_duplicate_keys_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.sync("sales", pd.concat([sales, sales.head(1)]))
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
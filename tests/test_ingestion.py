@@ -0,0 +1,101 @@
+r"""
+tests/test_ingestion.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_ingestion.py
+    python3 tests\test_ingestion.py
+
+This test suite verifies that datasets are read with their declared columns and
+types, that dirty files are read as text, that every parser engine gives the
+same result, and that the chunks of a file all have the same types.
+"""
+
+import unittest
+import pathlib
+import sys
+import tempfile
+from unittest import mock
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts import ingestion  # noqa: E402
+from scripts.ingestion import DatasetReader, dataset_for_file  # noqa: E402
+from scripts.storage import HAS_PYARROW  # noqa: E402
+
+SALES_CSV = """TransactionID,SaleDate,CustomerID,ProductID,StoreID,CampaignID,SaleAmount,Notes
+550,1/6/2024,1008,102,404,0,39.1,first
+551,1/6/2024,1009,105,403,0,19.78,
+552,1/16/2024,1004,107,404,0,335.1,third
+"""
+
+
+class TestIngestion(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmp.name) / "sales_data.csv"
+        self.path.write_text(SALES_CSV)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_declared_columns_and_types(self):
+        reader = DatasetReader(engine="c")
+        df = reader.read(self.path)
+        self.assertNotIn('Notes', df.columns, "Undeclared column should not be read")
+        self.assertEqual(str(df['CustomerID'].dtype), "int64")
+        self.assertEqual(df['SaleAmount'].tolist(), [39.1, 19.78, 335.1])
+        self.assertEqual(reader.last_report['rows'], 3)
+        self.assertGreater(reader.last_report['bytes'], 0)
+
+    def test_projection_and_text(self):
+        df = DatasetReader(engine="c").read(self.path, columns=['SaleAmount', 'TransactionID'], text=True)
+        self.assertEqual(list(df.columns), ['SaleAmount', 'TransactionID'])
+        self.assertEqual(df['TransactionID'].tolist(), ["550", "551", "552"])
+
+    def test_engines_agree(self):
+        engines = ["c", "python"] + (["pyarrow"] if HAS_PYARROW else [])
+        results = [DatasetReader(engine=engine).read(self.path) for engine in engines]
+        for df in results[1:]:
+            pd.testing.assert_frame_equal(df, results[0])
+
+    def test_large_files_are_parsed_in_parallel(self):
+        rows = "".join(f'{600 + i},1/{i % 28 + 1}/2024,{1001 + i % 11},{101 + i % 8},404,0,{i * 1.5},"a, ""b""\nc"\n'
+                       for i in range(300))
+        self.path.write_text(SALES_CSV + rows)
+        reader = DatasetReader(engine="c", workers=2)
+        expected = reader.read(self.path)
+        with mock.patch.object(ingestion, "PARALLEL_SIZE", 0), mock.patch.object(ingestion, "RANGE_SIZE", 1000):
+            for text in (False, True):
+                df = reader.read(self.path, text=text)
+                self.assertGreater(reader.last_report['ranges'], 1)
+                pd.testing.assert_frame_equal(df, reader.read(self.path, text=text) if text else expected)
+        chunks = list(reader.iter_chunks(self.path, range_size=2000))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual({str(chunk['SaleAmount'].dtype) for chunk in chunks}, {"float64"},
+                         "Every chunk should have the declared types")
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+        self.assertEqual(reader.last_report['ranges'], len(chunks))
+
+    def test_chunks_of_other_files_get_the_types_of_the_first_chunk(self):
+        orders = self.path.with_name("orders.csv")
+        orders.write_text("id,amount\n" + "".join(f"{i},{i if i else 0.5}\n" for i in range(300)))
+        chunks = list(DatasetReader(engine="c", workers=2).iter_chunks(orders, range_size=500))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual({str(chunk['amount'].dtype) for chunk in chunks}, {"float64"})
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), pd.read_csv(orders))
+
+    def test_dataset_from_file_name(self):
+        self.assertEqual(dataset_for_file("data/dirty_data/dirty_customers_data.csv"), "customers")
+        self.assertIsNone(dataset_for_file("orders.csv"))
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
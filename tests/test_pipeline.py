@@ -0,0 +1,53 @@
+r"""
+tests/test_pipeline.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_pipeline.py
+    python3 tests\test_pipeline.py
+
+This test suite verifies that the pipeline entry point declares every script as a
+stage, in an order given by the files the stages read and write.
+"""
+
+import contextlib
+import io
+import unittest
+import pathlib
+import sys
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.pipeline import build_stages, main  # noqa: E402
+from scripts.pipeline_runner import stage_dependencies  # noqa: E402
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_stage_order_follows_files(self):
+        dependencies = stage_dependencies(build_stages())
+        self.assertEqual(dependencies['dirty_data'], set())
+        self.assertEqual(dependencies['prepare_customers'], {'dirty_data'})
+        self.assertEqual(dependencies['prepare_sales'], {'dirty_data', 'prepare_customers', 'prepare_products'})
+        self.assertEqual(dependencies['record_report'], {'prepare_customers', 'prepare_products', 'prepare_sales'})
+        self.assertEqual(dependencies['load_dw'], {'prep_m3'})
+        self.assertEqual(dependencies['schema_fact'], {'prep_m3'})
+
+    def test_list_stages(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(main(["--list"]), 0)
+        self.assertEqual(output.getvalue().split(), [stage.name for stage in build_stages()])
+
+    def test_unknown_stage_is_rejected(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main(["no_such_stage"])
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,132 @@
+r"""
+tests/test_pipeline_runner.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_pipeline_runner.py
+    python3 tests\test_pipeline_runner.py
+
+This test suite verifies that the pipeline runner orders stages by their file
+dependencies, runs independent stages in a process pool, skips the stages
+that depend on a failed one, and reports each stage's rows and memory.
+"""
+
+import unittest
+import pathlib
+import sys
+import tempfile
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.pipeline_runner import (  # noqa: E402
+    FAILED,
+    OK,
+    SKIPPED,
+    PipelineError,
+    Stage,
+    format_report,
+    run_pipeline,
+    stage_dependencies,
+)
+from scripts.storage import read_table, write_table  # noqa: E402
+
+
+# Stage functions live at module level so they can be sent to worker processes
+def write_file(path, text):
+    pathlib.Path(path).write_text(text)
+    return len(text)
+
+
+def concat_files(output, *inputs):
+    pathlib.Path(output).write_text("".join(pathlib.Path(path).read_text() for path in inputs))
+
+
+def fail():
+    raise ValueError("bad data")
+
+
+def do_nothing():
+    return None
+
+
+def keep_even_rows(source, target):
+    df = read_table(source)
+    write_table(df[df['n'] % 2 == 0], target, fmt="csv")
+
+
+class TestPipelineRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def stages(self):
+        a, b, ab = self.dir / "a.txt", self.dir / "b.txt", self.dir / "ab.txt"
+        return [
+            Stage("concat", concat_files, args=(ab, a, b), inputs=[a, b], outputs=[ab]),
+            Stage("write_a", write_file, args=(a, "a"), outputs=[a]),
+            Stage("write_b", write_file, args=(b, "b"), outputs=[b]),
+        ]
+
+    def test_dependencies_from_files(self):
+        self.assertEqual(stage_dependencies(self.stages()),
+                         {'concat': {'write_a', 'write_b'}, 'write_a': set(), 'write_b': set()})
+
+    def test_runs_in_dependency_order(self):
+        for parallel in (True, False):
+            results = run_pipeline(self.stages(), max_workers=2, parallel=parallel)
+            self.assertEqual({result.status for result in results.values()}, {OK})
+            self.assertEqual(list(results)[-1], 'concat')
+            self.assertEqual(results['write_a'].value, 1)
+            self.assertEqual((self.dir / "ab.txt").read_text(), "ab")
+
+    def test_failure_skips_dependents(self):
+        stages = self.stages()
+        stages[1] = Stage("write_a", fail, outputs=[self.dir / "a.txt"])
+        stages.append(Stage("report", do_nothing, after=["concat"]))
+        results = run_pipeline(stages, max_workers=2)
+        self.assertEqual(results['write_a'].status, FAILED)
+        self.assertIn("bad data", results['write_a'].error)
+        self.assertEqual(results['write_b'].status, OK, "Independent stage should still run")
+        self.assertEqual(results['concat'].status, SKIPPED)
+        self.assertEqual(results['report'].status, SKIPPED, "Indirect dependents should be skipped too")
+        with self.assertRaises(PipelineError):
+            run_pipeline(stages, parallel=False, raise_on_failure=True)
+
+    def test_missing_files_fail(self):
+        missing_output = Stage("no_output", do_nothing, outputs=[self.dir / "never.txt"])
+        missing_input = Stage("no_input", do_nothing, inputs=[self.dir / "absent.txt"])
+        results = run_pipeline([missing_output, missing_input], parallel=False)
+        self.assertEqual(results['no_output'].status, FAILED)
+        self.assertEqual(results['no_input'].status, FAILED)
+
+    def test_rows_and_memory_are_reported(self):
+        source, target = self.dir / "numbers.csv", self.dir / "even.csv"
+        pd.DataFrame({'n': range(10)}).to_csv(source, index=False)
+        for parallel in (True, False):
+            results = run_pipeline([Stage("even", keep_even_rows, args=(source, target), inputs=[source],
+                                          outputs=[target])], parallel=parallel)
+            self.assertEqual((results['even'].rows_in, results['even'].rows_out), (10, 5))
+            self.assertIsNotNone(results['even'].rows_per_sec)
+            self.assertGreater(results['even'].peak_rss_mb or 1, 0)
+        report = format_report(results).splitlines()
+        self.assertIn("Rows/sec", report[0])
+        self.assertEqual(report[1].split()[3:5], ["10", "5"])
+
+    def test_cycle_is_rejected(self):
+        stages = [Stage("first", do_nothing, after=["second"]), Stage("second", do_nothing, after=["first"])]
+        with self.assertRaises(ValueError):
+            run_pipeline(stages)
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,76 @@
+r"""
+tests/test_referential_integrity.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_referential_integrity.py
+    python3 tests\test_referential_integrity.py
+
+This test suite verifies that foreign keys missing from their dimension are found
+chunk by chunk, with numeric and text keys, and that streaming a fact file splits it
+into the matching rows and the orphans.
+"""
+
+import unittest
+import pathlib
+import sys
+import tempfile
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.referential_integrity import KeySet, check_file, check_references  # noqa: E402
+
+sales = pd.DataFrame({
+    'TransactionID': [1, 2, 3, 4, 5],
+    'CustomerID': [1001, 1002, 9999, None, 1001],
+    'ProductID': ["P1", "P9", "P2", "P1", "P8"],
+})
+
+references = {
+    'CustomerID': KeySet(pd.Series([1001.0, 1002.0, 1001.0, None])),
+    'ProductID': KeySet(["P1", "P2"]),
+}
+
+
+class TestReferentialIntegrity(unittest.TestCase):
+
+    def test_key_set(self):
+        self.assertEqual(len(references['CustomerID']), 2, "Keys should be distinct and exclude missing values")
+        self.assertTrue(references['CustomerID'].numeric)
+        self.assertEqual(references['CustomerID'].contains(pd.Series(["1001", "1003", None])).tolist(),
+                         [True, False, False], "Numeric keys should match text and float values")
+        self.assertFalse(references['ProductID'].numeric)
+        self.assertEqual(KeySet([]).contains(pd.Series([1])).tolist(), [False])
+
+    def test_orphans_in_chunks(self):
+        for chunk_size in (2, 100):
+            validation = check_references(sales, references, chunk_size=chunk_size)
+            self.assertEqual(validation.mask.tolist(), [True, False, False, True, False])
+            self.assertEqual(validation.invalid_counts, {'CustomerID': 1, 'ProductID': 2})
+            self.assertEqual(validation.reasons.dropna().to_dict(),
+                             {1: 'ProductID:orphan', 2: 'CustomerID:orphan', 4: 'ProductID:orphan'},
+                             "Missing keys should be allowed, and each orphan should get its first failing column")
+            self.assertEqual(validation.reason_counts, {'CustomerID:orphan': 1, 'ProductID:orphan': 2})
+
+    def test_check_file_streams(self):
+        with tempfile.TemporaryDirectory() as folder:
+            folder = pathlib.Path(folder)
+            sales.to_csv(folder / "sales.csv", index=False)
+            counts = check_file(folder / "sales.csv", references, folder / "valid.csv",
+                                folder / "orphans.csv", chunk_size=2)
+            self.assertEqual(counts, {'rows_in': 5, 'rows_out': 2, 'ProductID:orphan': 2, 'CustomerID:orphan': 1})
+            self.assertEqual(pd.read_csv(folder / "valid.csv")['TransactionID'].tolist(), [1, 4])
+            orphans = pd.read_csv(folder / "orphans.csv")
+            self.assertEqual(orphans['TransactionID'].tolist(), [2, 3, 5])
+            self.assertEqual(orphans['RejectReason'].tolist(),
+                             ['ProductID:orphan', 'CustomerID:orphan', 'ProductID:orphan'])
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,126 @@
+r"""
+tests/test_stage_cache.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_stage_cache.py
+    python3 tests\test_stage_cache.py
+
+This test suite verifies that a stage is skipped only while its inputs, code,
+parameters, and outputs are unchanged, including the column type files of the
+prepared tables, and that hits and misses are counted.
+"""
+
+import functools
+import unittest
+import pathlib
+import sys
+import tempfile
+from unittest import mock
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts import data_prep_m3, etl_to_dw  # noqa: E402
+from scripts.pipeline_runner import Stage, run_pipeline  # noqa: E402
+from scripts.stage_cache import LIBRARY_CODE, StageCache  # noqa: E402
+from scripts.storage import dtypes_path, table_files  # noqa: E402
+
+
+def upper_copy(source, target, suffix=""):
+    pathlib.Path(target).write_text(pathlib.Path(source).read_text().upper() + suffix)
+
+
+class TestStageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmp.name)
+        self.cache_file = self.dir / "cache.json"
+        self.source = self.dir / "source.txt"
+        self.target = self.dir / "target.txt"
+        self.source.write_text("abc")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_stage(self, force=False, suffix=""):
+        cache = StageCache(self.cache_file, force=force)
+        ran = cache.run("upper", upper_copy, self.source, self.target, suffix=suffix,
+                        inputs=[self.source], outputs=[self.target])
+        cache.save()
+        return ran, cache
+
+    def test_unchanged_stage_is_skipped(self):
+        self.assertTrue(self.run_stage()[0])
+        ran, cache = self.run_stage()
+        self.assertFalse(ran, "Unchanged stage should be skipped")
+        self.assertEqual(cache.summary()['hits'], 1)
+        self.assertEqual(self.target.read_text(), "ABC")
+
+    def test_changes_rerun_the_stage(self):
+        self.run_stage()
+        self.source.write_text("abcd")
+        self.assertTrue(self.run_stage()[0], "Changed input should rerun")
+        self.assertTrue(self.run_stage(suffix="!")[0], "Changed parameter should rerun")
+        self.target.unlink()
+        ran, cache = self.run_stage(suffix="!")
+        self.assertTrue(ran, "Missing output should rerun")
+        self.assertEqual(cache.summary()['misses'], 1)
+        self.assertTrue(self.run_stage(force=True, suffix="!")[0], "Forced stage should rerun")
+        self.assertFalse(self.run_stage(suffix="!")[0])
+
+    def test_invalidate(self):
+        self.run_stage()
+        cache = StageCache(self.cache_file)
+        cache.invalidate(["upper"])
+        cache.save()
+        self.assertTrue(self.run_stage()[0])
+
+    def test_library_code_covers_every_package(self):
+        names = {path.relative_to(PROJECT_ROOT).as_posix() for path in LIBRARY_CODE}
+        for name in ("scripts/storage.py", "scripts/data_preparation/cleaning_rules.py", "utils/utils_logger.py"):
+            self.assertIn(name, names, f"A change to {name} should invalidate the stages")
+
+    def test_pipeline_marks_cached_stages(self):
+        stage = Stage("upper", upper_copy, args=(self.source, self.target), inputs=[self.source],
+                      outputs=[self.target])
+        first = run_pipeline([stage], parallel=False, cache=StageCache(self.cache_file))
+        second = run_pipeline([stage], parallel=False, cache=StageCache(self.cache_file))
+        self.assertFalse(first['upper'].cached)
+        self.assertTrue(second['upper'].cached)
+
+    def test_missing_column_types_rerun_the_prepared_tables(self):
+        prepared = self.dir / "prepared"
+        tables = [prepared / name for name in data_prep_m3.PREPARED_FILES]
+        files = [path for table in tables for path in table_files(table)]
+        self.assertIn(dtypes_path(tables[0]), files)
+        with mock.patch.object(data_prep_m3, "PREPARED_DATA_DIR", prepared), \
+                mock.patch.object(data_prep_m3, "PREPARED_TABLE_FILES", files), \
+                mock.patch.object(data_prep_m3, "StageCache", functools.partial(StageCache, self.cache_file)), \
+                mock.patch.object(data_prep_m3, "prepare_all_data", wraps=data_prep_m3.prepare_all_data) as prepare:
+            data_prep_m3.main()
+            data_prep_m3.main()
+            self.assertEqual(prepare.call_count, 1, "Unchanged prepared tables should not be written again")
+            dtypes_path(tables[0]).unlink()
+            data_prep_m3.main()
+            self.assertEqual(prepare.call_count, 2, "A missing column type file should rerun the stage")
+            self.assertTrue(dtypes_path(tables[0]).exists())
+
+        with mock.patch.object(etl_to_dw, "PREPARED_FILES", tables), \
+                mock.patch.object(etl_to_dw, "StageCache", functools.partial(StageCache, self.cache_file)), \
+                mock.patch.object(etl_to_dw, "load_data_to_dw", return_value=True) as load:
+            etl_to_dw.main(full=False)
+            etl_to_dw.main(full=False)
+            self.assertEqual(load.call_count, 1)
+            dtypes_path(tables[0]).write_text(dtypes_path(tables[0]).read_text().replace("int64", "float64"))
+            etl_to_dw.main(full=False)
+            self.assertEqual(load.call_count, 2, "A changed column type file should reload the warehouse")
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
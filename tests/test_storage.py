@@ -0,0 +1,115 @@
+r"""
+tests/test_storage.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_storage.py
+    python3 tests\test_storage.py
+
+This test suite verifies that stored tables keep their column types (but not their
+memory compaction), that column projection and row filters give the same result in
+every storage format, and that shared tables are served from memory until their file changes.
+"""
+
+import json
+import unittest
+import pathlib
+import sys
+import tempfile
+from unittest import mock
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts import storage  # noqa: E402
+from scripts.data_scrubber import DataScrubber  # noqa: E402
+from scripts.etl_to_dw import dates_as_text  # noqa: E402
+from scripts.storage import read_table, shared_tables, write_table  # noqa: E402
+
+sales = pd.DataFrame({
+    'TransactionID': pd.array([1, 2, 3, 4], dtype="Int64"),
+    'SaleDate': pd.to_datetime(["2024-01-05", "2024-02-10", "2024-03-15", "2024-04-20"]),
+    'ProductID': pd.array([101, 102, 101, 103], dtype="int16"),
+    'Region': pd.Categorical(["East", "West", "East", "North"]),
+    'SaleAmount': [10.5, 200.0, 35.25, 80.0],
+})
+
+# As a CSV table is read back: compacted types are saved as their 64-bit or text types
+saved = sales.astype({'ProductID': "int64", 'Region': "str"})
+
+
+class TestStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmp.name) / "sales_data_prepared.csv"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_csv_keeps_column_types(self):
+        written = write_table(sales, self.path, fmt="csv")
+        self.assertEqual(written, self.path)
+        pd.testing.assert_frame_equal(read_table(self.path), saved)
+
+    def test_projection_and_filters(self):
+        write_table(sales, self.path, fmt="csv")
+        df = read_table(self.path, columns=['TransactionID', 'SaleAmount'],
+                        filters=[('SaleAmount', '>=', 35.25), ('Region', 'in', ['East', 'North'])])
+        self.assertEqual(list(df.columns), ['TransactionID', 'SaleAmount'])
+        self.assertEqual(df['TransactionID'].tolist(), [3, 4])
+
+    def test_compacted_types_are_not_saved(self):
+        write_table(DataScrubber(saved.copy()).compact_memory(category_ratio=0.9), self.path, fmt="csv")
+        types = json.loads(storage.dtypes_path(self.path).read_text())
+        self.assertEqual(types['ProductID'], "int64", "Downcast integers saved as the column type")
+        self.assertEqual(types['Region'], "str", "Categorical saved as the column type")
+        pd.testing.assert_frame_equal(read_table(self.path), saved)
+
+    def test_dates_reach_the_warehouse_as_date_text(self):
+        write_table(sales, self.path, fmt="csv")
+        df = dates_as_text(read_table(self.path))
+        self.assertEqual(df['SaleDate'].tolist(), ["2024-01-05", "2024-02-10", "2024-03-15", "2024-04-20"])
+
+    def test_plain_csv_is_read_as_before(self):
+        sales.to_csv(self.path, index=False)
+        pd.testing.assert_frame_equal(read_table(self.path), pd.read_csv(self.path))
+
+    def test_unknown_format_rejected(self):
+        with self.assertRaises(ValueError):
+            write_table(sales, self.path, fmt="xlsx")
+
+    def test_shared_tables_are_read_from_memory(self):
+        with shared_tables():
+            write_table(sales, self.path, fmt="csv")
+            with mock.patch.object(storage, "_read_csv", side_effect=AssertionError("file was parsed")):
+                df = read_table(self.path)
+                df.loc[0, 'SaleAmount'] = -1.0
+                pd.testing.assert_frame_equal(read_table(self.path), saved, "Readers should get their own copy")
+                subset = read_table(self.path, columns=['TransactionID'], filters=[('SaleAmount', '>', 50)])
+                self.assertEqual(subset['TransactionID'].tolist(), [2, 4])
+            sales.head(2).to_csv(self.path, index=False)  # rewritten by someone else
+            self.assertEqual(len(read_table(self.path)), 2, "A changed file should be read again")
+        with mock.patch.object(storage, "_read_csv", wraps=storage._read_csv) as read_csv:
+            read_table(self.path)
+            self.assertEqual(read_csv.call_count, 1, "Outside shared_tables, tables are read from their files")
+
+    @unittest.skipUnless(storage.HAS_PYARROW, "pyarrow is not installed")
+    def test_parquet_matches_csv(self):
+        written = write_table(sales, self.path, fmt="parquet", row_group_size=2)
+        self.assertEqual(written.suffix, ".parquet")
+        self.assertTrue(self.path.exists(), "CSV copy not exported")
+        self.assertEqual(storage.resolve_table(self.path), written)
+        filters = [('ProductID', '==', 101)]
+        parquet = read_table(written, columns=['TransactionID', 'Region'], filters=filters)
+        csv = read_table(self.path.with_suffix(".csv"), columns=['TransactionID', 'Region'], filters=filters)
+        self.assertEqual(parquet['TransactionID'].tolist(), csv['TransactionID'].tolist())
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
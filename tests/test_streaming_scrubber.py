@@ -0,0 +1,138 @@
+r"""
+tests/test_streaming_scrubber.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_streaming_scrubber.py
+    python3 tests\test_streaming_scrubber.py
+
+This test suite verifies that the StreamingScrubber class gives the same results
+(cleaned data, consistency counts, and profile) as the DataScrubber class when the
+data arrives in chunks, and that streamed quartiles stay close once they are sampled.
+"""
+
+import unittest
+import pathlib
+import sys
+import tempfile
+from io import StringIO
+import numpy as np
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.data_profiler import QuantileSketch  # noqa: E402
+from scripts.data_scrubber import DataScrubber  # noqa: E402
+from scripts.streaming_scrubber import StreamingScrubber  # noqa: E402
+
+# Duplicates are deliberately spread across chunk boundaries (chunksize=2)
+csv_text = """ID,Name,Score
+1,Alice,10
+2,Bob,15
+1,Alice,10
+3,Charlie,
+2,Bob,15
+4,Dan,40
+3,Charlie,
+"""
+
+
+def read_chunks(chunksize=2):
+    return pd.read_csv(StringIO(csv_text), chunksize=chunksize)
+
+
+class TestStreamingScrubber(unittest.TestCase):
+
+    def test_remove_duplicate_records_across_chunks(self):
+        stream = StreamingScrubber(read_chunks())
+        stream.remove_duplicate_records()
+        df_streamed = stream.collect()
+        df_eager = DataScrubber(pd.read_csv(StringIO(csv_text))).remove_duplicate_records()
+        self.assertEqual(df_streamed['ID'].tolist(), df_eager['ID'].tolist(), "Duplicates not removed across chunks")
+
+    def test_to_csv_matches_eager_cleaning(self):
+        stream = StreamingScrubber(read_chunks())
+        stream.handle_missing_data(fill_value=0)
+        stream.remove_duplicate_records()
+        stream.filter_column_outliers('Score', 0, 30)
+        with tempfile.TemporaryDirectory() as tmp:
+            output_path = pathlib.Path(tmp) / "clean.csv"
+            rows_written = stream.to_csv(output_path)
+            df_streamed = pd.read_csv(output_path)
+
+        scrubber = DataScrubber(pd.read_csv(StringIO(csv_text)))
+        scrubber.handle_missing_data(fill_value=0)
+        scrubber.remove_duplicate_records()
+        df_eager = scrubber.filter_column_outliers('Score', 0, 30).reset_index(drop=True)
+
+        self.assertEqual(rows_written, len(df_eager), "Row count written does not match")
+        pd.testing.assert_frame_equal(df_streamed, df_eager, check_dtype=False)
+
+    def test_consistency_counts_are_global(self):
+        stream = StreamingScrubber(read_chunks())
+        stream.handle_missing_data(fill_value=0)
+        stream.remove_duplicate_records()
+        with self.assertRaises(RuntimeError):
+            stream.check_data_consistency_before_cleaning()
+        stream.collect()
+
+        before = stream.check_data_consistency_before_cleaning()
+        self.assertEqual(before['duplicate_count'], 3, "Duplicates across chunks not counted")
+        self.assertEqual(before['null_counts']['Score'], 2, "Nulls across chunks not counted")
+        after = stream.check_data_consistency_after_cleaning()
+        self.assertEqual(after['duplicate_count'], 0, "Duplicates not removed in CLEAN stage")
+        self.assertEqual((stream.rows_in, stream.rows_out), (7, 4), "Row counters not tracked")
+
+    def assertProfilesMatch(self, streamed, full):
+        streamed, full = streamed.to_dict(), full.to_dict()
+        streamed['memory_bytes'] = full['memory_bytes'] = None
+        for name in full['columns']:
+            for stat in ('mean', 'std'):
+                self.assertAlmostEqual(streamed['columns'][name].pop(stat) or 0.0, full['columns'][name].pop(stat) or 0.0)
+        self.assertEqual(streamed, full)
+
+    def test_profile_is_built_chunk_by_chunk(self):
+        stream = StreamingScrubber(read_chunks())
+        with self.assertRaises(RuntimeError):
+            stream.profile()
+        list(stream.iter_chunks())
+        full_df = pd.read_csv(StringIO(csv_text))
+        self.assertProfilesMatch(stream.profile(), DataScrubber(full_df).profile())
+
+        stream = StreamingScrubber(read_chunks())
+        stream.remove_duplicate_records()
+        stream.filter_column_outliers('Score', 0, 30)
+        df_streamed = stream.collect()
+        self.assertProfilesMatch(stream.profile(), DataScrubber(df_streamed).profile())
+
+    def test_inspect_data_summarizes_the_stream(self):
+        stream = StreamingScrubber(read_chunks())
+        stream.remove_duplicate_records()
+        df_streamed = stream.collect()
+        info, describe = stream.inspect_data()
+        self.assertIn("Rows: 4, Columns: 3", info, "Rows of every chunk not summarized")
+        self.assertEqual(describe, DataScrubber(df_streamed).inspect_data()[1])
+
+    def test_sampled_quartiles_are_close(self):
+        values = pd.Series(np.random.default_rng(0).normal(100, 15, 20_000))
+        sketch = QuantileSketch(sample_size=256)
+        for start in range(0, len(values), 1_000):
+            sketch.add(values[start:start + 1_000])
+        self.assertLessEqual(sketch.values.size, 4 * 256, "Sample not bounded")
+        expected = values.quantile([0.25, 0.5, 0.75]).to_numpy()
+        np.testing.assert_allclose(sketch.quartiles(), expected, atol=3.0)
+
+    def test_stream_can_only_be_consumed_once(self):
+        stream = StreamingScrubber(read_chunks())
+        list(stream.iter_chunks())
+        with self.assertRaises(RuntimeError):
+            list(stream.iter_chunks())
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
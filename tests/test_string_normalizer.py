@@ -0,0 +1,70 @@
+r"""
+tests/test_string_normalizer.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_string_normalizer.py
+    python3 tests\test_string_normalizer.py
+
+This test suite verifies that the StringNormalizer class gives the same results as
+the equivalent row-by-row .str operations while transforming each distinct value once.
+"""
+
+import unittest
+import pathlib
+import sys
+import numpy as np
+import pandas as pd
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.string_normalizer import StringNormalizer  # noqa: E402
+
+regions = pd.Series([" east", "West ", None, "EAST", "north", " east", 123, "So  uth"], dtype=object)
+
+
+class TestStringNormalizer(unittest.TestCase):
+
+    def test_matches_row_by_row_str_operations(self):
+        normalized = StringNormalizer(["strip", "capitalize"]).normalize(regions)
+        expected = regions.str.strip().str.capitalize()
+        pd.testing.assert_series_equal(normalized.fillna("<missing>"), expected.fillna("<missing>"))
+
+    def test_stringify_matches_astype_str_except_missing(self):
+        normalized = StringNormalizer(["strip", "capitalize"], stringify=True).normalize(regions)
+        expected = regions.astype(str).str.strip().str.capitalize()
+        self.assertEqual(normalized[6], expected[6], "Non-string values not converted with str()")
+        self.assertTrue(pd.isna(normalized[2]), "Missing values should stay missing")
+
+    def test_each_distinct_value_transformed_once(self):
+        calls = []
+
+        def record(values):
+            calls.append(len(values))
+            return values.str.lower()
+
+        normalizer = StringNormalizer([record])
+        many = pd.Series(np.repeat(["A", "B", "C"], 10_000))
+        self.assertEqual(normalizer.normalize(many).unique().tolist(), ["a", "b", "c"])
+        normalizer.normalize(pd.Series(["B", "C", "D"]))
+        self.assertEqual(calls, [3, 1], "Values should be transformed once per distinct value and memoized")
+
+    def test_categorical_stays_categorical(self):
+        categorical = regions.dropna().astype(str).astype("category")
+        normalized = StringNormalizer(["strip", "collapse_whitespace", "lower"]).normalize(categorical)
+        self.assertIsInstance(normalized.dtype, pd.CategoricalDtype, "Categorical column not kept categorical")
+        self.assertEqual(sorted(normalized.cat.categories), ["123", "east", "north", "so uth", "west"],
+                         "Categories that became equal were not merged")
+
+    def test_unknown_transform_rejected(self):
+        with self.assertRaises(ValueError):
+            StringNormalizer(["strip", "shout"])
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,80 @@
+r"""
+tests/test_warehouse_indexes.py
+
+To run, open a terminal in the root project folder.
+Activate your virtual environment if needed, and run one of the following commands:
+
+    py tests\test_warehouse_indexes.py
+    python3 tests\test_warehouse_indexes.py
+
+This test suite verifies that the declared warehouse indexes are built once (and rebuilt
+when their declaration changes), that the planner statistics are collected, and that the
+standard BI queries use the indexes.
+"""
+
+import io
+import unittest
+import pathlib
+import sqlite3
+import sys
+import tempfile
+from contextlib import redirect_stdout
+
+# For local imports, temporarily add project root to Python sys.path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from scripts.etl_to_dw import create_schema  # noqa: E402
+from scripts.warehouse_indexes import INDEXES, QUERIES, build_indexes, main, query_plans  # noqa: E402
+
+
+class TestWarehouseIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = pathlib.Path(self.tmp.name) / "dw.db"
+        self.conn = sqlite3.connect(self.db)
+        create_schema(self.conn.cursor())
+        self.conn.executemany("INSERT INTO sales (transaction_id, sale_date, sale_date_key, customer_id, product_id, "
+                              "store_id, campaign_id, sale_amount) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                              [(i, f"2024-{i % 12 + 1:02d}-01", 20240101 + i % 12 * 100, 1000 + i % 50,
+                                100 + i % 10, 400 + i % 5, i % 3, float(i)) for i in range(500)])
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_indexes_are_built_once(self):
+        self.assertEqual(build_indexes(self.conn), list(INDEXES))
+        self.assertEqual(build_indexes(self.conn), [])
+        stats = {row[0] for row in self.conn.execute("SELECT idx FROM sqlite_stat1")}
+        self.assertEqual(stats, set(INDEXES))
+
+    def test_changed_index_is_rebuilt(self):
+        self.conn.execute("CREATE INDEX idx_sales_date ON sales (sale_date)")
+        self.assertEqual(build_indexes(self.conn, analyze=False), list(INDEXES))
+        columns = [row[2] for row in self.conn.execute("PRAGMA index_info(idx_sales_date)")]
+        self.assertEqual(columns, list(INDEXES["idx_sales_date"][1]))
+
+    def test_queries_use_the_indexes(self):
+        build_indexes(self.conn)
+        plans = query_plans(self.conn)
+        self.assertEqual(list(plans), list(QUERIES))
+        for name, index in [("top_customers", "idx_sales_customer"), ("product_region_matrix", "idx_sales_product"),
+                            ("sales_since", "idx_sales_date"), ("sales_by_month", "idx_sales_date"),
+                            ("sales_by_store", "idx_sales_store"), ("sales_by_campaign", "idx_sales_campaign")]:
+            self.assertTrue(any(index in step for step in plans[name]), f"{name}: {plans[name]}")
+
+    def test_command_lists_plans(self):
+        self.conn.commit()
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(main(["--build", "--db", str(self.db)]), 0)
+        self.assertIn("USING COVERING INDEX idx_sales_store", output.getvalue())
+        self.assertEqual(main(["--db", str(self.db.with_name("missing.db"))]), 1)
+
+
+# Run the tests with verbosity=2 for detailed output
+if __name__ == "__main__":
+    unittest.main(verbosity=2)